@@ -19,6 +19,7 @@ sys.path.insert(0, str(Path(__file__).parent / "src"))
 from src.auto_study.main import AutoStudyApp
 from src.auto_study.config.settings import settings
 from src.auto_study.utils.logger import logger
+from src.auto_study.automation.error_handler import shutdown as shutdown_error_handler
 from src.auto_study.recovery import (
     RecoveryManager, StateManager, RetryManager, PersistenceManager, TaskStatus
 )
@@ -259,6 +260,9 @@ class AutoStudySystem:
         self.is_shutting_down = True
         print("\\n🛑 开始优雅关闭系统...")
         
+        # 立即结束所有等待中的重试退避，避免关闭被退避等待拖住
+        shutdown_error_handler()
+        
         try:
             # 停止主应用
             if self.app:
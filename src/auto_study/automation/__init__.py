@@ -15,7 +15,7 @@ from .browser_manager import BrowserManager, BrowserType
 from .anti_detection import AntiDetection
 from .context_manager import ContextManager
 from .error_handler import (
-    ErrorHandler, error_handler, retry, safe_operation,
+    ErrorHandler, CircuitBreaker, CircuitOpenError, error_handler, retry, safe_operation,
     LoginError, CredentialsError, CaptchaError, FormNotFoundError, LoginTimeoutError,
     login_retry, captcha_retry
 )
@@ -30,6 +30,8 @@ __all__ = [
     'AntiDetection', 
     'ContextManager',
     'ErrorHandler',
+    'CircuitBreaker',
+    'CircuitOpenError',
     'error_handler',
     'retry',
     'safe_operation',
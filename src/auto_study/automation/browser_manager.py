@@ -7,19 +7,84 @@
 
 import asyncio
 import json
+import logging
+import re
 import time
-from contextlib import asynccontextmanager, contextmanager
+from contextlib import asynccontextmanager
 from pathlib import Path
 from typing import Optional, Dict, Any, List, Union
 from enum import Enum
 
-from playwright.sync_api import sync_playwright, Browser, BrowserContext, Page, Playwright
 from playwright.async_api import async_playwright, Browser as AsyncBrowser, BrowserContext as AsyncBrowserContext, Page as AsyncPage
 
 from ..config.config_manager import ConfigManager
 from ..utils.logger import logger
 
 
+# Chromium固定启动参数
+_STATIC_CHROME_ARGS = (
+    '--no-sandbox',
+    '--disable-blink-features=AutomationControlled',
+    '--disable-web-security',
+    '--disable-features=VizDisplayCompositor',
+    '--disable-dev-shm-usage',
+    '--no-first-run',
+    '--no-default-browser-check',
+)
+
+
+# 进程内共享的Playwright驱动，按引用计数在所有BrowserManager之间复用
+_pw_handle = None
+_pw_refcount = 0
+_pw_lock: Optional[asyncio.Lock] = None
+_pw_lock_loop = None
+
+
+def _get_pw_lock() -> asyncio.Lock:
+    """
+    获取保护共享驱动的锁
+    
+    按当前事件循环惰性创建：Python 3.8/3.9的asyncio.Lock在创建时绑定事件循环，
+    导入时创建的锁在asyncio.run启动的新循环中发生争用时会报错
+    
+    Returns:
+        当前事件循环下的锁
+    """
+    global _pw_lock, _pw_lock_loop
+    loop = asyncio.get_running_loop()
+    if _pw_lock is None or _pw_lock_loop is not loop:
+        _pw_lock = asyncio.Lock()
+        _pw_lock_loop = loop
+    return _pw_lock
+
+
+async def _acquire_playwright():
+    """
+    获取共享的Playwright驱动，首次调用时启动驱动进程
+    
+    Returns:
+        异步Playwright实例
+    """
+    global _pw_handle, _pw_refcount
+    async with _get_pw_lock():
+        if _pw_handle is None:
+            _pw_handle = await async_playwright().start()
+        _pw_refcount += 1
+        return _pw_handle
+
+
+async def _release_playwright() -> None:
+    """释放共享的Playwright驱动，最后一个引用释放时停止驱动进程"""
+    global _pw_handle, _pw_refcount
+    async with _get_pw_lock():
+        if _pw_refcount == 0:
+            return
+        _pw_refcount -= 1
+        if _pw_refcount == 0 and _pw_handle is not None:
+            handle, _pw_handle = _pw_handle, None
+            await handle.stop()
+
+
 class BrowserType(Enum):
     """支持的浏览器类型"""
     CHROMIUM = "chromium"
@@ -39,27 +104,67 @@ class BrowserManager:
             config_manager: 配置管理器实例
         """
         self.config_manager = config_manager or ConfigManager()
-        self.config = self.config_manager.get_config()
-        
-        self._playwright: Optional[Playwright] = None
-        self._browser: Optional[Browser] = None
-        self._context: Optional[BrowserContext] = None
-        self._pages: List[Page] = []
         
-        # 异步属性
+        # 浏览器资源（仅使用异步Playwright API，同一时刻只有一个驱动进程）
         self._async_playwright = None
         self._async_browser: Optional[AsyncBrowser] = None
         self._async_context: Optional[AsyncBrowserContext] = None
-        self._async_pages: List[AsyncPage] = []
+        # 按创建顺序跟踪页面（dict保持插入顺序且增删为O(1)），页面关闭时自动移除
+        self._async_pages: Dict[AsyncPage, None] = {}
+        # 资源是否已清理，避免重复关闭
+        self._closed = False
         
         # 浏览器配置
-        self._browser_config = self.config.get('browser', {})
-        self._anti_detection_config = self.config.get('anti_detection', {})
+        self.reload_config()
+        
+        # 限制同时打开的页面数，页面关闭时归还名额
+        performance_config = self.config.get('performance', {})
+        self._max_tabs = performance_config.get('max_concurrent_tabs', 5)
+        self._page_acquire_timeout = performance_config.get('page_acquire_timeout', 60)
+        # 信号量在事件循环中首次使用时创建，见 _get_page_semaphore
+        self._page_semaphore: Optional[asyncio.Semaphore] = None
+        self._page_semaphore_loop = None
+        
+        # 已创建目录缓存，避免重复的mkdir系统调用
+        self._ensured_dirs: set[Path] = set()
         
         # 数据目录
         self._data_dir = Path(self.config.get('system', {}).get('data_dir', 'data'))
         self._browser_data_dir = self._data_dir / 'browser_data'
-        self._browser_data_dir.mkdir(parents=True, exist_ok=True)
+        self._ensure_dir(self._browser_data_dir)
+    
+    def reload_config(self) -> None:
+        """重新读取配置，并刷新在热点路径上直接使用的配置属性"""
+        self.config = self.config_manager.get_config()
+        self._browser_config = self.config.get('browser', {})
+        self._anti_detection_config = self.config.get('anti_detection', {})
+        
+        self._timeout = self._browser_config.get('timeout', 30000)
+        self._viewport = {
+            'width': self._browser_config.get('width', 1920),
+            'height': self._browser_config.get('height', 1080)
+        }
+        self._user_agent = self._anti_detection_config.get('user_agent')
+        
+        # Chromium启动参数
+        chrome_args = _STATIC_CHROME_ARGS
+        proxy_config = self._browser_config.get('proxy')
+        if proxy_config and proxy_config.get('enabled'):
+            proxy_url = f"{proxy_config.get('host', 'localhost')}:{proxy_config.get('port', 8080)}"
+            chrome_args = (*chrome_args, f'--proxy-server={proxy_url}')
+        self._chrome_args = chrome_args
+    
+    def _ensure_dir(self, path: Path) -> None:
+        """
+        确保目录存在，已创建过的目录直接跳过
+        
+        Args:
+            path: 目录路径
+        """
+        if path in self._ensured_dirs:
+            return
+        path.mkdir(parents=True, exist_ok=True)
+        self._ensured_dirs.add(path)
     
     def _get_browser_launch_options(self, browser_type: BrowserType) -> Dict[str, Any]:
         """
@@ -74,34 +179,18 @@ class BrowserManager:
         options = {
             'headless': self._browser_config.get('headless', False),
             'slow_mo': self._browser_config.get('slow_mo', 0),
-            'timeout': self._browser_config.get('timeout', 30000),
+            'timeout': self._timeout,
+            # 信号由应用自行处理并通过close()统一关闭浏览器
+            'handle_sigint': False,
+            'chromium_sandbox': False,
         }
         
         # Chromium特定选项
         if browser_type in [BrowserType.CHROMIUM, BrowserType.CHROME]:
-            chrome_args = [
-                '--no-sandbox',
-                '--disable-blink-features=AutomationControlled',
-                '--disable-web-security',
-                '--disable-features=VizDisplayCompositor',
-                '--disable-dev-shm-usage',
-                '--no-first-run',
-                '--no-default-browser-check',
-            ]
-            
-            # 代理设置
-            proxy_config = self._browser_config.get('proxy')
-            if proxy_config and proxy_config.get('enabled'):
-                proxy_url = f"{proxy_config.get('host', 'localhost')}:{proxy_config.get('port', 8080)}"
-                chrome_args.append(f'--proxy-server={proxy_url}')
-            
-            options['args'] = chrome_args
-        
-        # 用户代理设置
-        user_agent = self._anti_detection_config.get('user_agent')
-        if user_agent:
-            options['user_agent'] = user_agent
+            # Playwright要求传入列表
+            options['args'] = list(self._chrome_args)
         
+        # 用户代理属于上下文选项，见_get_context_options
         return options
     
     def _get_context_options(self) -> Dict[str, Any]:
@@ -114,16 +203,11 @@ class BrowserManager:
         options = {}
         
         # 视窗大小
-        viewport = {
-            'width': self._browser_config.get('width', 1920),
-            'height': self._browser_config.get('height', 1080)
-        }
-        options['viewport'] = viewport
+        options['viewport'] = dict(self._viewport)
         
         # 用户代理
-        user_agent = self._anti_detection_config.get('user_agent')
-        if user_agent:
-            options['user_agent'] = user_agent
+        if self._user_agent:
+            options['user_agent'] = self._user_agent
         
         # 地理位置
         geolocation = self._anti_detection_config.get('geolocation')
@@ -142,168 +226,151 @@ class BrowserManager:
         
         return options
     
-    @contextmanager
-    def launch_browser(self, browser_type: BrowserType = BrowserType.CHROMIUM):
+    @asynccontextmanager
+    async def launch_browser(self, browser_type: BrowserType = BrowserType.CHROMIUM, headless: bool = None):
         """
-        启动浏览器（同步上下文管理器）
+        启动浏览器（异步上下文管理器）
         
         Args:
             browser_type: 浏览器类型
+            headless: 是否无头模式
             
         Yields:
             浏览器实例
         """
-        self._playwright = sync_playwright().start()
-        
+        await self.start_browser(headless=headless, browser_type=browser_type)
         try:
-            # 获取浏览器实例
-            if browser_type == BrowserType.CHROMIUM:
-                browser_launcher = self._playwright.chromium
-            elif browser_type == BrowserType.FIREFOX:
-                browser_launcher = self._playwright.firefox
-            elif browser_type == BrowserType.WEBKIT:
-                browser_launcher = self._playwright.webkit
-            else:
-                raise ValueError(f"不支持的浏览器类型: {browser_type}")
-            
-            # 启动浏览器
-            launch_options = self._get_browser_launch_options(browser_type)
-            self._browser = browser_launcher.launch(**launch_options)
-            
-            logger.info(f"浏览器启动成功: {browser_type.value}")
-            yield self._browser
-            
-        except Exception as e:
-            logger.error(f"浏览器启动失败: {e}")
-            raise
+            yield self._async_browser
         finally:
-            self._cleanup()
+            await self._async_cleanup()
     
-    @contextmanager
-    def create_context(self, **kwargs):
+    async def close_page(self, page: AsyncPage) -> None:
         """
-        创建浏览器上下文（同步上下文管理器）
+        关闭页面
         
         Args:
-            **kwargs: 额外的上下文选项
-            
-        Yields:
-            浏览器上下文实例
+            page: 要关闭的页面
         """
-        if not self._browser:
-            raise RuntimeError("浏览器未启动，请先调用launch_browser")
-        
         try:
-            # 合并上下文选项
-            context_options = self._get_context_options()
-            context_options.update(kwargs)
+            self._async_pages.pop(page, None)
             
-            # 创建上下文
-            self._context = self._browser.new_context(**context_options)
+            if not page.is_closed():
+                await page.close()
             
-            logger.info("浏览器上下文创建成功")
-            yield self._context
+            if logger.is_enabled_for(logging.INFO):
+                logger.info("页面关闭成功，剩余页面数: %d", len(self._async_pages))
             
         except Exception as e:
-            logger.error(f"创建浏览器上下文失败: {e}")
-            raise
-        finally:
-            if self._context:
-                self._context.close()
-                self._context = None
+            logger.error("关闭页面失败: %s", e)
     
-    def create_page(self) -> Page:
+    def get_active_pages(self) -> List[AsyncPage]:
         """
-        创建新页面
+        获取活动页面列表
         
         Returns:
-            页面实例
+            活动页面列表
         """
-        if not self._context:
-            raise RuntimeError("浏览器上下文未创建，请先调用create_context")
-        
-        try:
-            page = self._context.new_page()
-            self._pages.append(page)
-            
-            # 设置默认超时
-            page.set_default_timeout(self._browser_config.get('timeout', 30000))
-            
-            logger.info(f"新页面创建成功，当前页面数: {len(self._pages)}")
-            return page
-            
-        except Exception as e:
-            logger.error(f"创建页面失败: {e}")
-            raise
+        # 过滤已关闭的页面
+        return [page for page in self._async_pages if not page.is_closed()]
     
-    def close_page(self, page: Page) -> None:
+    @staticmethod
+    def _resolve_screenshot_type(path: Optional[Union[str, Path]] = None, **kwargs) -> str:
         """
-        关闭页面
-        
+        确定截图格式
+
+        显式指定的type优先，其次根据文件扩展名推断，默认使用体积更小的JPEG
+
         Args:
-            page: 要关闭的页面
+            path: 保存路径
+            **kwargs: 截图选项
+
+        Returns:
+            截图格式 ('png' 或 'jpeg')
         """
-        try:
-            if page in self._pages:
-                self._pages.remove(page)
-            
-            if not page.is_closed():
-                page.close()
-            
-            logger.info(f"页面关闭成功，剩余页面数: {len(self._pages)}")
-            
-        except Exception as e:
-            logger.error(f"关闭页面失败: {e}")
-    
-    def get_active_pages(self) -> List[Page]:
+        if kwargs.get('lossless'):
+            return 'png'
+
+        image_type = kwargs.get('type')
+        if image_type:
+            return 'jpeg' if image_type.lower() in ('jpg', 'jpeg') else image_type.lower()
+
+        if path:
+            suffix = Path(path).suffix.lower()
+            if suffix == '.png':
+                return 'png'
+
+        return 'jpeg'
+
+    def _get_screenshot_options(self, path: Optional[Union[str, Path]] = None, **kwargs) -> Dict[str, Any]:
         """
-        获取活动页面列表
+        构建截图选项，指定路径时确保目录存在
         
+        Args:
+            path: 保存路径
+            **kwargs: 截图选项
+            
         Returns:
-            活动页面列表
+            page.screenshot的参数字典
         """
-        # 过滤已关闭的页面
-        self._pages = [page for page in self._pages if not page.is_closed()]
-        return self._pages.copy()
-    
-    def screenshot_page(self, page: Page, path: Optional[Union[str, Path]] = None, **kwargs) -> bytes:
+        image_type = self._resolve_screenshot_type(path, **kwargs)
+        screenshot_options = {
+            'full_page': kwargs.get('full_page', True),
+            'type': image_type
+        }
+
+        # PNG不支持quality参数
+        if image_type == 'jpeg':
+            screenshot_options['quality'] = kwargs.get('quality', 80)
+
+        if path:
+            screenshot_path = Path(path)
+            self._ensure_dir(screenshot_path.parent)
+            screenshot_options['path'] = str(screenshot_path)
+        
+        return screenshot_options
+
+    async def screenshot_page(self, page: AsyncPage, path: Optional[Union[str, Path]] = None, **kwargs) -> bytes:
         """
         页面截图
         
         Args:
             page: 目标页面
             path: 保存路径，如果为None则返回字节数据
-            **kwargs: 截图选项
-            
+            **kwargs: 截图选项，默认输出JPEG；传入lossless=True强制PNG
+
         Returns:
             截图字节数据
         """
         try:
-            screenshot_options = {
-                'full_page': kwargs.get('full_page', True),
-                'quality': kwargs.get('quality', 90),
-                'type': kwargs.get('type', 'png')
-            }
-            
-            if path:
-                screenshot_path = Path(path)
-                screenshot_path.parent.mkdir(parents=True, exist_ok=True)
-                screenshot_options['path'] = str(screenshot_path)
-            
-            screenshot_data = page.screenshot(**screenshot_options)
+            screenshot_options = self._get_screenshot_options(path, **kwargs)
+            screenshot_data = await page.screenshot(**screenshot_options)
             
             if path:
-                logger.info(f"页面截图保存成功: {path}")
+                logger.info("页面截图保存成功: %s", path)
             else:
                 logger.info("页面截图完成")
             
             return screenshot_data
             
         except Exception as e:
-            logger.error(f"页面截图失败: {e}")
+            logger.error("页面截图失败: %s", e)
             raise
     
-    def save_page_content(self, page: Page, path: Union[str, Path], save_type: str = 'html') -> None:
+    @staticmethod
+    def _write_html(save_path: Path, content: str) -> None:
+        """
+        写入HTML内容
+        
+        直接写入编码后的字节，跳过文本层的缓冲和换行转换
+        
+        Args:
+            save_path: 保存路径
+            content: HTML文本
+        """
+        with open(save_path, 'wb', buffering=0) as f:
+            f.write(content.encode('utf-8', 'surrogatepass'))
+    
+    async def save_page_content(self, page: AsyncPage, path: Union[str, Path], save_type: str = 'html') -> None:
         """
         保存页面内容
         
@@ -314,13 +381,13 @@ class BrowserManager:
         """
         try:
             save_path = Path(path)
-            save_path.parent.mkdir(parents=True, exist_ok=True)
+            self._ensure_dir(save_path.parent)
             
             if save_type.lower() == 'html':
-                content = page.content()
-                save_path.write_text(content, encoding='utf-8')
+                content = await page.content()
+                self._write_html(save_path, content)
             elif save_type.lower() == 'pdf':
-                pdf_data = page.pdf()
+                pdf_data = await page.pdf()
                 save_path.write_bytes(pdf_data)
             else:
                 raise ValueError(f"不支持的保存类型: {save_type}")
@@ -331,16 +398,87 @@ class BrowserManager:
             logger.error(f"保存页面内容失败: {e}")
             raise
     
-    def wait_for_network_idle(self, page: Page, timeout: int = 30000) -> None:
+    async def capture_page(self, page: AsyncPage, *, screenshot_path: Union[str, Path],
+                           html_path: Union[str, Path], **kwargs) -> None:
+        """
+        同时保存页面截图和HTML内容
+        
+        截图和取HTML两个请求并发发出，HTML写盘放到线程池执行
+        
+        Args:
+            page: 目标页面
+            screenshot_path: 截图保存路径
+            html_path: HTML保存路径
+            **kwargs: 截图选项，同screenshot_page
+        """
+        try:
+            html_path = Path(html_path)
+            self._ensure_dir(html_path.parent)
+            screenshot_options = self._get_screenshot_options(screenshot_path, **kwargs)
+            
+            _, content = await asyncio.gather(
+                page.screenshot(**screenshot_options),
+                page.content()
+            )
+            
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(None, self._write_html, html_path, content)
+            
+            logger.info("页面快照保存成功: %s, %s", screenshot_path, html_path)
+            
+        except Exception as e:
+            logger.error("保存页面快照失败: %s", e)
+            raise
+    
+    async def wait_for(self, page: AsyncPage, *, selector: Optional[str] = None,
+                       response_url: Optional[str] = None, state: str = 'domcontentloaded',
+                       timeout: int = 30000) -> bool:
         """
-        等待网络空闲
+        等待页面就绪
+
+        组合加载状态、目标元素和目标响应三类条件，所需数据到达后立即返回，
+        不再等待networkidle的500ms空闲计时
+
+        Args:
+            page: 目标页面
+            selector: 需要出现的元素选择器
+            response_url: 需要等待的响应URL正则，需在触发请求之前调用
+            state: 页面加载状态
+            timeout: 超时时间（毫秒）
+
+        Returns:
+            是否在超时前满足所有条件
+        """
+        tasks = [asyncio.ensure_future(page.wait_for_load_state(state, timeout=timeout))]
+        try:
+            if selector:
+                tasks.append(asyncio.ensure_future(page.wait_for_selector(selector, timeout=timeout)))
+            if response_url:
+                pattern = re.compile(response_url)
+                tasks.append(asyncio.ensure_future(page.wait_for_event(
+                    'response',
+                    predicate=lambda response: pattern.search(response.url) is not None,
+                    timeout=timeout
+                )))
+
+            await asyncio.gather(*tasks)
+            return True
+        except Exception as e:
+            for task in tasks:
+                task.cancel()
+            logger.warning(f"等待页面就绪超时: {e}")
+            return False
+
+    async def wait_for_network_idle(self, page: AsyncPage, timeout: int = 30000) -> None:
+        """
+        等待网络空闲（已弃用，请使用wait_for等待具体的元素或响应）
         
         Args:
             page: 目标页面
             timeout: 超时时间（毫秒）
         """
         try:
-            page.wait_for_load_state('networkidle', timeout=timeout)
+            await page.wait_for_load_state('networkidle', timeout=timeout)
             logger.info("网络空闲状态检测完成")
         except Exception as e:
             logger.warning(f"等待网络空闲超时: {e}")
@@ -352,45 +490,16 @@ class BrowserManager:
         Returns:
             浏览器信息字典
         """
-        if not self._browser:
+        if not self._async_browser:
             return {}
         
         return {
-            'version': self._browser.version,
-            'connected': self._browser.is_connected(),
-            'contexts_count': len(self._browser.contexts),
-            'pages_count': len(self._pages)
+            'version': self._async_browser.version,
+            'connected': self._async_browser.is_connected(),
+            'contexts_count': len(self._async_browser.contexts),
+            'pages_count': len(self._async_pages)
         }
     
-    def _cleanup(self) -> None:
-        """清理资源"""
-        try:
-            # 关闭所有页面
-            for page in self._pages:
-                if not page.is_closed():
-                    page.close()
-            self._pages.clear()
-            
-            # 关闭上下文
-            if self._context:
-                self._context.close()
-                self._context = None
-            
-            # 关闭浏览器
-            if self._browser:
-                self._browser.close()
-                self._browser = None
-            
-            # 关闭Playwright
-            if self._playwright:
-                self._playwright.stop()
-                self._playwright = None
-            
-            logger.info("浏览器资源清理完成")
-            
-        except Exception as e:
-            logger.error(f"清理浏览器资源失败: {e}")
-    
     async def start_browser(self, headless: bool = None, browser_type: BrowserType = BrowserType.CHROMIUM):
         """
         启动浏览器（异步版本，用于main.py）
@@ -401,9 +510,15 @@ class BrowserManager:
         """
         if headless is not None:
             self._browser_config['headless'] = headless
+        
+        # 重复启动时先释放上一次的浏览器和驱动引用，避免浏览器泄漏和引用计数失衡
+        if self._async_playwright or self._async_browser or self._async_context:
+            await self._async_cleanup()
+        
+        self._closed = False
             
-        # 使用异步Playwright API
-        self._async_playwright = await async_playwright().start()
+        # 使用共享的异步Playwright驱动
+        self._async_playwright = await _acquire_playwright()
         
         try:
             # 获取浏览器实例
@@ -416,13 +531,30 @@ class BrowserManager:
             else:
                 raise ValueError(f"不支持的浏览器类型: {browser_type}")
             
-            # 启动浏览器
             launch_options = self._get_browser_launch_options(browser_type)
-            self._async_browser = await browser_launcher.launch(**launch_options)
-            
-            # 创建上下文
             context_options = self._get_context_options()
-            self._async_context = await self._async_browser.new_context(**context_options)
+            
+            if self._browser_config.get('persistent', False):
+                # 持久化用户目录：一次调用完成启动和上下文创建，并跨会话保留HTTP缓存
+                self._async_context = await browser_launcher.launch_persistent_context(
+                    str(self._browser_data_dir), **{**launch_options, **context_options}
+                )
+                # 持久化上下文没有独立的Browser对象时返回None
+                self._async_browser = self._async_context.browser
+                
+                # 接管启动时自带的页面
+                for page in self._async_context.pages:
+                    page.set_default_timeout(self._timeout)
+                    self._track_page(page)
+            else:
+                # 启动浏览器
+                self._async_browser = await browser_launcher.launch(**launch_options)
+                
+                # 创建上下文
+                self._async_context = await self._async_browser.new_context(**context_options)
+            
+            # 拦截不需要的资源类型
+            await self._setup_resource_blocking(self._async_context)
             
             logger.info(f"浏览器启动成功: {browser_type.value}")
             
@@ -431,6 +563,29 @@ class BrowserManager:
             await self._async_cleanup()
             raise
     
+    async def _setup_resource_blocking(self, context: AsyncBrowserContext) -> None:
+        """
+        按配置拦截指定类型的资源请求
+        
+        通过anti_detection.block_resources配置要拦截的资源类型，
+        例如 ['font', 'stylesheet']。默认不拦截：学习视频和验证码图片依赖media/image资源
+        
+        Args:
+            context: 浏览器上下文
+        """
+        blocked_types = frozenset(self._anti_detection_config.get('block_resources') or ())
+        if not blocked_types:
+            return
+        
+        async def _block(route):
+            if route.request.resource_type in blocked_types:
+                await route.abort()
+            else:
+                await route.continue_()
+        
+        await context.route("**/*", _block)
+        logger.info(f"已启用资源拦截: {', '.join(sorted(blocked_types))}")
+    
     async def get_page(self) -> AsyncPage:
         """
         获取或创建页面（异步版本，用于main.py）
@@ -445,14 +600,40 @@ class BrowserManager:
         if not self._async_pages:
             return await self.create_async_page()
         
-        # 返回第一个活跃页面
-        active_pages = [page for page in self._async_pages if not page.is_closed()]
-        if active_pages:
-            return active_pages[0]
+        # 返回最早创建的活跃页面（主页面）
+        for page in self._async_pages:
+            if not page.is_closed():
+                return page
         
         # 如果没有活跃页面，创建新页面
         return await self.create_async_page()
 
+    def _track_page(self, page: AsyncPage) -> None:
+        """
+        记录页面，页面关闭时自动移除
+        
+        Args:
+            page: 页面实例
+        """
+        self._async_pages[page] = None
+        page.once('close', lambda _: self._async_pages.pop(page, None))
+    
+    def _get_page_semaphore(self) -> asyncio.Semaphore:
+        """
+        获取限制页面数的信号量
+        
+        按当前事件循环惰性创建：Python 3.8/3.9的asyncio.Semaphore在创建时绑定事件循环，
+        在事件循环外构造的管理器达到页面上限等待名额时会报错
+        
+        Returns:
+            当前事件循环下的信号量
+        """
+        loop = asyncio.get_running_loop()
+        if self._page_semaphore is None or self._page_semaphore_loop is not loop:
+            self._page_semaphore = asyncio.Semaphore(self._max_tabs)
+            self._page_semaphore_loop = loop
+        return self._page_semaphore
+    
     async def create_async_page(self) -> AsyncPage:
         """
         创建新的异步页面
@@ -463,59 +644,92 @@ class BrowserManager:
         if not self._async_context:
             raise RuntimeError("浏览器上下文未创建，请先调用start_browser")
         
+        # 达到页面上限时等待已有页面关闭，超时后报错而不是无限挂起
+        semaphore = self._get_page_semaphore()
+        try:
+            await asyncio.wait_for(semaphore.acquire(), self._page_acquire_timeout)
+        except asyncio.TimeoutError:
+            logger.error("等待页面名额超时: 已打开 %d 个页面（上限 %d），%s 秒内没有页面关闭",
+                         len(self._async_pages), self._max_tabs, self._page_acquire_timeout)
+            raise RuntimeError(
+                f"页面数已达上限 {self._max_tabs}，等待 {self._page_acquire_timeout} 秒后仍无空闲名额，"
+                f"请关闭不再使用的页面或调大 performance.max_concurrent_tabs"
+            ) from None
+        
         try:
             page = await self._async_context.new_page()
-            self._async_pages.append(page)
-            
-            # 设置默认超时
-            page.set_default_timeout(self._browser_config.get('timeout', 30000))
-            
-            logger.info(f"新异步页面创建成功，当前页面数: {len(self._async_pages)}")
-            return page
-            
         except Exception as e:
-            logger.error(f"创建异步页面失败: {e}")
+            semaphore.release()
+            logger.error("创建异步页面失败: %s", e)
             raise
+        
+        # 页面关闭（手动关闭或随浏览器退出）时归还名额
+        page.once('close', lambda _: semaphore.release())
+        self._track_page(page)
+        
+        # 设置默认超时
+        page.set_default_timeout(self._timeout)
+        
+        if logger.is_enabled_for(logging.INFO):
+            logger.info("新异步页面创建成功，当前页面数: %d", len(self._async_pages))
+        return page
     
     async def _async_cleanup(self) -> None:
-        """异步资源清理"""
-        try:
-            # 关闭所有异步页面
-            for page in self._async_pages:
-                if not page.is_closed():
-                    await page.close()
-            self._async_pages.clear()
-            
-            # 关闭异步上下文
-            if self._async_context:
-                await self._async_context.close()
-                self._async_context = None
-            
-            # 关闭异步浏览器
-            if self._async_browser:
-                await self._async_browser.close()
-                self._async_browser = None
-            
-            # 关闭异步Playwright
-            if self._async_playwright:
-                await self._async_playwright.stop()
-                self._async_playwright = None
-            
+        """
+        异步资源清理
+        
+        各阶段独立执行并汇总错误，某一步失败不会跳过后续的关闭步骤
+        """
+        if self._closed:
+            return
+        
+        errors: List[Exception] = []
+        
+        # 并发关闭所有异步页面
+        pending = [page.close() for page in self._async_pages if not page.is_closed()]
+        if pending:
+            results = await asyncio.gather(*pending, return_exceptions=True)
+            errors.extend(result for result in results if isinstance(result, Exception))
+        self._async_pages.clear()
+        
+        # 关闭异步上下文
+        if self._async_context:
+            context, self._async_context = self._async_context, None
+            try:
+                await context.close()
+            except Exception as e:
+                errors.append(e)
+        
+        # 关闭异步浏览器
+        if self._async_browser:
+            browser, self._async_browser = self._async_browser, None
+            try:
+                await browser.close()
+            except Exception as e:
+                errors.append(e)
+        
+        # 释放共享的Playwright驱动
+        if self._async_playwright:
+            self._async_playwright = None
+            try:
+                await _release_playwright()
+            except Exception as e:
+                errors.append(e)
+        
+        self._closed = True
+        if errors:
+            logger.error("异步资源清理失败: %s", "; ".join(str(e) for e in errors))
+        else:
             logger.info("异步浏览器资源清理完成")
-            
-        except Exception as e:
-            logger.error(f"异步资源清理失败: {e}")
 
     async def close(self):
-        """关闭浏览器（异步版本）"""
-        # 同时清理同步和异步资源
+        """关闭浏览器"""
         await self._async_cleanup()
-        self._cleanup()
     
-    def __enter__(self):
-        """上下文管理器入口"""
+    async def __aenter__(self):
+        """异步上下文管理器入口"""
         return self
     
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        """上下文管理器出口"""
-        self._cleanup()
\ No newline at end of file
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """异步上下文管理器出口"""
+        await self._async_cleanup()
\ No newline at end of file
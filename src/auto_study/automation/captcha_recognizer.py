@@ -5,16 +5,179 @@
 """
 
 import io
-import base64
+import functools
+import hashlib
+import itertools
+import os
+import queue
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
 from typing import Optional, Union, Dict, Any, Tuple
 from pathlib import Path
-from PIL import Image, ImageEnhance, ImageFilter
-import ddddocr
+import numpy as np
+from PIL import Image
+
+# 优先使用SIMD加速的pybase64（接口与标准库一致），未安装时回退到标准库
+try:
+    import pybase64 as base64
+except ImportError:
+    import base64
+
+# JPEG验证码优先使用libjpeg-turbo SIMD解码（可选依赖）
+try:
+    import simplejpeg
+except ImportError:
+    simplejpeg = None
 
 from ..utils.logger import logger
 
 
+# 识别结果缓存的最大条目数
+_RESULT_CACHE_SIZE = 512
+
+# 文件内容缓存的最大条目数及可缓存的单文件大小上限
+_PATH_CACHE_SIZE = 64
+_PATH_CACHE_MAX_BYTES = 1024 * 1024
+
+# 失败图片后台写盘队列（所有识别器共享一个写盘线程，首次保存时创建）
+_SAVE_QUEUE_SIZE = 256
+_save_queue: Optional[queue.Queue] = None
+_save_queue_lock = threading.Lock()
+
+# 失败图片文件名序号（进程内全局递增，同一秒内多次失败也不会互相覆盖）
+_failed_image_counter = itertools.count()
+
+# ITU-R 601-2 灰度系数（与PIL的'L'模式转换一致）
+_GRAY_WEIGHTS = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+
+def _enhance_contrast(arr: np.ndarray, factor: float) -> np.ndarray:
+    """以灰度均值为中心拉伸对比度（等价于ImageEnhance.Contrast）"""
+    gray = arr @ _GRAY_WEIGHTS if arr.ndim == 3 else arr
+    mean = np.float32(int(gray.mean() + 0.5))
+    arr -= mean
+    arr *= factor
+    arr += mean
+    return np.clip(arr, 0, 255, out=arr)
+
+
+def _enhance_sharpness(arr: np.ndarray, factor: float) -> np.ndarray:
+    """与3x3平滑结果外插实现锐化（等价于ImageEnhance.Sharpness），边缘像素保持不变"""
+    if arr.shape[0] < 3 or arr.shape[1] < 3:
+        return arr
+    center = arr[1:-1, 1:-1]
+    smooth = sum(arr[dy:dy + center.shape[0], dx:dx + center.shape[1]]
+                 for dy in range(3) for dx in range(3))
+    smooth = (smooth + 4 * center) / 13
+    center[...] = smooth + factor * (center - smooth)
+    return np.clip(arr, 0, 255, out=arr)
+
+
+# 9元素求中值的比较交换网络（Paeth），每步仅需一次逐元素min/max
+_MEDIAN9_NETWORK = (
+    (1, 2), (4, 5), (7, 8), (0, 1), (3, 4), (6, 7), (1, 2), (4, 5), (7, 8),
+    (0, 3), (5, 8), (4, 7), (3, 6), (1, 4), (2, 5), (4, 7), (4, 2), (6, 4), (4, 2),
+)
+
+
+def _median_filter_3x3(arr: np.ndarray) -> np.ndarray:
+    """3x3中值滤波去噪（等价于ImageFilter.MedianFilter(3)，边缘按最近邻填充）"""
+    pad_width = ((1, 1), (1, 1)) + ((0, 0),) * (arr.ndim - 2)
+    padded = np.pad(arr, pad_width, mode='edge')
+    height, width = arr.shape[:2]
+    p = [padded[dy:dy + height, dx:dx + width] for dy in range(3) for dx in range(3)]
+    for a, b in _MEDIAN9_NETWORK:
+        p[a], p[b] = np.minimum(p[a], p[b]), np.maximum(p[a], p[b])
+    return p[4]
+
+
+def _write_failed_image(data: bytes, filepath: Path) -> None:
+    """将编码好的失败图片写入文件"""
+    try:
+        with open(filepath, 'wb') as f:
+            f.write(data)
+        logger.info(f"失败验证码图片已保存: {filepath}")
+    except Exception as e:
+        logger.error(f"写入失败验证码图片出错: {e}")
+
+
+def _save_worker(save_queue: queue.Queue) -> None:
+    """后台线程：依次将队列中的失败图片写入磁盘"""
+    while True:
+        data, filepath = save_queue.get()
+        try:
+            _write_failed_image(data, filepath)
+        finally:
+            save_queue.task_done()
+
+
+def _get_save_queue() -> queue.Queue:
+    """获取失败图片写盘队列，首次使用时启动后台写盘线程"""
+    global _save_queue
+    with _save_queue_lock:
+        if _save_queue is None:
+            _save_queue = queue.Queue(maxsize=_SAVE_QUEUE_SIZE)
+            threading.Thread(
+                target=_save_worker,
+                args=(_save_queue,),
+                name="captcha-failed-image-writer",
+                daemon=True
+            ).start()
+        return _save_queue
+
+
+def _decode_image_bytes(data) -> Image.Image:
+    """
+    解码图片字节数据
+    
+    JPEG数据在安装了simplejpeg时走libjpeg-turbo快速路径，其余格式交给PIL
+    
+    Args:
+        data: 图片字节数据（bytes或memoryview）
+        
+    Returns:
+        PIL图像对象
+    """
+    if simplejpeg is not None and bytes(data[:2]) == b'\xff\xd8':
+        try:
+            return Image.fromarray(simplejpeg.decode_jpeg(data, colorspace='RGB'))
+        except ValueError:
+            pass
+    return Image.open(io.BytesIO(data))
+
+
+def _inline_image_bytes(image: str) -> Optional[bytes]:
+    """
+    解析内嵌在字符串中的图片数据
+    
+    data URL和合法的长base64字符串视为图片数据，其余字符串视为文件路径
+    
+    Args:
+        image: data URL、base64字符串或文件路径
+        
+    Returns:
+        图片字节数据，字符串是文件路径时返回None
+    """
+    # base64只包含ASCII字符，编码失败说明只能是文件路径
+    try:
+        raw = image.encode('ascii')
+    except UnicodeEncodeError:
+        return None
+    
+    if raw[:11] == b'data:image/':
+        # 处理data URL格式，直接在字节视图上切片避免复制
+        return base64.b64decode(memoryview(raw)[raw.index(b',') + 1:])
+    if len(raw) > 100:
+        # 可能是base64字符串，由C层校验字符合法性
+        try:
+            return base64.b64decode(raw, validate=True)
+        except Exception:
+            pass
+    return None
+
+
 class CaptchaRecognizer:
     """验证码识别器"""
     
@@ -26,7 +189,15 @@ class CaptchaRecognizer:
             model_type: 模型类型 ('common', 'number', 'letter')
         """
         self.model_type = model_type
+        # 结果字符过滤器：数字模型只保留数字，字母模型只保留字母，其余保留字母数字
+        self._char_filter = {
+            'number': str.isdigit,
+            'letter': str.isalpha,
+        }.get(model_type, str.isalnum)
+        # 结果字符类型与模型一致时的置信度加成
+        self._type_bonus = 0.2 if model_type in ('number', 'letter') else 0.1
         self._ocr = None
+        self._ocr_accepts_image = False
         self._init_ocr()
         
         # 识别统计
@@ -45,13 +216,36 @@ class CaptchaRecognizer:
             'binarization': False,  # 二值化可能对某些验证码有害
             'resize_factor': 1.0
         }
+        self._preprocess_fn = self._compile_preprocess()
+        
+        # 识别结果缓存：图片字节哈希 -> (识别结果, 置信度)
+        self._result_cache: 'OrderedDict[bytes, Tuple[str, float]]' = OrderedDict()
+        
+        # 图片文件内容缓存：(路径, 修改时间, 大小) -> 文件字节
+        self._path_cache: 'OrderedDict[Tuple[str, int, int], bytes]' = OrderedDict()
+        
+        # 批量识别时多个线程共享统计信息和缓存
+        self._lock = threading.Lock()
+        
+        # 线程本地的PNG编码缓冲区
+        self._tls = threading.local()
     
     def _init_ocr(self) -> None:
         """初始化OCR引擎"""
         try:
+            # 延迟导入：加载ONNXRuntime较慢，只在真正创建识别器时才导入
+            import ddddocr
+            
             # 所有模型类型都使用默认初始化
             self._ocr = ddddocr.DdddOcr()
             
+            # 新版ddddocr可直接接收PIL图像，省去PNG编码再解码的开销
+            try:
+                self._ocr.classification(Image.new('L', (16, 16), 255))
+                self._ocr_accepts_image = True
+            except Exception:
+                self._ocr_accepts_image = False
+            
             logger.info(f"验证码识别器初始化成功，模型类型: {self.model_type}")
             
         except Exception as e:
@@ -72,35 +266,8 @@ class CaptchaRecognizer:
             # 转换为PIL图像
             pil_image = self._convert_to_pil(image)
             
-            # 应用预处理
-            processed_image = pil_image.copy()
-            
-            # 调整大小
-            if self._preprocess_config['resize_factor'] != 1.0:
-                width, height = processed_image.size
-                new_width = int(width * self._preprocess_config['resize_factor'])
-                new_height = int(height * self._preprocess_config['resize_factor'])
-                processed_image = processed_image.resize((new_width, new_height), Image.LANCZOS)
-            
-            # 增强对比度
-            if self._preprocess_config['enhance_contrast']:
-                enhancer = ImageEnhance.Contrast(processed_image)
-                processed_image = enhancer.enhance(1.5)  # 增强50%的对比度
-            
-            # 增强锐度
-            if self._preprocess_config['enhance_sharpness']:
-                enhancer = ImageEnhance.Sharpness(processed_image)
-                processed_image = enhancer.enhance(2.0)  # 增强锐度
-            
-            # 去除噪声
-            if self._preprocess_config['remove_noise']:
-                processed_image = processed_image.filter(ImageFilter.MedianFilter(size=3))
-            
-            # 二值化处理（可选）
-            if self._preprocess_config['binarization']:
-                processed_image = processed_image.convert('L')  # 转为灰度
-                # 简单阈值二值化
-                processed_image = processed_image.point(lambda x: 0 if x < 128 else 255, '1')
+            # 按当前配置编译好的预处理流程
+            processed_image = self._preprocess_fn(pil_image)
             
             logger.debug("验证码图片预处理完成")
             return processed_image
@@ -109,6 +276,82 @@ class CaptchaRecognizer:
             logger.error(f"验证码图片预处理失败: {e}")
             raise
     
+    def _compile_preprocess(self):
+        """
+        根据当前预处理配置生成专用的预处理函数
+        
+        配置在两次更新之间不变，预先筛选出启用的步骤，处理每张图片时无需再逐项判断
+        
+        Returns:
+            接收并返回PIL图像的预处理函数
+        """
+        config = dict(self._preprocess_config)
+        stages = []
+        
+        # 调整大小
+        resize_factor = config['resize_factor']
+        if resize_factor != 1.0:
+            def resize(image: Image.Image) -> Image.Image:
+                new_size = (int(image.width * resize_factor), int(image.height * resize_factor))
+                return image.resize(new_size, Image.LANCZOS)
+            stages.append(resize)
+        
+        # 对比度、锐度和去噪在同一数组缓冲区上完成
+        array_ops = []
+        if config['enhance_contrast']:
+            array_ops.append(lambda arr: _enhance_contrast(arr, 1.5))  # 增强50%的对比度
+        if config['enhance_sharpness']:
+            array_ops.append(lambda arr: _enhance_sharpness(arr, 2.0))  # 增强锐度
+        if config['remove_noise']:
+            array_ops.append(_median_filter_3x3)
+        
+        if array_ops:
+            def enhance(image: Image.Image) -> Image.Image:
+                if image.mode not in ('L', 'RGB'):
+                    image = image.convert('RGB')
+                arr = np.asarray(image, dtype=np.float32)
+                for op in array_ops:
+                    arr = op(arr)
+                return Image.fromarray(np.rint(arr, out=arr).astype(np.uint8))
+            stages.append(enhance)
+        
+        # 二值化处理（可选）
+        if config['binarization']:
+            stages.append(self._binarize)
+        
+        def preprocess(image: Image.Image) -> Image.Image:
+            for stage in stages:
+                image = stage(image)
+            return image
+        
+        return preprocess
+    
+    @staticmethod
+    def _binarize(image: Image.Image) -> Image.Image:
+        """灰度化后按固定阈值二值化"""
+        return image.convert('L').point(lambda x: 0 if x < 128 else 255, '1')
+    
+    def _variant_builders(self, image: Image.Image, max_attempts: int) -> list:
+        """
+        获取用于多次尝试的图片变体构造函数（按需构造）
+        
+        OCR结果是确定性的，重复识别同一张图没有意义，
+        因此每次尝试依次使用原图、二值化图和2倍放大图
+        
+        Args:
+            image: 预处理后的图片
+            max_attempts: 最大尝试次数
+            
+        Returns:
+            变体构造函数列表
+        """
+        builders = (
+            lambda: image,
+            lambda: self._binarize(image),
+            lambda: image.resize((image.width * 2, image.height * 2), Image.LANCZOS),
+        )
+        return list(builders[:max(1, max_attempts)])
+    
     def _convert_to_pil(self, image: Union[bytes, Image.Image, str, Path]) -> Image.Image:
         """
         将各种格式转换为PIL图像
@@ -122,49 +365,133 @@ class CaptchaRecognizer:
         if isinstance(image, Image.Image):
             return image
         
+        elif isinstance(image, np.ndarray):
+            return Image.fromarray(image)
+        
         elif isinstance(image, bytes):
-            return Image.open(io.BytesIO(image))
+            return _decode_image_bytes(image)
         
         elif isinstance(image, str):
-            # 检查是否是base64编码
-            if image.startswith('data:image/'):
-                # 处理data URL格式
-                header, data = image.split(',', 1)
-                image_bytes = base64.b64decode(data)
-                return Image.open(io.BytesIO(image_bytes))
-            elif len(image) > 100 and image.isascii():
-                # 可能是base64字符串
-                try:
-                    image_bytes = base64.b64decode(image)
-                    return Image.open(io.BytesIO(image_bytes))
-                except:
-                    pass
+            data = _inline_image_bytes(image)
+            if data is not None:
+                return _decode_image_bytes(data)
             
             # 作为文件路径处理
-            return Image.open(image)
+            return _decode_image_bytes(self._read_path_bytes(image))
         
         elif isinstance(image, Path):
-            return Image.open(image)
+            return _decode_image_bytes(self._read_path_bytes(image))
         
         else:
             raise ValueError(f"不支持的图片格式类型: {type(image)}")
     
+    def _read_path_bytes(self, path: Union[str, Path]) -> bytes:
+        """
+        读取图片文件内容，文件未变化时复用缓存
+        
+        Args:
+            path: 文件路径
+            
+        Returns:
+            文件字节数据
+        """
+        stat = os.stat(path)
+        key = (os.fspath(path), stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            data = self._path_cache.get(key)
+            if data is not None:
+                self._path_cache.move_to_end(key)
+                return data
+        
+        with open(path, 'rb') as f:
+            data = f.read()
+        
+        if len(data) <= _PATH_CACHE_MAX_BYTES:
+            with self._lock:
+                self._path_cache[key] = data
+                if len(self._path_cache) > _PATH_CACHE_SIZE:
+                    self._path_cache.popitem(last=False)
+        return data
+    
+    def _cache_key(self, image: Union[bytes, Image.Image, str, Path], preprocess: bool) -> Optional[bytes]:
+        """
+        计算识别结果缓存键（不解码PNG，直接对原始数据求哈希）
+        
+        Args:
+            image: 图片数据
+            preprocess: 是否预处理
+            
+        Returns:
+            缓存键，无法计算时返回None
+        """
+        try:
+            if isinstance(image, bytes):
+                raw = image
+            elif isinstance(image, Image.Image):
+                raw = f"{image.mode}:{image.size}".encode() + image.tobytes()
+            elif isinstance(image, np.ndarray):
+                raw = f"{image.dtype}:{image.shape}".encode() + image.tobytes()
+            elif isinstance(image, str):
+                # 与 _convert_to_pil 相同的判断规则，文件路径按文件内容计算，文件被覆盖后缓存键随之变化
+                raw = _inline_image_bytes(image)
+                if raw is None:
+                    raw = self._read_path_bytes(image)
+            elif isinstance(image, Path):
+                raw = self._read_path_bytes(image)
+            else:
+                return None
+        except Exception:
+            return None
+        
+        hasher = hashlib.blake2b(raw, digest_size=16)
+        hasher.update(b'\x01' if preprocess else b'\x00')
+        return hasher.digest()
+    
     def recognize(self, 
                  image: Union[bytes, Image.Image, str, Path],
                  preprocess: bool = True,
-                 max_attempts: int = 3) -> Optional[str]:
+                 max_attempts: int = 1) -> Optional[str]:
         """
         识别验证码
         
         Args:
             image: 验证码图片
             preprocess: 是否进行预处理
-            max_attempts: 最大尝试次数
+            max_attempts: 最大尝试次数，大于1时依次尝试二值化和放大后的变体（最多3种）
             
         Returns:
             识别结果字符串，失败返回None
         """
-        self._recognition_stats['total_attempts'] += 1
+        return self._recognize(image, self._cache_key(image, preprocess), preprocess, max_attempts)[0]
+    
+    def _recognize(self,
+                   image: Union[bytes, Image.Image, str, Path],
+                   cache_key: Optional[bytes],
+                   preprocess: bool,
+                   max_attempts: int) -> Tuple[Optional[str], float]:
+        """
+        使用已计算好的缓存键识别验证码
+        
+        Args:
+            image: 验证码图片
+            cache_key: 图片的缓存键，无法计算时为None
+            preprocess: 是否进行预处理
+            max_attempts: 最大尝试次数
+            
+        Returns:
+            (识别结果, 置信度)，失败时识别结果为None
+        """
+        with self._lock:
+            self._recognition_stats['total_attempts'] += 1
+            cached = self._result_cache.get(cache_key) if cache_key is not None else None
+            if cached is not None:
+                self._result_cache.move_to_end(cache_key)
+        
+        if cached is not None:
+            best_result, best_confidence = cached
+            self._record_success(best_confidence)
+            logger.debug(f"验证码识别命中缓存: '{best_result}'")
+            return best_result, best_confidence
         
         try:
             # 预处理图片
@@ -173,17 +500,18 @@ class CaptchaRecognizer:
             else:
                 processed_image = self._convert_to_pil(image)
             
-            # 多次尝试识别
+            # 多次尝试识别，每次使用不同的图片变体
             best_result = None
             best_confidence = 0.0
             
-            for attempt in range(max_attempts):
+            for attempt, build_variant in enumerate(self._variant_builders(processed_image, max_attempts)):
                 try:
-                    # 转换为字节数据
-                    img_bytes = self._pil_to_bytes(processed_image)
+                    variant = build_variant()
+                    ocr_input = (variant if self._ocr_accepts_image
+                                 else self._pil_to_bytes(variant))
                     
                     # 执行识别
-                    result = self._ocr.classification(img_bytes)
+                    result = self._ocr.classification(ocr_input)
                     
                     if result and isinstance(result, str):
                         # 清理结果
@@ -208,30 +536,85 @@ class CaptchaRecognizer:
                     continue
             
             if best_result:
-                self._recognition_stats['successful_recognitions'] += 1
-                # 更新平均置信度
-                total_success = self._recognition_stats['successful_recognitions']
-                current_avg = self._recognition_stats['average_confidence']
-                self._recognition_stats['average_confidence'] = (
-                    (current_avg * (total_success - 1) + best_confidence) / total_success
-                )
+                self._record_success(best_confidence, cache_key, best_result)
                 
                 logger.info(f"验证码识别成功: '{best_result}', 置信度: {best_confidence:.2f}")
-                return best_result
+                return best_result, best_confidence
             else:
-                self._recognition_stats['failed_recognitions'] += 1
+                self._record_failure()
                 logger.warning("验证码识别失败")
-                return None
+                return None, 0.0
                 
         except Exception as e:
-            self._recognition_stats['failed_recognitions'] += 1
+            self._record_failure()
             logger.error(f"验证码识别过程出错: {e}")
+            return None, 0.0
+    
+    def recognize_raw(self,
+                      buffer: bytes,
+                      size: Tuple[int, int],
+                      mode: str = 'RGB',
+                      preprocess: bool = True,
+                      max_attempts: int = 1) -> Optional[str]:
+        """
+        识别未编码的原始像素数据
+        
+        调用方已知图片尺寸和像素格式时使用，直接引用像素缓冲区，跳过图片解码
+        
+        Args:
+            buffer: 按行排列的原始像素数据
+            size: 图片尺寸 (宽, 高)
+            mode: 像素格式，如 'RGB'、'RGBA'、'L'
+            preprocess: 是否进行预处理
+            max_attempts: 最大尝试次数
+            
+        Returns:
+            识别结果字符串，失败返回None
+        """
+        try:
+            image = Image.frombuffer(mode, size, buffer, 'raw', mode, 0, 1)
+        except Exception as e:
+            logger.error(f"原始像素数据无法构造图片: {e}")
             return None
+        
+        return self.recognize(image, preprocess=preprocess, max_attempts=max_attempts)
+    
+    def _record_success(self, confidence: float,
+                        cache_key: Optional[bytes] = None,
+                        result: Optional[str] = None) -> None:
+        """记录一次成功识别，更新平均置信度并缓存结果"""
+        with self._lock:
+            stats = self._recognition_stats
+            stats['successful_recognitions'] += 1
+            # 增量更新平均值（Welford），避免 avg*(n-1) 随计数增长累积误差
+            stats['average_confidence'] += (
+                (confidence - stats['average_confidence']) / stats['successful_recognitions']
+            )
+            
+            if cache_key is not None and result is not None:
+                self._result_cache[cache_key] = (result, confidence)
+                if len(self._result_cache) > _RESULT_CACHE_SIZE:
+                    self._result_cache.popitem(last=False)
+    
+    def _record_failure(self) -> None:
+        """记录一次失败识别"""
+        with self._lock:
+            self._recognition_stats['failed_recognitions'] += 1
     
     def _pil_to_bytes(self, image: Image.Image) -> bytes:
-        """将PIL图像转换为字节数据"""
-        img_bytes = io.BytesIO()
-        image.save(img_bytes, format='PNG')
+        """
+        将PIL图像编码为PNG字节数据
+        
+        每个线程复用同一个缓冲区；编码结果会立即被解码或写盘，使用最低压缩级别
+        """
+        img_bytes = getattr(self._tls, 'buffer', None)
+        if img_bytes is None:
+            img_bytes = self._tls.buffer = io.BytesIO()
+        else:
+            img_bytes.seek(0)
+            img_bytes.truncate()
+        
+        image.save(img_bytes, format='PNG', compress_level=1)
         return img_bytes.getvalue()
     
     def _clean_result(self, result: str) -> str:
@@ -247,26 +630,8 @@ class CaptchaRecognizer:
         if not result:
             return ""
         
-        # 移除空白字符
-        cleaned = result.strip()
-        
-        # 移除常见的误识别字符
-        cleaned = cleaned.replace(' ', '')  # 移除空格
-        cleaned = cleaned.replace('\n', '')  # 移除换行
-        cleaned = cleaned.replace('\t', '')  # 移除制表符
-        
-        # 根据模型类型进行特定清理
-        if self.model_type == 'number':
-            # 只保留数字
-            cleaned = ''.join(c for c in cleaned if c.isdigit())
-        elif self.model_type == 'letter':
-            # 只保留字母
-            cleaned = ''.join(c for c in cleaned if c.isalpha())
-        else:
-            # 通用清理：移除特殊字符
-            cleaned = ''.join(c for c in cleaned if c.isalnum())
-        
-        return cleaned
+        # 按模型类型过滤字符；空白字符不属于任何保留类别，会被一并移除
+        return ''.join(filter(self._char_filter, result))
     
     def _calculate_confidence(self, result: str, image: Image.Image) -> float:
         """
@@ -280,23 +645,22 @@ class CaptchaRecognizer:
             置信度分数 (0.0-1.0)
         """
         confidence = 0.5  # 基础置信度
+        length = len(result)
         
         # 长度检查
-        if 3 <= len(result) <= 6:
+        if 3 <= length <= 6:
             confidence += 0.2
-        elif len(result) < 3 or len(result) > 8:
+        elif length < 3 or length > 8:
             confidence -= 0.3
         
-        # 字符类型一致性检查
-        if self.model_type == 'number' and result.isdigit():
-            confidence += 0.2
-        elif self.model_type == 'letter' and result.isalpha():
-            confidence += 0.2
+        # 字符类型一致性检查：字符过滤器作用于整串即为类型检查，通常一次扫描即可
+        if self._char_filter(result):
+            confidence += self._type_bonus
         elif result.isalnum():
             confidence += 0.1
         
         # 常见验证码长度检查
-        if len(result) == 4:  # 最常见的验证码长度
+        if length == 4:  # 最常见的验证码长度
             confidence += 0.1
         
         # 图片尺寸检查
@@ -309,27 +673,59 @@ class CaptchaRecognizer:
     def batch_recognize(self, 
                        images: list,
                        preprocess: bool = True,
-                       max_attempts: int = 3) -> Dict[int, Optional[str]]:
+                       max_attempts: int = 1,
+                       max_workers: Optional[int] = None) -> Dict[int, Optional[str]]:
         """
         批量识别验证码
         
+        OCR推理期间会释放GIL，因此使用线程池并行识别多张图片
+        
         Args:
             images: 图片列表
             preprocess: 是否预处理
             max_attempts: 每张图片的最大尝试次数
+            max_workers: 并行线程数，默认为CPU核数的一半
             
         Returns:
             索引到识别结果的映射
         """
-        results = {}
-        
-        for idx, image in enumerate(images):
-            logger.info(f"正在识别第 {idx + 1}/{len(images)} 张验证码")
-            result = self.recognize(image, preprocess, max_attempts)
-            results[idx] = result
-            
-            # 短暂延迟避免过度占用CPU
-            time.sleep(0.1)
+        if not images:
+            return {}
+        
+        if max_workers is None:
+            max_workers = max(1, (os.cpu_count() or 2) // 2)
+        max_workers = min(max_workers, len(images))
+        
+        logger.info(f"开始批量识别 {len(images)} 张验证码，并行线程数: {max_workers}")
+        
+        # 每张图片只计算一次缓存键；相同图片只提交一次推理，结果分发给所有重复项
+        # 无法计算缓存键的图片按索引各自识别
+        task_keys = []
+        futures = {}
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for idx, image in enumerate(images):
+                cache_key = self._cache_key(image, preprocess)
+                task_key = cache_key if cache_key is not None else idx
+                task_keys.append(task_key)
+                if task_key not in futures:
+                    futures[task_key] = executor.submit(
+                        self._recognize, image, cache_key, preprocess, max_attempts
+                    )
+            
+            results = {}
+            submitted = set()
+            for idx, task_key in enumerate(task_keys):
+                result, confidence = futures[task_key].result()
+                results[idx] = result
+                if task_key in submitted:
+                    # 重复项与单独识别时一样计入统计
+                    with self._lock:
+                        self._recognition_stats['total_attempts'] += 1
+                    if result is not None:
+                        self._record_success(confidence)
+                    else:
+                        self._record_failure()
+                submitted.add(task_key)
         
         return results
     
@@ -338,6 +734,9 @@ class CaptchaRecognizer:
         """
         保存识别失败的图片用于分析
         
+        图片在调用线程中编码为PNG，写盘交给后台线程完成，不阻塞识别流程；
+        需要确认文件已落盘时调用 flush_failed_images()
+        
         Args:
             image: 失败的图片
             save_dir: 保存目录
@@ -353,22 +752,34 @@ class CaptchaRecognizer:
             
             save_dir.mkdir(parents=True, exist_ok=True)
             
-            # 生成唯一文件名
-            timestamp = int(time.time())
-            filename = f"failed_captcha_{timestamp}.png"
+            # 生成唯一文件名：单调时钟保证顺序，进程号和序号保证不重名
+            filename = (f"failed_captcha_{time.monotonic_ns()}_{os.getpid()}_"
+                        f"{next(_failed_image_counter)}.png")
             filepath = save_dir / filename
             
-            # 转换并保存图片
-            pil_image = self._convert_to_pil(image)
-            pil_image.save(filepath, format='PNG')
+            # 已是PNG的字节数据直接写入，其余格式转换为PNG
+            if isinstance(image, bytes) and image[:8] == b'\x89PNG\r\n\x1a\n':
+                data = image
+            else:
+                data = self._pil_to_bytes(self._convert_to_pil(image))
+            
+            try:
+                _get_save_queue().put_nowait((data, filepath))
+            except queue.Full:
+                # 队列积压时同步写入，避免丢失样本
+                _write_failed_image(data, filepath)
             
-            logger.info(f"失败验证码图片已保存: {filepath}")
             return filepath
             
         except Exception as e:
             logger.error(f"保存失败验证码图片出错: {e}")
             return None
     
+    def flush_failed_images(self) -> None:
+        """等待所有排队中的失败图片写入磁盘"""
+        if _save_queue is not None:
+            _save_queue.join()
+    
     def update_preprocess_config(self, **kwargs) -> None:
         """
         更新预处理配置
@@ -379,9 +790,14 @@ class CaptchaRecognizer:
         for key, value in kwargs.items():
             if key in self._preprocess_config:
                 self._preprocess_config[key] = value
+                # 预处理参数变化后缓存的识别结果不再有效
+                with self._lock:
+                    self._result_cache.clear()
                 logger.info(f"预处理配置更新: {key} = {value}")
             else:
                 logger.warning(f"未知的预处理参数: {key}")
+        
+        self._preprocess_fn = self._compile_preprocess()
     
     def get_recognition_stats(self) -> Dict[str, Any]:
         """
@@ -390,7 +806,8 @@ class CaptchaRecognizer:
         Returns:
             统计信息字典
         """
-        stats = self._recognition_stats.copy()
+        with self._lock:
+            stats = self._recognition_stats.copy()
         
         # 计算成功率
         if stats['total_attempts'] > 0:
@@ -402,12 +819,13 @@ class CaptchaRecognizer:
     
     def reset_stats(self) -> None:
         """重置统计信息"""
-        self._recognition_stats = {
-            'total_attempts': 0,
-            'successful_recognitions': 0,
-            'failed_recognitions': 0,
-            'average_confidence': 0.0
-        }
+        with self._lock:
+            self._recognition_stats = {
+                'total_attempts': 0,
+                'successful_recognitions': 0,
+                'failed_recognitions': 0,
+                'average_confidence': 0.0
+            }
         logger.info("验证码识别统计信息已重置")
     
     def test_recognition(self, test_image_path: Union[str, Path]) -> Dict[str, Any]:
@@ -454,9 +872,10 @@ class CaptchaRecognizer:
             }
 
 
-# 创建默认识别器实例
-default_recognizer = CaptchaRecognizer()
-number_recognizer = CaptchaRecognizer('number')
+@functools.lru_cache(maxsize=None)
+def _get_recognizer(model_type: str) -> CaptchaRecognizer:
+    """获取共享的识别器实例，首次使用时才加载OCR模型"""
+    return CaptchaRecognizer(model_type)
 
 
 def recognize_captcha(image: Union[bytes, Image.Image, str, Path], 
@@ -473,9 +892,7 @@ def recognize_captcha(image: Union[bytes, Image.Image, str, Path],
     Returns:
         识别结果
     """
-    if model_type == 'number':
-        recognizer = number_recognizer
-    else:
-        recognizer = default_recognizer
+    if model_type != 'number':
+        model_type = 'common'
     
-    return recognizer.recognize(image, preprocess=preprocess)
\ No newline at end of file
+    return _get_recognizer(model_type).recognize(image, preprocess=preprocess)
\ No newline at end of file
@@ -5,16 +5,86 @@
 包括Cookies、LocalStorage、SessionStorage等数据的持久化
 """
 
+import asyncio
+import gzip
 import json
+import os
+import shutil
 import time
+import weakref
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Union
+from urllib.parse import urlparse
+from typing import Callable, Dict, List, Any, Optional, Union
 from playwright.sync_api import BrowserContext, Page
+from playwright.async_api import BrowserContext as AsyncBrowserContext, Page as AsyncPage
+
+# 优先使用orjson进行序列化（C实现，速度远快于标准库），未安装时回退到json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# 安装了msgpack时Cookies按列式二进制格式保存
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
 
 from ..utils.logger import logger
 from ..config.config_manager import ConfigManager
 
 
+# 状态文件解析缓存的最大条目数
+_PARSE_CACHE_SIZE = 128
+
+# 状态文件读写缓冲区大小
+_IO_BUFFER_SIZE = 64 * 1024
+
+# 状态数据序列化后超过该大小时以gzip压缩保存
+_GZIP_THRESHOLD = 32 * 1024
+
+# 合并保存全部上下文状态的文件及其格式版本
+_STATE_FILE_NAME = 'context.bin'
+_STATE_FILE_VERSION = 2
+
+# 合并文件出现之前按类别分开保存的状态文件
+_LEGACY_STATE_FILES = ('cookies.json', 'cookies.mp', 'storage.json', 'storage.json.gz', 'metadata.json')
+
+# Playwright Cookie的标准字段，列式保存时作为固定的列顺序
+_COOKIE_COLUMNS = ('name', 'value', 'domain', 'path', 'expires', 'httpOnly', 'secure', 'sameSite')
+
+# 读取页面LocalStorage和SessionStorage的脚本（合并为一次CDP往返）
+_DUMP_STORAGE_SCRIPT = """
+    () => {
+        const dump = (storage) => {
+            const result = {};
+            for (let i = 0; i < storage.length; i++) {
+                const key = storage.key(i);
+                result[key] = storage.getItem(key);
+            }
+            return result;
+        };
+        return {local: dump(localStorage), session: dump(sessionStorage)};
+    }
+"""
+
+# 页面内的Storage恢复函数：只写入页面中尚不存在的键，避免覆盖网站在本次会话中更新过的值。
+# 初始化脚本和 restore_page_storage 共用，保证两条恢复路径的规则一致
+_FILL_STORAGE_FUNCTION = (
+    "(m) => {"
+    "const fill = (storage, items) => {"
+    "for (const [key, value] of Object.entries(items || {})) {"
+    "if (storage.getItem(key) === null) storage.setItem(key, value);"
+    "}"
+    "};"
+    "try { fill(localStorage, m.localStorage); fill(sessionStorage, m.sessionStorage); } catch (e) {}"
+    "}"
+)
+
+# 调用初始化脚本注册的恢复函数；加载状态前已打开的文档中函数不存在时返回false
+_CALL_RESTORE_STORAGE = "(m) => !!window.__restoreStorage && (window.__restoreStorage(m), true)"
+
+
 class ContextManager:
     """上下文持久化管理器"""
     
@@ -40,6 +110,194 @@ class ContextManager:
         
         # 默认上下文名称
         self._default_context_name = 'default'
+        
+        # 状态文件只供程序读写，仅调试模式下输出缩进格式便于查看
+        self._pretty_json = bool(self.config.get('system', {}).get('debug', False))
+        
+        # 已解析的状态文件缓存：路径 -> ((修改时间, 大小), 解析结果)
+        self._parse_cache: Dict[Path, Any] = {}
+        
+        # 浏览器上下文的User-Agent在其生命周期内不变，首次读取后缓存
+        self._user_agent_cache = weakref.WeakKeyDictionary()
+    
+    def _dumps(self, data: Any) -> bytes:
+        """
+        序列化为UTF-8编码的JSON字节
+        
+        Args:
+            data: 待序列化的数据
+            
+        Returns:
+            JSON字节数据（默认紧凑格式，调试模式下缩进2格）
+        """
+        if orjson is not None:
+            option = orjson.OPT_NON_STR_KEYS
+            if self._pretty_json:
+                option |= orjson.OPT_INDENT_2
+            return orjson.dumps(data, option=option)
+        
+        if self._pretty_json:
+            return json.dumps(data, indent=2, ensure_ascii=False).encode('utf-8')
+        return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    
+    @staticmethod
+    def _loads(data: bytes) -> Any:
+        """
+        解析JSON字节数据
+        
+        Args:
+            data: JSON字节数据
+            
+        Returns:
+            解析结果
+        """
+        if orjson is not None:
+            return orjson.loads(data)
+        return json.loads(data)
+    
+    def _read_json(self, path: Path) -> Any:
+        """
+        读取并解析JSON状态文件，文件未变化时直接返回缓存的解析结果
+        
+        返回的对象可能被多次调用共享，调用方不应修改
+        
+        Args:
+            path: 文件路径
+            
+        Returns:
+            解析结果
+        """
+        return self._read_cached(path, self._loads)
+    
+    def _read_cached(self, path: Path, decode: Callable[[bytes], Any]) -> Any:
+        """
+        读取并解码状态文件，按 (修改时间, 大小) 缓存解码结果
+        
+        Args:
+            path: 文件路径
+            decode: 解码函数
+            
+        Returns:
+            解码结果
+        """
+        stat = path.stat()
+        version = (stat.st_mtime_ns, stat.st_size)
+        
+        cached = self._parse_cache.get(path)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        
+        with open(path, 'rb', buffering=_IO_BUFFER_SIZE) as f:
+            data = decode(f.read())
+        
+        self._parse_cache.pop(path, None)
+        self._parse_cache[path] = (version, data)
+        if len(self._parse_cache) > _PARSE_CACHE_SIZE:
+            # 按插入顺序淘汰最早的条目
+            self._parse_cache.pop(next(iter(self._parse_cache)))
+        
+        return data
+    
+    def _write_file(self, path: Path, payload: bytes) -> None:
+        """
+        原子写入状态文件
+        
+        先写入同目录下的临时文件再替换目标文件，写入中途失败不会留下损坏的状态文件，
+        读取方也只会看到完整的旧文件或新文件
+        
+        Args:
+            path: 文件路径
+            payload: 文件内容
+        """
+        tmp_path = path.with_name(path.name + '.tmp')
+        try:
+            with open(tmp_path, 'wb', buffering=_IO_BUFFER_SIZE) as f:
+                f.write(payload)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if tmp_path.exists():
+                tmp_path.unlink()
+            raise
+    
+    @staticmethod
+    def _cookies_to_columns(cookies: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        将Cookie列表转换为列式结构，每个字段一列
+        
+        Args:
+            cookies: Cookie列表
+            
+        Returns:
+            包含字段名(keys)和各字段值列表(columns)的字典，缺失的字段记为None
+        """
+        keys = dict.fromkeys(_COOKIE_COLUMNS)
+        for cookie in cookies:
+            for key in cookie:
+                if key not in keys:
+                    keys[key] = None
+        
+        return {
+            'keys': list(keys),
+            'columns': [[cookie.get(key) for cookie in cookies] for key in keys]
+        }
+    
+    @staticmethod
+    def _columns_to_cookies(columns: Dict[str, Any], valid_only: bool = False) -> List[Dict[str, Any]]:
+        """
+        将列式结构还原为Cookie列表
+        
+        Args:
+            columns: _cookies_to_columns 生成的列式结构
+            valid_only: 是否只还原未过期的Cookie（仅检查expires列）
+            
+        Returns:
+            Cookie列表
+        """
+        keys = columns['keys']
+        cols = columns['columns']
+        
+        if valid_only and 'expires' in keys:
+            current_time = int(time.time())
+            keep = [
+                i for i, expires in enumerate(cols[keys.index('expires')])
+                if expires is None or expires == -1 or expires >= current_time
+            ]
+            cols = [[col[i] for i in keep] for col in cols]
+        
+        return [
+            {key: value for key, value in zip(keys, row) if value is not None}
+            for row in zip(*cols)
+        ]
+    
+    def _read_cookies(self, context_path: Path, valid_only: bool = False) -> Optional[List[Dict[str, Any]]]:
+        """
+        读取保存的Cookies，优先读取合并状态文件，其次为列式二进制文件
+        
+        Args:
+            context_path: 上下文存储路径
+            valid_only: 是否过滤掉已过期的Cookie
+            
+        Returns:
+            Cookie列表，没有保存Cookies时返回None
+        """
+        state = self._read_state(context_path)
+        if state is not None:
+            cookies = state.get('cookies') or []
+            if isinstance(cookies, dict):
+                return self._columns_to_cookies(cookies, valid_only)
+            return self._filter_valid_cookies(cookies) if valid_only else cookies
+        
+        binary_file = context_path / 'cookies.mp'
+        if msgpack is not None and binary_file.exists():
+            cookies_data = self._read_cached(binary_file, lambda data: msgpack.unpackb(data, raw=False))
+            return self._columns_to_cookies(cookies_data['cookies'], valid_only)
+        
+        cookies_file = context_path / 'cookies.json'
+        if cookies_file.exists():
+            cookies = self._read_json(cookies_file).get('cookies', [])
+            return self._filter_valid_cookies(cookies) if valid_only else cookies
+        
+        return None
     
     def save_context_state(self, context: BrowserContext, context_name: str = None) -> bool:
         """
@@ -55,18 +313,20 @@ class ContextManager:
         context_name = context_name or self._default_context_name
         
         try:
-            # 创建上下文目录
             context_path = self._context_dir / context_name
-            context_path.mkdir(parents=True, exist_ok=True)
+            pages = context.pages
             
-            # 保存cookies
-            self._save_cookies(context, context_path)
+            cookies = context.cookies()
+            storage_data = self._collect_storage_state(pages)
             
-            # 保存storage状态
-            self._save_storage_state(context, context_path)
+            # 元信息中记录数量，供 get_context_info 直接读取
+            counts = {'cookies_count': len(cookies)}
+            if storage_data:
+                counts['storage_pages_count'] = len(storage_data)
+            metadata = self._build_metadata(pages, self._get_user_agent(context, pages), counts)
             
-            # 保存上下文元信息
-            self._save_context_metadata(context, context_path)
+            # 全部状态合并写入一个文件
+            self._write_context_state(context_path, cookies, storage_data, metadata)
             
             logger.info(f"上下文状态保存成功: {context_name}")
             return True
@@ -75,6 +335,185 @@ class ContextManager:
             logger.error(f"保存上下文状态失败: {e}")
             return False
     
+    async def save_context_state_async(self, context: AsyncBrowserContext, context_name: str = None) -> bool:
+        """
+        异步保存浏览器上下文状态（Playwright异步API）
+        
+        Cookies、各页面Storage和User-Agent并发获取，文件写入在线程池中执行，
+        保存耗时取决于最慢的一次往返而不是所有往返之和
+        
+        Args:
+            context: 异步API的浏览器上下文
+            context_name: 上下文名称，默认使用default
+            
+        Returns:
+            保存是否成功
+        """
+        context_name = context_name or self._default_context_name
+        
+        try:
+            context_path = self._context_dir / context_name
+            pages = context.pages
+            
+            cookies, storage_data, user_agent = await asyncio.gather(
+                context.cookies(),
+                self._collect_storage_state_async(pages),
+                self._get_user_agent_async(context, pages)
+            )
+            
+            counts = {'cookies_count': len(cookies)}
+            if storage_data:
+                counts['storage_pages_count'] = len(storage_data)
+            metadata = self._build_metadata(pages, user_agent, counts)
+            
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(
+                None, self._write_context_state, context_path, cookies, storage_data, metadata
+            )
+            
+            logger.info(f"上下文状态保存成功: {context_name}")
+            return True
+            
+        except Exception as e:
+            logger.error(f"保存上下文状态失败: {e}")
+            return False
+    
+    async def _collect_storage_state_async(self, pages: List[AsyncPage]) -> Dict[str, Any]:
+        """
+        并发获取各页面的Storage数据
+        
+        与同步版本规则一致：同一URL取最后一个有数据的页面，结果按页面首次出现的顺序排列
+        
+        Args:
+            pages: 页面列表
+            
+        Returns:
+            URL到Storage数据的映射
+        """
+        pages_by_url: Dict[str, List[AsyncPage]] = {}
+        for page in pages:
+            url = page.url
+            if url and url != 'about:blank':
+                pages_by_url.setdefault(url, []).append(page)
+        
+        async def collect(url: str, url_pages: List[AsyncPage]) -> Optional[Dict[str, Any]]:
+            for page in reversed(url_pages):
+                try:
+                    page_storage = await page.evaluate(_DUMP_STORAGE_SCRIPT)
+                except Exception as e:
+                    logger.warning(f"获取页面 {url} 的Storage失败: {e}")
+                    continue
+                
+                local_storage = page_storage.get('local', {})
+                session_storage = page_storage.get('session', {})
+                if local_storage or session_storage:
+                    return {
+                        'localStorage': local_storage,
+                        'sessionStorage': session_storage
+                    }
+            return None
+        
+        results = await asyncio.gather(*(collect(url, url_pages) for url, url_pages in pages_by_url.items()))
+        return {url: result for url, result in zip(pages_by_url, results) if result}
+    
+    async def _get_user_agent_async(self, context: AsyncBrowserContext, pages: List[AsyncPage]) -> Optional[str]:
+        """
+        获取上下文的User-Agent，与同步版本共用缓存
+        
+        Args:
+            context: 异步API的浏览器上下文
+            pages: 页面列表
+            
+        Returns:
+            User-Agent，没有页面或获取失败时返回None
+        """
+        user_agent = self._user_agent_cache.get(context)
+        if user_agent is None and pages:
+            try:
+                user_agent = await pages[0].evaluate('navigator.userAgent')
+                self._user_agent_cache[context] = user_agent
+            except Exception as e:
+                logger.warning(f"获取User-Agent失败: {e}")
+        return user_agent
+    
+    def _write_context_state(self, context_path: Path, cookies: List[Dict[str, Any]],
+                             storage_data: Dict[str, Any], metadata: Dict[str, Any]) -> None:
+        """
+        将上下文状态合并写入一个状态文件，并删除旧格式的分散文件
+        
+        安装了msgpack时以msgpack编码（Cookies按列保存），否则为JSON；
+        超过压缩阈值时整体gzip压缩
+        
+        Args:
+            context_path: 上下文存储路径
+            cookies: Cookie列表
+            storage_data: URL到Storage数据的映射
+            metadata: 元信息
+        """
+        context_path.mkdir(parents=True, exist_ok=True)
+        
+        state = {
+            'version': _STATE_FILE_VERSION,
+            'meta': metadata,
+            'cookies': cookies,
+            'storage': storage_data
+        }
+        if msgpack is not None:
+            state['cookies'] = self._cookies_to_columns(cookies)
+            payload = msgpack.packb(state, use_bin_type=True)
+        else:
+            payload = self._dumps(state)
+        
+        if len(payload) > _GZIP_THRESHOLD:
+            payload = gzip.compress(payload, compresslevel=1)
+        
+        self._write_file(context_path / _STATE_FILE_NAME, payload)
+        
+        for file_name in _LEGACY_STATE_FILES:
+            legacy_file = context_path / file_name
+            if legacy_file.exists():
+                legacy_file.unlink()
+    
+    def _decode_state(self, data: bytes) -> Dict[str, Any]:
+        """
+        解码合并状态文件
+        
+        Args:
+            data: 文件内容
+            
+        Returns:
+            状态字典
+        """
+        if data[:2] == b'\x1f\x8b':
+            data = gzip.decompress(data)
+        
+        if data.lstrip()[:1] == b'{':
+            return self._loads(data)
+        
+        if msgpack is None:
+            raise ValueError("状态文件为msgpack格式，但未安装msgpack")
+        return msgpack.unpackb(data, raw=False)
+    
+    def _read_state(self, context_path: Path) -> Optional[Dict[str, Any]]:
+        """
+        读取合并状态文件，文件不存在或无法解码时返回None（回退到旧格式的分散文件）
+        
+        Args:
+            context_path: 上下文存储路径
+            
+        Returns:
+            状态字典
+        """
+        state_file = context_path / _STATE_FILE_NAME
+        if not state_file.exists():
+            return None
+        
+        try:
+            return self._read_cached(state_file, self._decode_state)
+        except Exception as e:
+            logger.warning(f"读取状态文件失败: {state_file}: {e}")
+            return None
+    
     def load_context_state(self, context: BrowserContext, context_name: str = None) -> bool:
         """
         加载浏览器上下文状态
@@ -107,32 +546,58 @@ class ContextManager:
             logger.error(f"加载上下文状态失败: {e}")
             return False
     
-    def _save_cookies(self, context: BrowserContext, context_path: Path) -> None:
+    def get_storage_state(self, context_name: str = None) -> Optional[Dict[str, Any]]:
         """
-        保存Cookies
+        以Playwright storage_state格式导出保存的上下文状态
+        
+        创建新上下文时传入 browser.new_context(storage_state=...)，由Playwright
+        在上下文创建时一次性注入Cookies和LocalStorage，无需再逐个add_cookies或逐页恢复。
+        SessionStorage不在该格式范围内，仍需通过 restore_page_storage 恢复。
         
         Args:
-            context: 浏览器上下文
-            context_path: 上下文存储路径
+            context_name: 上下文名称，默认使用default
+            
+        Returns:
+            storage_state字典，上下文不存在时返回None
         """
+        context_name = context_name or self._default_context_name
+        context_path = self._context_dir / context_name
+        
+        if not context_path.exists():
+            logger.info(f"上下文状态不存在: {context_name}")
+            return None
+        
         try:
-            cookies = context.cookies()
-            cookies_file = context_path / 'cookies.json'
+            state = {'cookies': [], 'origins': []}
             
-            # 添加保存时间戳
-            cookies_data = {
-                'timestamp': int(time.time()),
-                'cookies': cookies
-            }
+            state['cookies'] = self._read_cookies(context_path, valid_only=True) or []
             
-            with open(cookies_file, 'w', encoding='utf-8') as f:
-                json.dump(cookies_data, f, indent=2, ensure_ascii=False)
+            storage_content = self._read_storage(context_path)
+            if storage_content is not None:
+                storage_data = storage_content.get('storage', {})
+                
+                # LocalStorage按源(origin)共享，同源的多个页面合并
+                origins: Dict[str, Dict[str, str]] = {}
+                for url, page_storage in storage_data.items():
+                    parsed = urlparse(url)
+                    if not parsed.scheme or not parsed.netloc:
+                        continue
+                    origin = f"{parsed.scheme}://{parsed.netloc}"
+                    origins.setdefault(origin, {}).update(page_storage.get('localStorage') or {})
+                
+                state['origins'] = [
+                    {
+                        'origin': origin,
+                        'localStorage': [{'name': k, 'value': v} for k, v in items.items()]
+                    }
+                    for origin, items in origins.items() if items
+                ]
             
-            logger.debug(f"Cookies保存成功，共 {len(cookies)} 个")
+            return state
             
         except Exception as e:
-            logger.error(f"保存Cookies失败: {e}")
-            raise
+            logger.error(f"导出上下文storage_state失败: {e}")
+            return None
     
     def _load_cookies(self, context: BrowserContext, context_path: Path) -> None:
         """
@@ -143,29 +608,13 @@ class ContextManager:
             context_path: 上下文存储路径
         """
         try:
-            cookies_file = context_path / 'cookies.json'
+            # 读取时过滤过期的cookies
+            valid_cookies = self._read_cookies(context_path, valid_only=True)
             
-            if not cookies_file.exists():
+            if valid_cookies is None:
                 logger.debug("Cookies文件不存在")
                 return
             
-            with open(cookies_file, 'r', encoding='utf-8') as f:
-                cookies_data = json.load(f)
-            
-            cookies = cookies_data.get('cookies', [])
-            
-            # 过滤过期的cookies
-            current_time = int(time.time())
-            valid_cookies = []
-            
-            for cookie in cookies:
-                # 检查是否有过期时间
-                if 'expires' in cookie and cookie['expires'] != -1:
-                    if cookie['expires'] < current_time:
-                        continue
-                
-                valid_cookies.append(cookie)
-            
             # 添加cookies到上下文
             if valid_cookies:
                 context.add_cookies(valid_cookies)
@@ -177,81 +626,93 @@ class ContextManager:
             logger.error(f"加载Cookies失败: {e}")
             raise
     
-    def _save_storage_state(self, context: BrowserContext, context_path: Path) -> None:
+    @staticmethod
+    def _filter_valid_cookies(cookies: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
-        保存Storage状态（LocalStorage和SessionStorage）
+        过滤掉已过期的Cookies
         
         Args:
-            context: 浏览器上下文
-            context_path: 上下文存储路径
+            cookies: Cookies列表
+            
+        Returns:
+            未过期的Cookies列表（会话Cookie始终保留）
         """
-        try:
-            # 获取所有页面
-            pages = context.pages
-            if not pages:
-                logger.debug("没有活动页面，跳过Storage保存")
-                return
+        current_time = int(time.time())
+        
+        # 没有过期时间或过期时间为-1的是会话Cookie；每个Cookie只查一次字典
+        return [
+            cookie for cookie in cookies
+            if (expires := cookie.get('expires', -1)) == -1 or expires >= current_time
+        ]
+    
+    def _collect_storage_state(self, pages: List[Page]) -> Dict[str, Any]:
+        """
+        获取各页面的Storage数据
+        
+        Args:
+            pages: 页面列表
             
-            storage_data = {}
+        Returns:
+            URL到Storage数据的映射，按页面首次出现的顺序排列
+        """
+        storage_data = {}
             
-            for i, page in enumerate(pages):
-                try:
-                    url = page.url
-                    if not url or url == 'about:blank':
-                        continue
-                    
-                    # 获取LocalStorage
-                    local_storage = page.evaluate("""
-                        () => {
-                            const storage = {};
-                            for (let i = 0; i < localStorage.length; i++) {
-                                const key = localStorage.key(i);
-                                storage[key] = localStorage.getItem(key);
-                            }
-                            return storage;
-                        }
-                    """)
-                    
-                    # 获取SessionStorage
-                    session_storage = page.evaluate("""
-                        () => {
-                            const storage = {};
-                            for (let i = 0; i < sessionStorage.length; i++) {
-                                const key = sessionStorage.key(i);
-                                storage[key] = sessionStorage.getItem(key);
-                            }
-                            return storage;
-                        }
-                    """)
-                    
-                    if local_storage or session_storage:
-                        storage_data[url] = {
-                            'localStorage': local_storage,
-                            'sessionStorage': session_storage
-                        }
-                
-                except Exception as e:
-                    logger.warning(f"获取页面 {i} 的Storage失败: {e}")
+        # 同一URL只保留最后一个有数据的页面，因此倒序遍历并跳过已采集的URL，
+        # 省去重复页面的evaluate往返（同步API不是线程安全的，无法并行采集）
+        for i in range(len(pages) - 1, -1, -1):
+            page = pages[i]
+            try:
+                url = page.url
+                if not url or url == 'about:blank' or url in storage_data:
                     continue
-            
-            # 保存Storage数据
-            if storage_data:
-                storage_file = context_path / 'storage.json'
-                storage_content = {
-                    'timestamp': int(time.time()),
-                    'storage': storage_data
-                }
                 
-                with open(storage_file, 'w', encoding='utf-8') as f:
-                    json.dump(storage_content, f, indent=2, ensure_ascii=False)
+                # 一次evaluate同时获取LocalStorage和SessionStorage
+                page_storage = page.evaluate(_DUMP_STORAGE_SCRIPT)
+                local_storage = page_storage.get('local', {})
+                session_storage = page_storage.get('session', {})
                 
-                logger.debug(f"Storage状态保存成功，共 {len(storage_data)} 个页面")
-            else:
-                logger.debug("没有Storage数据需要保存")
+                if local_storage or session_storage:
+                    storage_data[url] = {
+                        'localStorage': local_storage,
+                        'sessionStorage': session_storage
+                    }
             
-        except Exception as e:
-            logger.error(f"保存Storage状态失败: {e}")
-            raise
+            except Exception as e:
+                logger.warning(f"获取页面 {i} 的Storage失败: {e}")
+                continue
+        
+        # 按页面首次出现的顺序排列
+        first_seen = {}
+        for i, page in enumerate(pages):
+            first_seen.setdefault(page.url, i)
+        return dict(sorted(storage_data.items(), key=lambda item: first_seen[item[0]]))
+    
+    def _read_storage(self, context_path: Path) -> Optional[Dict[str, Any]]:
+        """
+        读取保存的Storage状态，优先读取合并状态文件，其次为压缩文件
+        
+        Args:
+            context_path: 上下文存储路径
+            
+        Returns:
+            Storage文件内容，没有保存Storage时返回None
+        """
+        state = self._read_state(context_path)
+        if state is not None:
+            return {
+                'timestamp': state.get('meta', {}).get('timestamp'),
+                'storage': state.get('storage') or {}
+            }
+        
+        compressed_file = context_path / 'storage.json.gz'
+        if compressed_file.exists():
+            return self._read_cached(compressed_file, lambda data: self._loads(gzip.decompress(data)))
+        
+        storage_file = context_path / 'storage.json'
+        if storage_file.exists():
+            return self._read_json(storage_file)
+        
+        return None
     
     def _load_storage_state(self, context: BrowserContext, context_path: Path) -> None:
         """
@@ -262,30 +723,104 @@ class ContextManager:
             context_path: 上下文存储路径
         """
         try:
-            storage_file = context_path / 'storage.json'
+            storage_content = self._read_storage(context_path)
             
-            if not storage_file.exists():
+            if storage_content is None:
                 logger.debug("Storage文件不存在")
                 return
             
-            with open(storage_file, 'r', encoding='utf-8') as f:
-                storage_content = json.load(f)
-            
             storage_data = storage_content.get('storage', {})
             
-            # Storage数据将在访问对应URL时恢复
-            # 这里只是保存引用，实际恢复需要在页面加载时进行
+            # 保存引用，供已打开的页面通过 restore_page_storage 恢复
             context._stored_storage = storage_data
+            context._stored_storage_index = self._build_storage_index(storage_data)
+            
+            # 注册初始化脚本：之后每次导航在文档开始时即恢复Storage，无需额外往返
+            if storage_data:
+                context.add_init_script(script=self._build_restore_script(storage_data))
+            
             logger.debug(f"Storage状态加载成功，共 {len(storage_data)} 个页面")
             
         except Exception as e:
             logger.error(f"加载Storage状态失败: {e}")
             raise
     
+    @staticmethod
+    def _build_restore_script(storage_data: Dict[str, Any]) -> str:
+        """
+        生成在文档开始时恢复Storage的初始化脚本
+        
+        与 _url_matches 一致按域名+路径匹配，按 _FILL_STORAGE_FUNCTION 的规则只补齐缺失的键；
+        同时将恢复函数注册为 window.__restoreStorage，供 restore_page_storage 按名称调用
+        
+        Args:
+            storage_data: URL到Storage数据的映射
+            
+        Returns:
+            初始化脚本源码
+        """
+        by_location = {}
+        for url, page_storage in storage_data.items():
+            parsed = urlparse(url)
+            by_location[parsed.netloc + parsed.path] = {
+                'localStorage': page_storage.get('localStorage') or {},
+                'sessionStorage': page_storage.get('sessionStorage') or {}
+            }
+        
+        return (
+            "(() => {"
+            f"const restore = window.__restoreStorage = window.__restoreStorage || ({_FILL_STORAGE_FUNCTION});"
+            f"const stored = {json.dumps(by_location)};"
+            "const entry = stored[location.host + location.pathname];"
+            "if (entry) restore(entry);"
+            "})();"
+        )
+    
+    @staticmethod
+    def _build_storage_index(storage_data: Dict[str, Any]) -> Dict[tuple, Any]:
+        """
+        构建 (域名, 路径) 到Storage数据的索引，匹配规则与 _url_matches 一致
+        
+        Args:
+            storage_data: URL到Storage数据的映射
+            
+        Returns:
+            索引字典，同一位置有多个URL时保留最先出现的
+        """
+        index = {}
+        for stored_url, page_storage in storage_data.items():
+            parsed = urlparse(stored_url)
+            index.setdefault((parsed.netloc, parsed.path), page_storage)
+        return index
+    
+    def _get_storage_index(self, context: BrowserContext) -> Dict[tuple, Any]:
+        """
+        获取上下文的Storage索引，未通过加载流程设置时按 _stored_storage 构建并缓存
+        
+        Args:
+            context: 浏览器上下文
+            
+        Returns:
+            (域名, 路径) 到Storage数据的索引
+        """
+        index = getattr(context, '_stored_storage_index', None)
+        if isinstance(index, dict):
+            return index
+        
+        stored_storage = getattr(context, '_stored_storage', None)
+        if not isinstance(stored_storage, dict):
+            return {}
+        
+        index = self._build_storage_index(stored_storage)
+        context._stored_storage_index = index
+        return index
+    
     def restore_page_storage(self, page: Page, url: str = None) -> None:
         """
         恢复页面的Storage状态
         
+        加载状态后新导航的页面会由初始化脚本自动恢复，此方法用于加载前已打开的页面
+        
         Args:
             page: 页面对象
             url: 页面URL，默认使用当前页面URL
@@ -295,42 +830,22 @@ class ContextManager:
             if not url or url == 'about:blank':
                 return
             
-            # 获取保存的Storage数据
+            # 按域名+路径在索引中查找保存的Storage数据
             context = page.context
-            stored_storage = getattr(context, '_stored_storage', {})
-            
-            # 查找匹配的Storage数据
-            page_storage = None
-            for stored_url, storage_data in stored_storage.items():
-                if self._url_matches(url, stored_url):
-                    page_storage = storage_data
-                    break
+            parsed = urlparse(url)
+            page_storage = self._get_storage_index(context).get((parsed.netloc, parsed.path))
             
             if not page_storage:
                 logger.debug(f"没有找到URL {url} 的Storage数据")
                 return
             
-            # 恢复LocalStorage
-            local_storage = page_storage.get('localStorage', {})
-            if local_storage:
-                page.evaluate("""
-                    (storage) => {
-                        for (const [key, value] of Object.entries(storage)) {
-                            localStorage.setItem(key, value);
-                        }
-                    }
-                """, local_storage)
-            
-            # 恢复SessionStorage
-            session_storage = page_storage.get('sessionStorage', {})
-            if session_storage:
-                page.evaluate("""
-                    (storage) => {
-                        for (const [key, value] of Object.entries(storage)) {
-                            sessionStorage.setItem(key, value);
-                        }
-                    }
-                """, session_storage)
+            if not page_storage.get('localStorage') and not page_storage.get('sessionStorage'):
+                return
+            
+            # 一次调用同时恢复LocalStorage和SessionStorage，规则与初始化脚本相同（只补齐缺失的键）；
+            # 加载状态后导航的文档中已有初始化脚本注册的函数，否则直接传入函数源码执行
+            if not page.evaluate(_CALL_RESTORE_STORAGE, page_storage):
+                page.evaluate(_FILL_STORAGE_FUNCTION, page_storage)
             
             logger.debug(f"页面Storage恢复成功: {url}")
             
@@ -361,30 +876,50 @@ class ContextManager:
             # 简单字符串比较
             return current_url == stored_url
     
-    def _save_context_metadata(self, context: BrowserContext, context_path: Path) -> None:
+    def _get_user_agent(self, context: BrowserContext, pages: List[Page]) -> Optional[str]:
         """
-        保存上下文元信息
+        获取上下文的User-Agent，首次读取后缓存
         
         Args:
             context: 浏览器上下文
-            context_path: 上下文存储路径
-        """
-        try:
-            metadata = {
-                'timestamp': int(time.time()),
-                'pages_count': len(context.pages),
-                'user_agent': context.pages[0].evaluate('navigator.userAgent') if context.pages else None,
-                'viewport': context.pages[0].viewport_size if context.pages else None
-            }
-            
-            metadata_file = context_path / 'metadata.json'
-            with open(metadata_file, 'w', encoding='utf-8') as f:
-                json.dump(metadata, f, indent=2, ensure_ascii=False)
+            pages: 页面列表
             
-            logger.debug("上下文元信息保存成功")
+        Returns:
+            User-Agent，没有页面或获取失败时返回None
+        """
+        user_agent = self._user_agent_cache.get(context)
+        if user_agent is None and pages:
+            try:
+                user_agent = pages[0].evaluate('navigator.userAgent')
+                self._user_agent_cache[context] = user_agent
+            except Exception as e:
+                logger.warning(f"获取User-Agent失败: {e}")
+        return user_agent
+    
+    @staticmethod
+    def _build_metadata(pages: List[Any], user_agent: Optional[str],
+                        counts: Optional[Dict[str, int]] = None) -> Dict[str, Any]:
+        """
+        构建上下文元信息
+        
+        Args:
+            pages: 上下文中的页面列表
+            user_agent: 浏览器User-Agent
+            counts: 本次保存的Cookies、Storage数量
             
-        except Exception as e:
-            logger.error(f"保存上下文元信息失败: {e}")
+        Returns:
+            元信息字典
+        """
+        metadata = {
+            'timestamp': int(time.time()),
+            'pages_count': len(pages),
+            'user_agent': user_agent,
+            # viewport_size是页面对象的本地属性，读取不产生往返，且可能被修改，不做缓存
+            'viewport': pages[0].viewport_size if pages else None
+        }
+        if counts:
+            metadata.update(counts)
+        return metadata
     
     def list_saved_contexts(self) -> List[str]:
         """
@@ -394,12 +929,9 @@ class ContextManager:
             上下文名称列表
         """
         try:
-            contexts = []
-            for context_dir in self._context_dir.iterdir():
-                if context_dir.is_dir():
-                    contexts.append(context_dir.name)
-            
-            return sorted(contexts)
+            # scandir的目录项自带类型信息，无需逐个stat
+            with os.scandir(self._context_dir) as entries:
+                return sorted(entry.name for entry in entries if entry.is_dir())
             
         except Exception as e:
             logger.error(f"列出保存的上下文失败: {e}")
@@ -423,8 +955,7 @@ class ContextManager:
                 return False
             
             # 删除目录及所有文件
-            import shutil
-            shutil.rmtree(context_path)
+            self._remove_context_dir(context_path)
             
             logger.info(f"上下文状态删除成功: {context_name}")
             return True
@@ -433,6 +964,32 @@ class ContextManager:
             logger.error(f"删除上下文状态失败: {e}")
             return False
     
+    @staticmethod
+    def _remove_context_dir(path: Union[str, Path]) -> None:
+        """
+        删除上下文目录
+        
+        上下文目录通常只包含几个状态文件，直接逐个删除后移除目录；
+        包含子目录或删除过程中出错时回退到 shutil.rmtree
+        
+        Args:
+            path: 上下文目录路径
+        """
+        try:
+            with os.scandir(path) as entries:
+                files = []
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        raise IsADirectoryError(entry.path)
+                    files.append(entry.path)
+            
+            for file_path in files:
+                os.unlink(file_path)
+            os.rmdir(path)
+        
+        except OSError:
+            shutil.rmtree(path)
+    
     def get_context_info(self, context_name: str) -> Optional[Dict[str, Any]]:
         """
         获取上下文信息
@@ -455,30 +1012,31 @@ class ContextManager:
             }
             
             # 读取元信息
-            metadata_file = context_path / 'metadata.json'
-            if metadata_file.exists():
-                with open(metadata_file, 'r', encoding='utf-8') as f:
-                    metadata = json.load(f)
-                info.update(metadata)
+            state = self._read_state(context_path)
+            if state is not None:
+                info.update(state.get('meta', {}))
+            else:
+                metadata_file = context_path / 'metadata.json'
+                if metadata_file.exists():
+                    metadata = self._read_json(metadata_file)
+                    info.update(metadata)
             
             # 统计文件信息
             files = list(context_path.glob('*'))
             info['files'] = [f.name for f in files]
             info['files_count'] = len(files)
             
-            # 统计Cookies数量
-            cookies_file = context_path / 'cookies.json'
-            if cookies_file.exists():
-                with open(cookies_file, 'r', encoding='utf-8') as f:
-                    cookies_data = json.load(f)
-                info['cookies_count'] = len(cookies_data.get('cookies', []))
+            # 统计Cookies数量（元信息中已记录时无需解析Cookies文件）
+            if 'cookies_count' not in info:
+                cookies = self._read_cookies(context_path)
+                if cookies is not None:
+                    info['cookies_count'] = len(cookies)
             
             # 统计Storage数量
-            storage_file = context_path / 'storage.json'
-            if storage_file.exists():
-                with open(storage_file, 'r', encoding='utf-8') as f:
-                    storage_data = json.load(f)
-                info['storage_pages_count'] = len(storage_data.get('storage', {}))
+            if 'storage_pages_count' not in info:
+                storage_content = self._read_storage(context_path)
+                if storage_content is not None:
+                    info['storage_pages_count'] = len(storage_content.get('storage', {}))
             
             return info
             
@@ -497,30 +1055,34 @@ class ContextManager:
             清理的上下文数量
         """
         try:
-            current_time = int(time.time())
+            current_time = time.time()
             max_age_seconds = max_age_days * 24 * 60 * 60
             cleaned_count = 0
             
-            for context_dir in self._context_dir.iterdir():
-                if not context_dir.is_dir():
-                    continue
-                
-                # 检查元信息文件的时间戳
-                metadata_file = context_dir / 'metadata.json'
-                if metadata_file.exists():
-                    try:
-                        with open(metadata_file, 'r', encoding='utf-8') as f:
-                            metadata = json.load(f)
-                        
-                        timestamp = metadata.get('timestamp', 0)
-                        if current_time - timestamp > max_age_seconds:
-                            import shutil
-                            shutil.rmtree(context_dir)
-                            cleaned_count += 1
-                            logger.info(f"清理过期上下文: {context_dir.name}")
+            with os.scandir(self._context_dir) as entries:
+                context_dirs = [entry for entry in entries if entry.is_dir()]
+            
+            for entry in context_dirs:
+                # 以状态文件（旧格式为元信息文件）的修改时间作为保存时间，无需解析；
+                # 都不存在时回退到目录的修改时间
+                try:
+                    mtime = None
+                    for file_name in (_STATE_FILE_NAME, 'metadata.json'):
+                        try:
+                            mtime = os.stat(os.path.join(entry.path, file_name)).st_mtime
+                            break
+                        except FileNotFoundError:
+                            continue
+                    if mtime is None:
+                        mtime = entry.stat().st_mtime
                     
-                    except Exception as e:
-                        logger.warning(f"检查上下文 {context_dir.name} 时间戳失败: {e}")
+                    if current_time - mtime > max_age_seconds:
+                        self._remove_context_dir(entry.path)
+                        cleaned_count += 1
+                        logger.info(f"清理过期上下文: {entry.name}")
+                
+                except Exception as e:
+                    logger.warning(f"检查上下文 {entry.name} 时间戳失败: {e}")
             
             logger.info(f"上下文清理完成，共清理 {cleaned_count} 个")
             return cleaned_count
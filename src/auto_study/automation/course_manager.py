@@ -4,14 +4,35 @@
 负责课程数据的获取、解析、存储和管理，为自动化学习提供课程信息服务
 """
 
+import asyncio
+import atexit
+import bisect
+import copy
+import hashlib
+import heapq
 import json
-import time
+import re
+import sys
+import weakref
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional, Union, Callable, Any, Tuple
-from dataclasses import dataclass, asdict, field
+from typing import Dict, List, NamedTuple, Optional, Union, Callable, Any, Tuple
+from dataclasses import dataclass, field, fields
 from enum import Enum
 from playwright.sync_api import Page, BrowserContext
+from playwright.async_api import Page as AsyncPage
+
+# 优先使用ciso8601解析ISO 8601时间（C实现），未安装时回退到标准库
+try:
+    from ciso8601 import parse_datetime as _parse_datetime
+except ImportError:
+    _parse_datetime = datetime.fromisoformat
+
+# 优先使用orjson读写课程缓存，可直接序列化dataclass、枚举和日期时间
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 from .browser_manager import BrowserManager
 from .login_manager import LoginManager
@@ -29,6 +50,99 @@ class CourseStatus(Enum):
     EXPIRED = "expired"
 
 
+# 序列化时需要转换为ISO 8601字符串的日期时间字段
+_DATETIME_FIELDS = ('deadline', 'created_time', 'updated_time', 'last_accessed')
+
+# 复制章节数据时可直接共享的不可变类型
+_IMMUTABLE_TYPES = frozenset((str, int, float, bool, type(None)))
+
+# 默认的优先级评分权重
+_DEFAULT_PRIORITY_WEIGHTS = {
+    'urgency': 0.4,      # 紧急度权重
+    'priority': 0.3,     # 设定优先级权重
+    'progress': 0.2,     # 完成度权重
+    'access': 0.1        # 最近访问权重
+}
+
+
+# 状态关键词，按匹配优先级排列
+_STATUS_KEYWORDS = (
+    (CourseStatus.COMPLETED, ('completed', '已完成', '完成', '100%', 'finished')),
+    (CourseStatus.IN_PROGRESS, ('in progress', '进行中', '学习中', 'ongoing', 'started')),
+    (CourseStatus.NOT_STARTED, ('not started', '未开始', '未学习', 'new')),
+    (CourseStatus.LOCKED, ('locked', '锁定', '未解锁', 'unavailable')),
+    (CourseStatus.EXPIRED, ('expired', '过期', '已过期', 'overdue'))
+)
+
+# 进度解析用的正则：样式宽度、百分比、分数形式（如 3/10）
+_WIDTH_RE = re.compile(r'width:\s*(\d+(?:\.\d+)?)%')
+_PERCENT_RE = re.compile(r'(\d+(?:\.\d+)?)%')
+_FRACTION_RE = re.compile(r'(\d+)/(\d+)')
+
+# 在浏览器内一次性提取所有课程元素信息的脚本，按选择器组顺序查找子元素，
+# 与 find_element_by_selectors 的规则一致
+_EXTRACT_COURSES_SCRIPT = """
+    (elements, selectors) => {
+        const first = (root, group) => {
+            for (const selector of selectors[group] || []) {
+                try {
+                    const element = root.querySelector(selector);
+                    if (element) return element;
+                } catch (e) {}
+            }
+            return null;
+        };
+        const text = (element) => element ? element.textContent : null;
+        return elements.map((root) => {
+            const link = first(root, 'course_link');
+            const progress = first(root, 'course_progress');
+            return {
+                title: text(first(root, 'course_title')),
+                href: link ? link.getAttribute('href') : null,
+                progress: progress ? {
+                    data: progress.getAttribute('data-progress'),
+                    style: progress.getAttribute('style'),
+                    text: progress.textContent
+                } : null,
+                status: text(first(root, 'course_status')),
+                description: text(first(root, 'course_description'))
+            };
+        });
+    }
+"""
+
+# 在查找范围内按顺序返回第一个有匹配元素的选择器下标，没有匹配时返回-1；
+# 作用于页面时查找整个文档，作用于元素定位器时只查找该元素内部
+_FIRST_MATCH_SCRIPT = """
+    (root, selectors) => {
+        if (!selectors) {
+            selectors = root;
+            root = document;
+        }
+        for (let i = 0; i < selectors.length; i++) {
+            try {
+                if (root.querySelector(selectors[i])) return i;
+            } catch (e) {}
+        }
+        return -1;
+    }
+"""
+
+# 点击"加载更多"后等待课程数量增加的条件
+_MORE_COURSES_LOADED_SCRIPT = """
+    ([selector, previousCount]) => document.querySelectorAll(selector).length > previousCount
+"""
+
+# 等待课程列表/新内容出现的超时时间（毫秒），超时后按现有页面内容继续
+_CONTENT_WAIT_TIMEOUT = 5000
+
+# 每个状态的关键词预编译为一个正则，按优先级依次匹配
+_STATUS_PATTERNS = tuple(
+    (status, re.compile('|'.join(re.escape(keyword) for keyword in keywords)))
+    for status, keywords in _STATUS_KEYWORDS
+)
+
+
 class CoursePriority(Enum):
     """课程优先级"""
     CRITICAL = 5    # 紧急且重要
@@ -38,7 +152,56 @@ class CoursePriority(Enum):
     MINIMAL = 1     # 最低优先级
 
 
-@dataclass
+# 枚举值/名称到枚举成员的映射，创建和加载课程时直接查表，代替枚举构造函数
+_STATUS_BY_VALUE = {status.value: status for status in CourseStatus}
+_PRIORITY_BY_VALUE = {priority.value: priority for priority in CoursePriority}
+_PRIORITY_BY_NAME = {priority.name: priority for priority in CoursePriority}
+
+
+def _copy_json_like(value: Any) -> Any:
+    """
+    复制由字典、列表和标量组成的数据（如课程章节）
+
+    只递归处理dict和list，比copy.deepcopy的通用备忘录机制快得多；
+    其他可变对象仍交给copy.deepcopy
+    """
+    value_type = type(value)
+    if value_type is dict:
+        return {key: _copy_json_like(item) for key, item in value.items()}
+    if value_type is list:
+        return [_copy_json_like(item) for item in value]
+    if value_type in _IMMUTABLE_TYPES:
+        return value
+    return copy.deepcopy(value)
+
+
+class _PriorityWeights(NamedTuple):
+    """优先级评分权重，批量评分前由权重字典转换一次，评分时按属性读取"""
+    urgency: float
+    priority: float
+    progress: float
+    access: float
+
+    @classmethod
+    def from_mapping(cls, weights: Dict[str, float]) -> '_PriorityWeights':
+        """从权重配置字典创建"""
+        return cls(weights['urgency'], weights['priority'], weights['progress'], weights['access'])
+
+
+_DEFAULT_WEIGHTS_TUPLE = _PriorityWeights.from_mapping(_DEFAULT_PRIORITY_WEIGHTS)
+
+
+# 参与课程管理器二级索引的字段；任意课程修改这些字段时递增 _indexed_fields_version，
+# 使直接修改缓存中课程对象（如 get_course_by_id(...).status = ...）后索引也能失效
+_INDEXED_FIELDS = frozenset(('status', 'deadline'))
+_indexed_fields_version = 0
+
+
+# Python 3.10+ 使用 __slots__ 去掉每个实例的 __dict__，降低大量课程缓存时的内存占用
+_DATACLASS_SLOTS = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_DATACLASS_SLOTS)
 class Course:
     """课程数据模型"""
     id: str
@@ -61,17 +224,35 @@ class Course:
     
     def __post_init__(self):
         """初始化后处理"""
-        if isinstance(self.status, str):
-            self.status = CourseStatus(self.status)
-        if isinstance(self.priority, (int, str)):
-            if isinstance(self.priority, str):
-                self.priority = CoursePriority[self.priority.upper()]
-            else:
-                self.priority = CoursePriority(self.priority)
+        # 常见的str/int直接查表，查不到或是子类时交给枚举自身处理（保持原有的异常类型）
+        status = self.status
+        if type(status) is str:
+            self.status = _STATUS_BY_VALUE.get(status) or CourseStatus(status)
+        elif isinstance(status, str):
+            self.status = CourseStatus(status)
+        
+        priority = self.priority
+        priority_type = type(priority)
+        if priority_type is int:
+            self.priority = _PRIORITY_BY_VALUE.get(priority) or CoursePriority(priority)
+        elif priority_type is str:
+            name = priority.upper()
+            self.priority = _PRIORITY_BY_NAME.get(name) or CoursePriority[name]
+        elif isinstance(priority, str):
+            self.priority = CoursePriority[priority.upper()]
+        elif isinstance(priority, int):
+            self.priority = CoursePriority(priority)
         
         # 确保进度在有效范围内
         self.progress = max(0.0, min(1.0, self.progress))
     
+    def __setattr__(self, name: str, value: Any) -> None:
+        """设置属性，修改索引字段时通知课程管理器重建索引"""
+        if name in _INDEXED_FIELDS:
+            global _indexed_fields_version
+            _indexed_fields_version += 1
+        object.__setattr__(self, name, value)
+    
     def is_completed(self) -> bool:
         """判断课程是否完成"""
         return self.status == CourseStatus.COMPLETED or self.progress >= 0.95
@@ -80,25 +261,25 @@ class Course:
         """判断课程是否进行中"""
         return self.status == CourseStatus.IN_PROGRESS or (0 < self.progress < 0.95)
     
-    def days_until_deadline(self) -> Optional[int]:
-        """距离截止时间的天数"""
+    def days_until_deadline(self, now: Optional[datetime] = None) -> Optional[int]:
+        """距离截止时间的天数，批量计算时可传入同一个当前时间"""
         if not self.deadline:
             return None
-        delta = self.deadline - datetime.now()
+        delta = self.deadline - (now or datetime.now())
         return delta.days
     
-    def is_overdue(self) -> bool:
+    def is_overdue(self, now: Optional[datetime] = None) -> bool:
         """判断是否已过期"""
         if not self.deadline:
             return False
-        return datetime.now() > self.deadline
+        return (now or datetime.now()) > self.deadline
     
-    def get_urgency_score(self) -> float:
+    def get_urgency_score(self, now: Optional[datetime] = None) -> float:
         """获取紧急度评分 (0.0-1.0)"""
         if not self.deadline:
             return 0.3  # 无截止时间的默认紧急度
         
-        days_left = self.days_until_deadline()
+        days_left = self.days_until_deadline(now)
         if days_left is None:
             return 0.3
         
@@ -115,26 +296,27 @@ class Course:
         else:
             return 0.1
     
-    def calculate_priority_score(self, weights: Optional[Dict[str, float]] = None) -> float:
+    def calculate_priority_score(self, weights: Union[Dict[str, float], '_PriorityWeights', None] = None,
+                                 now: Optional[datetime] = None) -> float:
         """
         计算综合优先级评分
         
         Args:
-            weights: 各项权重配置
+            weights: 各项权重配置，批量评分时可传入预先转换好的 _PriorityWeights
+            now: 当前时间，批量评分时传入以避免每个课程重复获取
             
         Returns:
             优先级评分 (0.0-1.0)
         """
         if weights is None:
-            weights = {
-                'urgency': 0.4,      # 紧急度权重
-                'priority': 0.3,     # 设定优先级权重  
-                'progress': 0.2,     # 完成度权重
-                'access': 0.1        # 最近访问权重
-            }
+            weights = _DEFAULT_WEIGHTS_TUPLE
+        elif type(weights) is not _PriorityWeights:
+            weights = _PriorityWeights.from_mapping(weights)
+        if now is None:
+            now = datetime.now()
         
         # 紧急度分数
-        urgency_score = self.get_urgency_score()
+        urgency_score = self.get_urgency_score(now)
         
         # 设定优先级分数
         priority_score = self.priority.value / 5.0
@@ -149,7 +331,7 @@ class Course:
         
         # 最近访问分数
         if self.last_accessed:
-            days_since_access = (datetime.now() - self.last_accessed).days
+            days_since_access = (now - self.last_accessed).days
             if days_since_access == 0:
                 access_score = 1.0
             elif days_since_access <= 3:
@@ -163,36 +345,158 @@ class Course:
         
         # 计算加权总分
         total_score = (
-            urgency_score * weights['urgency'] +
-            priority_score * weights['priority'] +
-            progress_score * weights['progress'] +
-            access_score * weights['access']
+            urgency_score * weights.urgency +
+            priority_score * weights.priority +
+            progress_score * weights.progress +
+            access_score * weights.access
         )
         
         return min(1.0, max(0.0, total_score))
     
     def to_dict(self) -> Dict[str, Any]:
         """转换为字典"""
-        data = asdict(self)
-        # 处理枚举类型
-        data['status'] = self.status.value
-        data['priority'] = self.priority.value
-        # 处理日期时间
-        for field_name in ['deadline', 'created_time', 'updated_time', 'last_accessed']:
-            if data[field_name]:
-                data[field_name] = data[field_name].isoformat()
-        return data
+        # 直接按字段构建，只复制可变容器，避免asdict对每个字段的递归处理
+        deadline = self.deadline
+        created_time = self.created_time
+        updated_time = self.updated_time
+        last_accessed = self.last_accessed
+        return {
+            'id': self.id,
+            'title': self.title,
+            'url': self.url,
+            'status': self.status.value,
+            'progress': self.progress,
+            'deadline': deadline.isoformat() if deadline else deadline,
+            'priority': self.priority.value,
+            'description': self.description,
+            'duration': self.duration,
+            'completed_duration': self.completed_duration,
+            'chapters': _copy_json_like(self.chapters),
+            'created_time': created_time.isoformat() if created_time else created_time,
+            'updated_time': updated_time.isoformat() if updated_time else updated_time,
+            'last_accessed': last_accessed.isoformat() if last_accessed else last_accessed,
+            'tags': list(self.tags),
+            'instructor': self.instructor,
+            'category': self.category,
+        }
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'Course':
         """从字典创建课程对象"""
         # 处理日期时间字段
-        for field_name in ['deadline', 'created_time', 'updated_time', 'last_accessed']:
+        for field_name in _DATETIME_FIELDS:
             if data.get(field_name):
                 if isinstance(data[field_name], str):
-                    data[field_name] = datetime.fromisoformat(data[field_name])
+                    data[field_name] = _parse_datetime(data[field_name])
         
         return cls(**data)
+    
+    @classmethod
+    def _from_trusted_dict(cls, data: Dict[str, Any]) -> 'Course':
+        """
+        从本地缓存文件的数据快速创建课程对象
+        
+        缓存由 save_courses_cache 写出，字段齐全且状态/优先级均为枚举值，
+        因此直接按字段赋值并查表转换枚举，跳过 __init__ 和 __post_init__ 的类型判断；
+        字段不完整或枚举值不在表中时回退到 from_dict
+        """
+        if len(data) != len(_COURSE_FIELD_NAMES):
+            return cls.from_dict(data)
+        
+        # 新建的课程尚未进入任何缓存，直接写槽位，不经过 __setattr__ 的索引失效通知
+        course = object.__new__(cls)
+        set_field = object.__setattr__
+        try:
+            status = _STATUS_BY_VALUE[data['status']]
+            priority = _PRIORITY_BY_VALUE[data['priority']]
+            progress = data['progress']
+            for name in _COURSE_FIELD_NAMES:
+                set_field(course, name, data[name])
+        except (KeyError, TypeError):
+            return cls.from_dict(data)
+        
+        set_field(course, 'status', status)
+        set_field(course, 'priority', priority)
+        set_field(course, 'progress', max(0.0, min(1.0, progress)))
+        for name in _DATETIME_FIELDS:
+            value = data[name]
+            if value and isinstance(value, str):
+                set_field(course, name, _parse_datetime(value))
+        
+        return course
+
+
+_COURSE_FIELD_NAMES = tuple(f.name for f in fields(Course))
+
+
+def _join_visible_selectors(selectors: List[str]) -> str:
+    """
+    将多个选择器合并为只匹配可见元素的单个选择器
+
+    Args:
+        selectors: 选择器列表
+
+    Returns:
+        逗号分隔的Playwright选择器
+    """
+    return ', '.join(f'{selector}:visible' for selector in selectors)
+
+
+def _make_course_id(key: str) -> str:
+    """
+    由课程URL或标题生成课程ID
+
+    缓存以课程ID为键保存优先级、访问时间等信息，ID算法必须保持稳定，
+    因此沿用md5截断结果，只是不再在每次调用时导入hashlib
+
+    Args:
+        key: 课程URL或标题
+
+    Returns:
+        12位十六进制课程ID
+    """
+    return hashlib.md5(key.encode()).hexdigest()[:12]
+
+
+class _CourseCache(dict):
+    """
+    课程缓存字典
+
+    每次增删课程时递增version，课程管理器据此判断状态/截止时间索引是否需要重建，
+    外部直接写入缓存（如主程序合并课程）时索引也能自动失效
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.version = 0
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self.version += 1
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self.version += 1
+
+    def pop(self, *args):
+        self.version += 1
+        return super().pop(*args)
+
+    def popitem(self):
+        self.version += 1
+        return super().popitem()
+
+    def setdefault(self, key, default=None):
+        self.version += 1
+        return super().setdefault(key, default)
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self.version += 1
+
+    def clear(self):
+        super().clear()
+        self.version += 1
 
 
 class CourseManager:
@@ -219,9 +523,23 @@ class CourseManager:
         self.course_config = self.config.get('course_management', {})
         
         # 课程数据缓存
-        self._courses_cache: Dict[str, Course] = {}
+        self._courses_cache: Dict[str, Course] = _CourseCache()
         self._cache_loaded = False
         
+        # 课程二级索引：按状态分组的课程ID，以及按截止时间排序的截止时间/课程ID
+        # 索引在缓存或课程索引字段变化后的首次查询时重建，_index_version 记录构建时的版本
+        self._by_status: Dict[CourseStatus, Dict[str, None]] = {}
+        self._deadline_keys: List[datetime] = []
+        self._deadline_ids: List[str] = []
+        self._index_version: Optional[tuple] = None
+        
+        # 已修改但尚未写入文件的课程ID
+        self._dirty_ids: set = set()
+        atexit.register(_flush_on_exit, weakref.ref(self))
+        
+        # 每个选择器组上次命中的选择器，下次优先尝试
+        self._winning_selector: Dict[str, str] = {}
+        
         # 课程解析器配置
         self._course_selectors = {
             'course_list': [
@@ -273,6 +591,13 @@ class CourseManager:
         
         logger.info("课程管理器初始化完成")
     
+    @property
+    def courses_cache(self) -> Dict[str, Course]:
+        """课程缓存字典，首次访问时从文件加载"""
+        if not self._cache_loaded:
+            self._load_courses_cache()
+        return self._courses_cache
+    
     def _load_courses_cache(self) -> None:
         """加载课程缓存"""
         if self._cache_loaded:
@@ -280,11 +605,15 @@ class CourseManager:
         
         try:
             if self.courses_file.exists():
-                with open(self.courses_file, 'r', encoding='utf-8') as f:
-                    courses_data = json.load(f)
+                if orjson is not None:
+                    courses_data = orjson.loads(self.courses_file.read_bytes())
+                else:
+                    with open(self.courses_file, 'r', encoding='utf-8') as f:
+                        courses_data = json.load(f)
                 
+                from_trusted_dict = Course._from_trusted_dict
                 for course_data in courses_data:
-                    course = Course.from_dict(course_data)
+                    course = from_trusted_dict(course_data)
                     self._courses_cache[course.id] = course
                 
                 logger.info(f"加载了 {len(self._courses_cache)} 个课程记录")
@@ -293,28 +622,95 @@ class CourseManager:
             
         except Exception as e:
             logger.error(f"加载课程缓存失败: {e}")
-            self._courses_cache = {}
+            self._courses_cache = _CourseCache()
             self._cache_loaded = True
     
     @safe_operation(default_value=False)
     def save_courses_cache(self) -> bool:
         """保存课程缓存"""
         try:
-            courses_data = [course.to_dict() for course in self._courses_cache.values()]
+            courses = list(self._courses_cache.values())
             
             # 写入临时文件，然后原子性替换
             temp_file = self.courses_file.with_suffix('.tmp')
-            with open(temp_file, 'w', encoding='utf-8') as f:
-                json.dump(courses_data, f, indent=2, ensure_ascii=False)
+            if orjson is not None:
+                # orjson直接序列化Course，输出与to_dict一致
+                temp_file.write_bytes(orjson.dumps(
+                    courses, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+                ))
+            else:
+                courses_data = [course.to_dict() for course in courses]
+                with open(temp_file, 'w', encoding='utf-8') as f:
+                    json.dump(courses_data, f, indent=2, ensure_ascii=False)
             
             temp_file.replace(self.courses_file)
-            logger.info(f"保存了 {len(courses_data)} 个课程记录")
+            self._dirty_ids.clear()
+            logger.info(f"保存了 {len(courses)} 个课程记录")
             return True
             
         except Exception as e:
             logger.error(f"保存课程缓存失败: {e}")
             return False
     
+    def flush(self) -> bool:
+        """
+        写入尚未保存的课程修改
+        
+        Returns:
+            没有待保存的修改或保存成功时返回True
+        """
+        if not self._dirty_ids:
+            return True
+        return self.save_courses_cache()
+    
+    def _current_index_version(self) -> Optional[tuple]:
+        """
+        获取当前缓存内容对应的索引版本
+        
+        Returns:
+            (缓存版本, 课程索引字段版本)，缓存不支持版本号时返回None
+        """
+        version = getattr(self._courses_cache, 'version', None)
+        if version is None:
+            return None
+        return version, _indexed_fields_version
+    
+    def _ensure_indexes(self) -> None:
+        """缓存内容或课程的状态/截止时间变化后重建状态索引和截止时间索引"""
+        cache = self.courses_cache
+        version = self._current_index_version()
+        if version is not None and version == self._index_version:
+            return
+        
+        by_status: Dict[CourseStatus, Dict[str, None]] = {status: {} for status in CourseStatus}
+        deadlines = []
+        for course_id, course in cache.items():
+            by_status.setdefault(course.status, {})[course_id] = None
+            if course.deadline:
+                deadlines.append((course.deadline, course_id))
+        deadlines.sort(key=lambda item: item[0])
+        
+        self._by_status = by_status
+        self._deadline_keys = [deadline for deadline, _ in deadlines]
+        self._deadline_ids = [course_id for _, course_id in deadlines]
+        self._index_version = version
+    
+    def _ordered_selectors(self, selector_group: str) -> List[str]:
+        """
+        获取选择器组的尝试顺序，上次命中的选择器排在最前
+        
+        Args:
+            selector_group: 选择器组名
+            
+        Returns:
+            选择器列表
+        """
+        selectors = self._course_selectors.get(selector_group, [])
+        winner = self._winning_selector.get(selector_group)
+        if not winner or not selectors or selectors[0] == winner or winner not in selectors:
+            return selectors
+        return [winner] + [selector for selector in selectors if selector != winner]
+    
     def find_element_by_selectors(self, page: Page, selector_group: str, parent=None) -> Optional[Any]:
         """
         通过选择器组查找元素
@@ -327,18 +723,21 @@ class CourseManager:
         Returns:
             找到的元素或None
         """
-        selectors = self._course_selectors.get(selector_group, [])
+        selectors = self._ordered_selectors(selector_group)
         search_root = parent if parent else page
         
-        for selector in selectors:
-            try:
-                element = search_root.locator(selector).first
-                if element.count() > 0:
-                    logger.debug(f"找到元素: {selector_group} -> {selector}")
-                    return element
-            except Exception as e:
-                logger.debug(f"选择器 {selector} 未找到元素: {e}")
-                continue
+        # 在浏览器内一次判断所有选择器，代替逐个选择器调用count()的多次往返
+        try:
+            index = search_root.evaluate(_FIRST_MATCH_SCRIPT, selectors)
+        except Exception as e:
+            logger.debug(f"选择器组 {selector_group} 查找失败: {e}")
+            index = -1
+        
+        if isinstance(index, int) and 0 <= index < len(selectors):
+            selector = selectors[index]
+            self._winning_selector[selector_group] = selector
+            logger.debug(f"找到元素: {selector_group} -> {selector}")
+            return search_root.locator(selector).first
         
         logger.warning(f"未找到 {selector_group} 元素")
         return None
@@ -357,165 +756,238 @@ class CourseManager:
         courses = []
         
         try:
-            # 等待页面加载完成
+            # 等待页面加载完成，并等到课程列表出现（不再固定等待）
             page.wait_for_load_state('networkidle')
-            time.sleep(2)
+            self._wait_for_course_list(page)
             
-            # 查找课程列表元素
-            course_elements = []
-            for selector in self._course_selectors['course_list']:
+            # 查找课程列表元素，并在浏览器内一次性提取全部课程的原始信息，
+            # 避免每个课程、每个字段各一次Playwright往返
+            raw_courses = []
+            for selector in self._ordered_selectors('course_list'):
                 try:
-                    elements = page.locator(selector).all()
-                    if elements:
-                        course_elements = elements
-                        logger.info(f"找到 {len(elements)} 个课程，使用选择器: {selector}")
+                    raw_courses = page.eval_on_selector_all(
+                        selector, _EXTRACT_COURSES_SCRIPT, self._course_selectors
+                    )
+                    if raw_courses:
+                        self._winning_selector['course_list'] = selector
+                        logger.info(f"找到 {len(raw_courses)} 个课程，使用选择器: {selector}")
                         break
                 except Exception as e:
                     logger.debug(f"选择器 {selector} 查找失败: {e}")
                     continue
             
-            if not course_elements:
+            if not raw_courses:
                 logger.warning("未找到课程列表元素")
                 return courses
             
-            # 提取每个课程的信息
-            for i, course_element in enumerate(course_elements):
-                try:
-                    course = self._extract_single_course(page, course_element, i)
-                    if course:
-                        courses.append(course)
-                        logger.debug(f"提取课程成功: {course.title}")
-                    else:
-                        logger.warning(f"提取第 {i+1} 个课程失败")
-                        
-                except Exception as e:
-                    logger.error(f"提取第 {i+1} 个课程时出错: {e}")
+            return self._courses_from_raw(raw_courses, page.url)
+            
+        except Exception as e:
+            logger.error(f"从页面提取课程信息失败: {e}")
+            raise
+    
+    async def extract_courses_from_page_async(self, page: AsyncPage) -> List[Course]:
+        """
+        从异步页面提取课程信息
+        
+        所有课程列表选择器的提取脚本并发发出，由Playwright在同一连接上流水线执行，
+        再按选择器顺序取第一个有结果的，与同步版本的选择规则一致
+        
+        Args:
+            page: 异步页面对象
+            
+        Returns:
+            课程列表
+        """
+        try:
+            # 等待页面加载完成，并等到课程列表出现（不再固定等待）
+            await page.wait_for_load_state('networkidle')
+            try:
+                await page.wait_for_selector(
+                    self._course_list_selector(), state='attached', timeout=_CONTENT_WAIT_TIMEOUT
+                )
+            except Exception as e:
+                logger.debug(f"等待课程列表出现超时: {e}")
+            
+            list_selectors = self._ordered_selectors('course_list')
+            results = await asyncio.gather(
+                *(page.eval_on_selector_all(selector, _EXTRACT_COURSES_SCRIPT, self._course_selectors)
+                  for selector in list_selectors),
+                return_exceptions=True
+            )
+            
+            raw_courses = []
+            for selector, result in zip(list_selectors, results):
+                if isinstance(result, Exception):
+                    logger.debug(f"选择器 {selector} 查找失败: {result}")
                     continue
+                if result:
+                    raw_courses = result
+                    self._winning_selector['course_list'] = selector
+                    logger.info(f"找到 {len(raw_courses)} 个课程，使用选择器: {selector}")
+                    break
             
-            logger.info(f"成功提取 {len(courses)} 个课程")
-            return courses
+            if not raw_courses:
+                logger.warning("未找到课程列表元素")
+                return []
+            
+            return self._courses_from_raw(raw_courses, page.url)
             
         except Exception as e:
             logger.error(f"从页面提取课程信息失败: {e}")
             raise
     
-    def _extract_single_course(self, page: Page, course_element, index: int) -> Optional[Course]:
+    def _courses_from_raw(self, raw_courses: List[Dict[str, Any]], base_url: str) -> List[Course]:
         """
-        提取单个课程信息
+        将 _EXTRACT_COURSES_SCRIPT 的提取结果转换为课程列表
         
         Args:
-            page: 页面对象
-            course_element: 课程元素
+            raw_courses: 浏览器内提取的课程原始信息
+            base_url: 课程列表页面URL
+            
+        Returns:
+            课程列表
+        """
+        courses = []
+        now = datetime.now()
+        for i, raw_course in enumerate(raw_courses):
+            try:
+                course = self._build_course_from_raw(raw_course, base_url, i, now)
+                if course:
+                    courses.append(course)
+                    logger.debug(f"提取课程成功: {course.title}")
+                else:
+                    logger.warning(f"提取第 {i+1} 个课程失败")
+                    
+            except Exception as e:
+                logger.error(f"提取第 {i+1} 个课程时出错: {e}")
+                continue
+        
+        logger.info(f"成功提取 {len(courses)} 个课程")
+        return courses
+    
+    def _build_course_from_raw(self, raw_course: Dict[str, Any], base_url: str, index: int,
+                               now: Optional[datetime] = None) -> Optional[Course]:
+        """
+        由浏览器内提取的原始信息构建课程对象
+        
+        Args:
+            raw_course: _EXTRACT_COURSES_SCRIPT 返回的单个课程信息
+            base_url: 课程列表页面URL，用于解析相对链接
             index: 课程索引
+            now: 更新时间，同一批提取的课程共用
             
         Returns:
             课程对象或None
         """
         try:
-            # 提取课程标题
-            title = ""
-            title_element = self.find_element_by_selectors(page, 'course_title', course_element)
-            if title_element:
-                title = title_element.text_content() or ""
-                title = title.strip()
-            
-            if not title:
+            title = raw_course.get('title') or ""
+            if not title.strip():
                 logger.warning(f"课程 {index+1} 标题为空")
                 return None
             
-            # 提取课程链接
-            url = ""
-            link_element = self.find_element_by_selectors(page, 'course_link', course_element)
-            if link_element:
-                url = link_element.get_attribute('href') or ""
-                # 处理相对链接
-                if url and not url.startswith('http'):
-                    base_url = page.url
-                    if url.startswith('/'):
-                        from urllib.parse import urljoin
-                        url = urljoin(base_url, url)
-                    else:
-                        url = f"{base_url.rstrip('/')}/{url.lstrip('/')}"
-            
-            # 生成课程ID（使用URL或标题的哈希）
-            import hashlib
-            course_id = hashlib.md5((url or title).encode()).hexdigest()[:12]
-            
-            # 提取进度信息
             progress = 0.0
-            progress_element = self.find_element_by_selectors(page, 'course_progress', course_element)
-            if progress_element:
-                progress = self._parse_progress(progress_element)
-            
-            # 提取状态信息
-            status = CourseStatus.NOT_STARTED
-            status_element = self.find_element_by_selectors(page, 'course_status', course_element)
-            if status_element:
-                status = self._parse_status(status_element, progress)
-            elif progress > 0.95:
-                status = CourseStatus.COMPLETED
-            elif progress > 0:
-                status = CourseStatus.IN_PROGRESS
+            raw_progress = raw_course.get('progress')
+            if raw_progress:
+                progress = self._parse_progress_values(
+                    raw_progress.get('data'), raw_progress.get('style'), raw_progress.get('text')
+                )
             
-            # 提取描述信息
-            description = ""
-            desc_element = self.find_element_by_selectors(page, 'course_description', course_element)
-            if desc_element:
-                description = desc_element.text_content() or ""
-                description = description.strip()
-            
-            # 创建课程对象
-            course = Course(
-                id=course_id,
-                title=title,
-                url=url,
-                status=status,
-                progress=progress,
-                description=description,
-                updated_time=datetime.now()
-            )
+            status_text = raw_course.get('status')
+            status = self._parse_status_text(status_text, progress) if status_text is not None else None
             
-            return course
+            return self._create_course(
+                title, raw_course.get('href') or "", base_url, progress, status,
+                raw_course.get('description') or "", now
+            )
             
         except Exception as e:
             logger.error(f"提取单个课程信息失败: {e}")
             return None
     
-    def _parse_progress(self, progress_element) -> float:
+    def _create_course(self, title: str, href: str, base_url: str, progress: float,
+                       status: Optional[CourseStatus], description: str,
+                       now: Optional[datetime] = None) -> Course:
+        """
+        根据提取到的字段创建课程对象
+        
+        Args:
+            title: 课程标题
+            href: 课程链接（可为相对链接）
+            base_url: 课程列表页面URL
+            progress: 进度值
+            status: 解析出的状态，页面上没有状态元素时为None
+            description: 课程描述
+            now: 更新时间，未传入时使用当前时间
+            
+        Returns:
+            课程对象
+        """
+        title = title.strip()
+        
+        # 处理相对链接
+        url = href
+        if url and not url.startswith('http'):
+            if url.startswith('/'):
+                from urllib.parse import urljoin
+                url = urljoin(base_url, url)
+            else:
+                url = f"{base_url.rstrip('/')}/{url.lstrip('/')}"
+        
+        # 生成课程ID（使用URL或标题的哈希）
+        course_id = _make_course_id(url or title)
+        
+        # 没有状态元素时根据进度推断
+        if status is None:
+            if progress > 0.95:
+                status = CourseStatus.COMPLETED
+            elif progress > 0:
+                status = CourseStatus.IN_PROGRESS
+            else:
+                status = CourseStatus.NOT_STARTED
+        
+        return Course(
+            id=course_id,
+            title=title,
+            url=url,
+            status=status,
+            progress=progress,
+            description=description.strip(),
+            updated_time=now or datetime.now()
+        )
+    
+    @staticmethod
+    def _parse_progress_values(progress_attr: Optional[str], style: Optional[str], text: Optional[str]) -> float:
         """
-        解析进度信息
+        从进度元素的data-progress属性、样式和文本解析进度
         
         Args:
-            progress_element: 进度元素
+            progress_attr: data-progress属性值
+            style: style属性值
+            text: 元素文本
             
         Returns:
             进度值 (0.0-1.0)
         """
         try:
-            # 尝试从data-progress属性获取
-            progress_attr = progress_element.get_attribute('data-progress')
             if progress_attr:
                 return float(progress_attr) / 100.0 if float(progress_attr) > 1 else float(progress_attr)
             
-            # 尝试从样式width获取
-            style = progress_element.get_attribute('style') or ""
+            style = style or ""
             if 'width:' in style:
-                import re
-                match = re.search(r'width:\s*(\d+(?:\.\d+)?)%', style)
+                match = _WIDTH_RE.search(style)
                 if match:
                     return float(match.group(1)) / 100.0
             
-            # 尝试从文本内容获取
-            text = progress_element.text_content() or ""
-            import re
+            text = text or ""
             
             # 查找百分比
-            percent_match = re.search(r'(\d+(?:\.\d+)?)%', text)
+            percent_match = _PERCENT_RE.search(text)
             if percent_match:
                 return float(percent_match.group(1)) / 100.0
             
             # 查找分数形式 (如 3/10)
-            fraction_match = re.search(r'(\d+)/(\d+)', text)
+            fraction_match = _FRACTION_RE.search(text)
             if fraction_match:
                 return float(fraction_match.group(1)) / float(fraction_match.group(2))
             
@@ -525,32 +997,23 @@ class CourseManager:
             logger.debug(f"解析进度信息失败: {e}")
             return 0.0
     
-    def _parse_status(self, status_element, progress: float) -> CourseStatus:
+    @staticmethod
+    def _parse_status_text(text: Optional[str], progress: float) -> CourseStatus:
         """
-        解析课程状态
+        从状态文本解析课程状态
         
         Args:
-            status_element: 状态元素
+            text: 状态元素文本
             progress: 当前进度
             
         Returns:
             课程状态
         """
         try:
-            text = status_element.text_content() or ""
-            text = text.lower().strip()
-            
-            # 状态关键词映射
-            status_keywords = {
-                CourseStatus.COMPLETED: ['completed', '已完成', '完成', '100%', 'finished'],
-                CourseStatus.IN_PROGRESS: ['in progress', '进行中', '学习中', 'ongoing', 'started'],
-                CourseStatus.NOT_STARTED: ['not started', '未开始', '未学习', 'new'],
-                CourseStatus.LOCKED: ['locked', '锁定', '未解锁', 'unavailable'],
-                CourseStatus.EXPIRED: ['expired', '过期', '已过期', 'overdue']
-            }
+            text = (text or "").lower().strip()
             
-            for status, keywords in status_keywords.items():
-                if any(keyword in text for keyword in keywords):
+            for status, pattern in _STATUS_PATTERNS:
+                if pattern.search(text):
                     return status
             
             # 根据进度推断状态
@@ -592,10 +1055,13 @@ class CourseManager:
             
             logger.info(f"开始获取课程列表: {course_url}")
             
+            # 先加载已有缓存，后面的合并始终基于已加载的缓存
+            cache = self.courses_cache
+            
             # 导航到课程页面
             page.goto(course_url)
             page.wait_for_load_state('networkidle')
-            time.sleep(3)  # 等待动态内容加载
+            self._wait_for_course_list(page)  # 等待动态内容加载
             
             # 处理可能的分页或加载更多按钮
             self._handle_pagination(page)
@@ -604,16 +1070,15 @@ class CourseManager:
             courses = self.extract_courses_from_page(page)
             
             # 更新缓存
-            self._load_courses_cache()
             for course in courses:
                 # 如果缓存中已存在，保留原有的优先级和访问时间等信息
-                if course.id in self._courses_cache:
-                    cached_course = self._courses_cache[course.id]
+                cached_course = cache.get(course.id)
+                if cached_course is not None:
                     course.priority = cached_course.priority
                     course.last_accessed = cached_course.last_accessed
                     course.created_time = cached_course.created_time
                 
-                self._courses_cache[course.id] = course
+                cache[course.id] = course
             
             # 保存更新后的缓存
             self.save_courses_cache()
@@ -642,36 +1107,38 @@ class CourseManager:
                 '[data-action="load-more"]'
             ]
             
+            # 合并为一个只匹配可见元素的选择器，每轮只需一次查询
+            load_more_selector = _join_visible_selectors(load_more_selectors)
+            course_list_selector = self._course_list_selector()
+            
             max_clicks = 10  # 最多点击10次加载更多
             clicks = 0
             
             while clicks < max_clicks:
-                load_more_button = None
-                
-                for selector in load_more_selectors:
-                    try:
-                        element = page.locator(selector).first
-                        if element.count() > 0 and element.is_visible():
-                            load_more_button = element
-                            break
-                    except:
-                        continue
+                load_more_button = self._find_visible(page, load_more_selector)
                 
                 if not load_more_button:
                     break
                 
                 try:
-                    # 滚动到按钮位置
-                    load_more_button.scroll_into_view_if_needed()
-                    time.sleep(1)
+                    # 记录点击前的课程数量，用于判断新内容是否已加载
+                    previous_count = page.locator(course_list_selector).count()
                     
-                    # 点击加载更多
+                    # 滚动到按钮位置并点击（click会自动等待按钮可点击）
+                    load_more_button.scroll_into_view_if_needed()
                     load_more_button.click()
                     clicks += 1
                     
-                    # 等待内容加载
+                    # 等待内容加载：网络空闲后等到课程数量增加
                     page.wait_for_load_state('networkidle', timeout=10000)
-                    time.sleep(2)
+                    try:
+                        page.wait_for_function(
+                            _MORE_COURSES_LOADED_SCRIPT,
+                            arg=[course_list_selector, previous_count],
+                            timeout=_CONTENT_WAIT_TIMEOUT
+                        )
+                    except Exception as e:
+                        logger.debug(f"等待新课程加载超时: {e}")
                     
                     logger.debug(f"点击加载更多按钮 {clicks} 次")
                     
@@ -687,20 +1154,13 @@ class CourseManager:
                 '.pager-next'
             ]
             
+            next_page_selector = _join_visible_selectors(next_page_selectors)
+            
             max_pages = 5  # 最多处理5页
             current_page = 1
             
             while current_page < max_pages:
-                next_button = None
-                
-                for selector in next_page_selectors:
-                    try:
-                        element = page.locator(selector).first
-                        if element.count() > 0 and element.is_visible():
-                            next_button = element
-                            break
-                    except:
-                        continue
+                next_button = self._find_visible(page, next_page_selector)
                 
                 if not next_button:
                     break
@@ -710,7 +1170,7 @@ class CourseManager:
                     current_page += 1
                     
                     page.wait_for_load_state('networkidle', timeout=15000)
-                    time.sleep(3)
+                    self._wait_for_course_list(page)
                     
                     logger.debug(f"切换到第 {current_page} 页")
                     
@@ -721,6 +1181,49 @@ class CourseManager:
         except Exception as e:
             logger.debug(f"处理分页失败: {e}")
     
+    def _course_list_selector(self) -> str:
+        """所有课程列表选择器合并成的单个选择器"""
+        return ', '.join(self._course_selectors['course_list'])
+    
+    def _wait_for_course_list(self, page: Page) -> bool:
+        """
+        等待课程列表元素出现
+        
+        Args:
+            page: 页面对象
+            
+        Returns:
+            是否在超时前出现
+        """
+        try:
+            page.wait_for_selector(
+                self._course_list_selector(), state='attached', timeout=_CONTENT_WAIT_TIMEOUT
+            )
+            return True
+        except Exception as e:
+            logger.debug(f"等待课程列表出现超时: {e}")
+            return False
+    
+    @staticmethod
+    def _find_visible(page: Page, selector: str) -> Optional[Any]:
+        """
+        查找第一个可见的匹配元素
+        
+        Args:
+            page: 页面对象
+            selector: 已合并的选择器
+            
+        Returns:
+            找到的元素或None
+        """
+        try:
+            element = page.locator(selector).first
+            if element.count() > 0:
+                return element
+        except Exception as e:
+            logger.debug(f"选择器 {selector} 查找失败: {e}")
+        return None
+    
     def get_courses(self, reload: bool = False) -> List[Course]:
         """
         获取课程列表
@@ -731,10 +1234,10 @@ class CourseManager:
         Returns:
             课程列表
         """
-        if reload or not self._cache_loaded:
+        if reload:
             self._load_courses_cache()
         
-        return list(self._courses_cache.values())
+        return list(self.courses_cache.values())
     
     def get_course_by_id(self, course_id: str) -> Optional[Course]:
         """
@@ -746,10 +1249,10 @@ class CourseManager:
         Returns:
             课程对象或None
         """
-        self._load_courses_cache()
-        return self._courses_cache.get(course_id)
+        return self.courses_cache.get(course_id)
     
-    def update_course_progress(self, course_id: str, progress: float, status: Optional[CourseStatus] = None) -> bool:
+    def update_course_progress(self, course_id: str, progress: float, status: Optional[CourseStatus] = None,
+                               save: bool = True) -> bool:
         """
         更新课程进度
         
@@ -757,21 +1260,23 @@ class CourseManager:
             course_id: 课程ID
             progress: 新的进度值
             status: 新的状态（可选）
+            save: 是否立即保存；批量更新时可传False，最后调用flush统一写入
             
         Returns:
             是否更新成功
         """
         try:
-            self._load_courses_cache()
-            
-            if course_id not in self._courses_cache:
+            course = self.courses_cache.get(course_id)
+            if course is None:
                 logger.warning(f"课程 {course_id} 不存在")
                 return False
             
-            course = self._courses_cache[course_id]
+            index_valid = self._index_version is not None and self._index_version == self._current_index_version()
+            old_status = course.status
             course.progress = max(0.0, min(1.0, progress))
-            course.updated_time = datetime.now()
-            course.last_accessed = datetime.now()
+            now = datetime.now()
+            course.updated_time = now
+            course.last_accessed = now
             
             if status:
                 course.status = status
@@ -780,8 +1285,17 @@ class CourseManager:
             elif progress > 0:
                 course.status = CourseStatus.IN_PROGRESS
             
+            # 同步状态索引，索引修改前有效时更新版本，避免下次查询整体重建
+            if index_valid:
+                if course.status != old_status:
+                    self._by_status.get(old_status, {}).pop(course_id, None)
+                    self._by_status.setdefault(course.status, {})[course_id] = None
+                self._index_version = self._current_index_version()
+            
             # 保存缓存
-            self.save_courses_cache()
+            self._dirty_ids.add(course_id)
+            if save:
+                self.save_courses_cache()
             
             logger.info(f"课程 {course.title} 进度更新为 {progress:.1%}")
             return True
@@ -791,13 +1305,15 @@ class CourseManager:
             return False
     
     def sort_courses_by_priority(self, courses: Optional[List[Course]] = None, 
-                                custom_weights: Optional[Dict[str, float]] = None) -> List[Course]:
+                                custom_weights: Optional[Dict[str, float]] = None,
+                                top_k: Optional[int] = None) -> List[Course]:
         """
         按优先级排序课程
         
         Args:
             courses: 课程列表，如果为None则使用缓存中的所有课程
             custom_weights: 自定义权重配置
+            top_k: 只需要评分最高的前几个课程时传入，使用堆选择代替完整排序
             
         Returns:
             排序后的课程列表
@@ -805,23 +1321,26 @@ class CourseManager:
         if courses is None:
             courses = self.get_courses()
         
-        weights = custom_weights or self.priority_weights
+        # 权重只转换一次，所有课程共用
+        weights = _PriorityWeights.from_mapping(custom_weights or self.priority_weights)
         
-        # 计算每个课程的优先级评分
-        scored_courses = []
-        for course in courses:
-            score = course.calculate_priority_score(weights)
-            scored_courses.append((course, score))
+        # 计算每个课程的优先级评分（所有课程使用同一个当前时间）
+        now = datetime.now()
         
-        # 按评分排序（分数高的优先）
-        scored_courses.sort(key=lambda x: x[1], reverse=True)
+        def score(course: Course) -> float:
+            return course.calculate_priority_score(weights, now)
+        
+        # 按评分排序（分数高的优先，同分保持原有顺序）
+        if top_k is not None:
+            sorted_courses = heapq.nlargest(top_k, courses, key=score)
+        else:
+            sorted_courses = sorted(courses, key=score, reverse=True)
         
         # 记录排序结果
-        sorted_courses = [course for course, score in scored_courses]
         logger.info(f"课程优先级排序完成，共 {len(sorted_courses)} 个课程")
         
-        for i, (course, score) in enumerate(scored_courses[:5]):  # 显示前5个
-            logger.debug(f"{i+1}. {course.title} (评分: {score:.2f})")
+        for i, course in enumerate(sorted_courses[:5]):  # 显示前5个
+            logger.debug(f"{i+1}. {course.title} (评分: {score(course):.2f})")
         
         return sorted_courses
     
@@ -835,8 +1354,9 @@ class CourseManager:
         Returns:
             指定状态的课程列表
         """
-        courses = self.get_courses()
-        return [course for course in courses if course.status == status]
+        self._ensure_indexes()
+        cache = self._courses_cache
+        return [cache[course_id] for course_id in self._by_status.get(status, ())]
     
     def get_urgent_courses(self, days_threshold: int = 7) -> List[Course]:
         """
@@ -848,17 +1368,21 @@ class CourseManager:
         Returns:
             紧急课程列表
         """
-        courses = self.get_courses()
-        urgent_courses = []
+        self._ensure_indexes()
+        cache = self._courses_cache
+        now = datetime.now()
         
-        for course in courses:
-            if course.deadline and not course.is_completed():
-                days_left = course.days_until_deadline()
-                if days_left is not None and days_left <= days_threshold:
-                    urgent_courses.append(course)
+        # 剩余天数向下取整，days_left <= days_threshold 等价于截止时间早于 now + (days_threshold + 1) 天，
+        # 在截止时间索引上二分即可得到所有候选课程
+        cutoff = bisect.bisect_left(self._deadline_keys, now + timedelta(days=days_threshold + 1))
+        urgent_courses = []
+        for course_id in self._deadline_ids[:cutoff]:
+            course = cache[course_id]
+            if not course.is_completed():
+                urgent_courses.append(course)
         
         # 按紧急度排序
-        urgent_courses.sort(key=lambda c: c.get_urgency_score(), reverse=True)
+        urgent_courses.sort(key=lambda c: c.get_urgency_score(now), reverse=True)
         return urgent_courses
     
     def get_statistics(self) -> Dict[str, Any]:
@@ -882,13 +1406,37 @@ class CourseManager:
                 'overdue_courses': 0
             }
         
-        completed = len([c for c in courses if c.is_completed()])
-        in_progress = len([c for c in courses if c.is_in_progress()])
-        not_started = len([c for c in courses if c.status == CourseStatus.NOT_STARTED])
-        urgent = len(self.get_urgent_courses())
-        overdue = len([c for c in courses if c.is_overdue()])
+        # 单次遍历累计各项计数，所有课程共用同一个当前时间；
+        # 完成/进行中的判断与 is_completed/is_in_progress 一致，内联以省去方法调用
+        now = datetime.now()
+        # 剩余天数 <= 7（与 get_urgent_courses 默认阈值一致）等价于截止时间早于该时刻
+        urgent_cutoff = now + timedelta(days=8)
+        completed_status = CourseStatus.COMPLETED
+        in_progress_status = CourseStatus.IN_PROGRESS
+        not_started_status = CourseStatus.NOT_STARTED
+        completed = in_progress = not_started = urgent = overdue = 0
+        total_progress = 0.0
+        
+        for course in courses:
+            status = course.status
+            progress = course.progress
+            total_progress += progress
+            
+            is_completed = status is completed_status or progress >= 0.95
+            if is_completed:
+                completed += 1
+            if status is in_progress_status or 0 < progress < 0.95:
+                in_progress += 1
+            if status is not_started_status:
+                not_started += 1
+            
+            deadline = course.deadline
+            if deadline:
+                if now > deadline:
+                    overdue += 1
+                if not is_completed and deadline < urgent_cutoff:
+                    urgent += 1
         
-        total_progress = sum(c.progress for c in courses)
         average_progress = total_progress / len(courses)
         completion_rate = completed / len(courses)
         
@@ -901,10 +1449,17 @@ class CourseManager:
             'average_progress': average_progress,
             'urgent_courses': urgent,
             'overdue_courses': overdue,
-            'last_updated': datetime.now().isoformat()
+            'last_updated': now.isoformat()
         }
 
 
+def _flush_on_exit(manager_ref: 'weakref.ref') -> None:
+    """进程退出时写入课程管理器中尚未保存的修改"""
+    manager = manager_ref()
+    if manager is not None:
+        manager.flush()
+
+
 # 创建默认课程管理器实例
 _default_manager = None
 
@@ -5,12 +5,23 @@
 """
 
 import time
+import asyncio
+import logging
+import random
 import functools
+import threading
 import traceback
+from collections import Counter
 from typing import Callable, Any, Optional, Union, List, Type
 from enum import Enum
 from playwright.sync_api import Page, TimeoutError as PlaywrightTimeoutError, Error as PlaywrightError
 
+# 可选：安装pyahocorasick时用多模式自动机一次扫描完成错误分类
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
 from ..utils.logger import logger
 
 
@@ -31,19 +42,125 @@ class RetryStrategy(Enum):
     FIXED = "fixed"            # 固定延迟
 
 
+# 重试等待的默认随机抖动比例，避免多个任务同时失败后在同一时刻集中重试
+DEFAULT_RETRY_JITTER = 0.5
+
+
+def _apply_jitter(delay: float, jitter: float, max_delay: Optional[float] = None) -> float:
+    """
+    为延迟时间加入随机抖动
+    
+    Args:
+        delay: 原始延迟时间（秒）
+        jitter: 抖动比例，延迟在 [1 - jitter, 1 + jitter] 倍之间随机
+        max_delay: 最大延迟时间（秒）
+        
+    Returns:
+        抖动后的延迟时间（秒），不小于0
+    """
+    if jitter > 0:
+        delay *= 1 + random.uniform(-jitter, jitter)
+    if max_delay is not None:
+        delay = min(delay, max_delay)
+    return max(0.0, delay)
+
+
+# 分类结果缓存在异常对象上的属性名
+_ERROR_TYPE_ATTR = '_auto_study_error_type'
+
+
+class CircuitOpenError(Exception):
+    """断路器开启（或半开探测中）时拒绝执行"""
+    pass
+
+
+class CircuitBreaker:
+    """断路器装饰器，连续失败达到阈值后在超时时间内拒绝执行"""
+    
+    def __init__(self,
+                 failure_threshold: int = 5,
+                 timeout: float = 60,
+                 expected_exception: Type[Exception] = Exception):
+        """
+        初始化断路器
+        
+        Args:
+            failure_threshold: 失败阈值
+            timeout: 超时时间（秒）
+            expected_exception: 预期异常类型
+        """
+        self.failure_threshold = failure_threshold
+        self.timeout = timeout
+        self.expected_exception = expected_exception
+        self.failure_count = 0
+        self.last_failure_time = None
+        self.state = 'CLOSED'  # CLOSED, OPEN, HALF_OPEN
+        # 多个线程共用同一断路器时，保证计数和状态切换一致
+        self._lock = threading.Lock()
+        # 半开状态下只允许一个请求探测，其余请求直接拒绝
+        self._probe_lock = threading.Lock()
+    
+    def __call__(self, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            probing = False
+            with self._lock:
+                if self.state == 'OPEN':
+                    if time.monotonic() - self.last_failure_time < self.timeout:
+                        raise CircuitOpenError(f"断路器处于开启状态，拒绝执行 {func.__name__}")
+                    self.state = 'HALF_OPEN'
+                
+                if self.state == 'HALF_OPEN':
+                    if not self._probe_lock.acquire(blocking=False):
+                        raise CircuitOpenError(f"断路器处于半开状态，正在探测，拒绝执行 {func.__name__}")
+                    probing = True
+            
+            try:
+                result = func(*args, **kwargs)
+            except self.expected_exception as e:
+                self.on_failure()
+                raise e
+            finally:
+                if probing:
+                    self._probe_lock.release()
+            
+            self.on_success()
+            return result
+        
+        return wrapper
+    
+    def on_success(self):
+        with self._lock:
+            self.failure_count = 0
+            self.state = 'CLOSED'
+        logger.info("断路器重置为关闭状态")
+    
+    def on_failure(self):
+        with self._lock:
+            self.failure_count += 1
+            self.last_failure_time = time.monotonic()
+            
+            # 半开探测失败时直接回到开启状态
+            opened = self.state == 'HALF_OPEN' or self.failure_count >= self.failure_threshold
+            if opened:
+                self.state = 'OPEN'
+            failure_count = self.failure_count
+        
+        if opened:
+            logger.warning("断路器开启，失败次数: %d", failure_count)
+
+
 class ErrorHandler:
     """错误处理和重试管理器"""
     
     def __init__(self):
         """初始化错误处理器"""
-        self._error_statistics = {
-            ErrorType.TIMEOUT: 0,
-            ErrorType.NETWORK: 0,
-            ErrorType.ELEMENT_NOT_FOUND: 0,
-            ErrorType.JAVASCRIPT: 0,
-            ErrorType.NAVIGATION: 0,
-            ErrorType.UNKNOWN: 0
-        }
+        # 全零计数模板，初始化和重置统计时直接复制
+        self._zero_stats = {error_type: 0 for error_type in ErrorType}
+        self._error_statistics = Counter(self._zero_stats)
+        
+        # 取消标志：设置后正在等待的重试立即结束
+        self._cancel = threading.Event()
         
         # 可重试的错误类型
         self._retryable_errors = {
@@ -58,8 +175,7 @@ class ErrorHandler:
             ErrorType.TIMEOUT: [
                 "timeout",
                 "timed out",
-                "waiting for",
-                "TimeoutError"
+                "waiting for"
             ],
             ErrorType.NETWORK: [
                 "net::",
@@ -86,32 +202,131 @@ class ErrorHandler:
                 "ERR_FAILED"
             ]
         }
+        
+        # 模式在构造时统一转为小写；按错误类型声明顺序排列，分类时顺序靠前的类型优先
+        self._lowered_patterns = tuple(
+            (error_type, tuple(pattern.lower() for pattern in patterns))
+            for error_type, patterns in self._error_patterns.items()
+        )
+        self._pattern_automaton = self._build_pattern_automaton()
+        
+        # 按异常类直接分类，优先于错误信息匹配；子类需排在父类之前
+        self._class_map = (
+            (PlaywrightTimeoutError, ErrorType.TIMEOUT),
+        )
+        
+        # 错误类型到处理方法的分发表，未列出的类型交给 _handle_unknown_error
+        self._handlers = {
+            ErrorType.TIMEOUT: self._handle_timeout_error,
+            ErrorType.NETWORK: self._handle_network_error,
+            ErrorType.ELEMENT_NOT_FOUND: self._handle_element_not_found_error,
+            ErrorType.JAVASCRIPT: self._handle_javascript_error,
+            ErrorType.NAVIGATION: self._handle_navigation_error,
+        }
+    
+    def _build_pattern_automaton(self):
+        """
+        构建错误模式的Aho-Corasick自动机
+        
+        每个模式映射到 (类型顺序, 错误类型)，同一模式出现在多个类型中时保留靠前的类型
+        
+        Returns:
+            自动机，未安装pyahocorasick时返回None
+        """
+        if ahocorasick is None:
+            return None
+        
+        automaton = ahocorasick.Automaton()
+        for rank, (error_type, patterns) in enumerate(self._lowered_patterns):
+            for pattern in patterns:
+                if pattern not in automaton:
+                    automaton.add_word(pattern, (rank, error_type))
+        automaton.make_automaton()
+        return automaton
+    
+    def _match_error_pattern(self, error_message: str) -> Optional[ErrorType]:
+        """
+        在小写错误信息中查找匹配的错误类型
+        
+        Args:
+            error_message: 小写后的错误信息
+            
+        Returns:
+            匹配的错误类型，无匹配时返回None
+        """
+        automaton = self._pattern_automaton
+        if automaton is not None:
+            # 自动机一次扫描得到所有命中，取类型顺序最靠前的，与逐个类型匹配的结果一致
+            best = None
+            for _, (rank, error_type) in automaton.iter(error_message):
+                if best is None or rank < best[0]:
+                    best = (rank, error_type)
+                    if rank == 0:
+                        break
+            return best[1] if best else None
+        
+        for error_type, patterns in self._lowered_patterns:
+            for pattern in patterns:
+                if pattern in error_message:
+                    return error_type
+        return None
     
     def classify_error(self, error: Exception) -> ErrorType:
         """
         分类错误类型
         
+        同一个异常只分类和计数一次，结果缓存在异常对象上，
+        重试判断和页面错误处理再次分类时直接返回缓存结果
+        
         Args:
             error: 异常对象
             
         Returns:
             错误类型
         """
-        error_message = str(error).lower()
+        cached = getattr(error, _ERROR_TYPE_ATTR, None)
+        if cached is not None:
+            return cached
         
-        for error_type, patterns in self._error_patterns.items():
-            for pattern in patterns:
-                if pattern.lower() in error_message:
-                    self._error_statistics[error_type] += 1
-                    return error_type
+        if isinstance(error, _NON_RETRYABLE):
+            # 明确不可重试的异常类型，无需匹配错误信息
+            error_type = ErrorType.UNKNOWN
+        else:
+            for error_class, class_type in self._class_map:
+                if isinstance(error, error_class):
+                    error_type = class_type
+                    break
+            else:
+                error_type = (self._match_error_pattern(str(error).lower())
+                              or ErrorType.UNKNOWN)
         
-        # 检查异常类型
-        if isinstance(error, PlaywrightTimeoutError):
-            self._error_statistics[ErrorType.TIMEOUT] += 1
-            return ErrorType.TIMEOUT
+        self._error_statistics[error_type] += 1
+        try:
+            setattr(error, _ERROR_TYPE_ATTR, error_type)
+        except (AttributeError, TypeError):
+            pass
+        return error_type
+    
+    def cancel(self) -> None:
+        """取消所有正在等待的重试，之后的重试也不再等待而是直接失败"""
+        self._cancel.set()
+        logger.info("已取消重试等待")
+    
+    def resume(self) -> None:
+        """清除取消标志，恢复正常重试"""
+        self._cancel.clear()
+    
+    def wait_before_retry(self, delay: float) -> bool:
+        """
+        等待重试延迟，可被 cancel() 中断
         
-        self._error_statistics[ErrorType.UNKNOWN] += 1
-        return ErrorType.UNKNOWN
+        Args:
+            delay: 延迟时间（秒）
+            
+        Returns:
+            是否已被取消
+        """
+        return self._cancel.wait(delay)
     
     def is_retryable(self, error: Exception) -> bool:
         """
@@ -123,6 +338,8 @@ class ErrorHandler:
         Returns:
             是否可重试
         """
+        if isinstance(error, _NON_RETRYABLE):
+            return False
         error_type = self.classify_error(error)
         return error_type in self._retryable_errors
     
@@ -130,7 +347,8 @@ class ErrorHandler:
                        attempt: int, 
                        strategy: RetryStrategy = RetryStrategy.EXPONENTIAL,
                        base_delay: float = 1.0,
-                       max_delay: float = 60.0) -> float:
+                       max_delay: Optional[float] = 60.0,
+                       jitter: float = 0.0) -> float:
         """
         计算重试延迟时间
         
@@ -138,7 +356,8 @@ class ErrorHandler:
             attempt: 当前重试次数（从1开始）
             strategy: 重试策略
             base_delay: 基础延迟时间（秒）
-            max_delay: 最大延迟时间（秒）
+            max_delay: 最大延迟时间（秒），None表示不限制
+            jitter: 随机抖动比例，0表示不加抖动
             
         Returns:
             延迟时间（秒）
@@ -150,7 +369,7 @@ class ErrorHandler:
         else:  # FIXED
             delay = base_delay
         
-        return min(delay, max_delay)
+        return _apply_jitter(delay, jitter, max_delay)
     
     def retry_on_error(self,
                       max_retries: int = 3,
@@ -158,7 +377,8 @@ class ErrorHandler:
                       base_delay: float = 1.0,
                       max_delay: float = 60.0,
                       exceptions: tuple = (Exception,),
-                      on_retry: Optional[Callable] = None):
+                      on_retry: Optional[Callable] = None,
+                      jitter: float = DEFAULT_RETRY_JITTER):
         """
         重试装饰器
         
@@ -169,56 +389,105 @@ class ErrorHandler:
             max_delay: 最大延迟时间
             exceptions: 需要重试的异常类型
             on_retry: 重试时的回调函数
+            jitter: 重试等待的随机抖动比例
         """
         def decorator(func: Callable) -> Callable:
             @functools.wraps(func)
             def wrapper(*args, **kwargs):
-                last_exception = None
-                
-                for attempt in range(max_retries + 1):
-                    try:
-                        result = func(*args, **kwargs)
-                        
-                        # 如果不是第一次尝试，记录成功信息
-                        if attempt > 0:
-                            logger.info(f"函数 {func.__name__} 在第 {attempt + 1} 次尝试后成功")
-                        
-                        return result
-                        
-                    except exceptions as e:
-                        last_exception = e
-                        
-                        # 检查是否可重试
-                        if not self.is_retryable(e):
-                            logger.error(f"函数 {func.__name__} 遇到不可重试错误: {e}")
-                            raise e
-                        
-                        # 如果是最后一次尝试，直接抛出异常
-                        if attempt == max_retries:
-                            break
-                        
-                        # 计算延迟时间
-                        delay = self.calculate_delay(attempt + 1, strategy, base_delay, max_delay)
-                        
-                        logger.warning(f"函数 {func.__name__} 第 {attempt + 1} 次尝试失败: {e}")
-                        logger.info(f"将在 {delay:.2f} 秒后进行第 {attempt + 2} 次尝试")
-                        
-                        # 调用重试回调
-                        if on_retry:
-                            try:
-                                on_retry(attempt + 1, e)
-                            except Exception as callback_error:
-                                logger.error(f"重试回调执行失败: {callback_error}")
-                        
-                        time.sleep(delay)
-                
-                # 所有重试都失败了
-                logger.error(f"函数 {func.__name__} 在 {max_retries + 1} 次尝试后仍然失败")
-                raise last_exception
+                return self._retry_loop(func, args, kwargs, max_retries, strategy,
+                                        base_delay, max_delay, exceptions, on_retry, jitter)
             
             return wrapper
         return decorator
     
+    def _retry_loop(self,
+                    func: Callable,
+                    args: tuple,
+                    kwargs: dict,
+                    max_retries: int,
+                    strategy: RetryStrategy,
+                    base_delay: float,
+                    max_delay: float,
+                    exceptions: tuple = (Exception,),
+                    on_retry: Optional[Callable] = None,
+                    jitter: float = DEFAULT_RETRY_JITTER) -> Any:
+        """
+        执行函数并按策略重试，供 retry_on_error 和 safe_execute 共用
+        
+        Args:
+            func: 要执行的函数
+            args: 函数参数
+            kwargs: 函数关键字参数
+            其余参数同 retry_on_error
+            
+        Returns:
+            函数执行结果
+        """
+        last_exception = None
+        
+        for attempt in self._retry_iter(max_retries, strategy, base_delay, max_delay, jitter):
+            try:
+                result = func(*args, **kwargs)
+                
+                # 如果不是第一次尝试，记录成功信息
+                if attempt > 0:
+                    logger.info("函数 %s 在第 %d 次尝试后成功", func.__name__, attempt + 1)
+                
+                return result
+                
+            except exceptions as e:
+                last_exception = e
+                
+                # 检查是否可重试
+                if not self.is_retryable(e):
+                    logger.error("函数 %s 遇到不可重试错误: %s", func.__name__, e)
+                    raise e
+                
+                # 如果是最后一次尝试，直接抛出异常
+                if attempt == max_retries:
+                    break
+                
+                logger.warning("函数 %s 第 %d 次尝试失败: %s", func.__name__, attempt + 1, e)
+                
+                # 调用重试回调
+                if on_retry:
+                    try:
+                        on_retry(attempt + 1, e)
+                    except Exception as callback_error:
+                        logger.error("重试回调执行失败: %s", callback_error)
+        
+        # 所有重试都失败了（或重试被取消）
+        logger.error("函数 %s 在 %d 次尝试后仍然失败", func.__name__, attempt + 1)
+        raise last_exception
+    
+    def _retry_iter(self,
+                    max_retries: int,
+                    strategy: RetryStrategy,
+                    base_delay: float,
+                    max_delay: Optional[float],
+                    jitter: float):
+        """
+        重试节奏生成器，retry_on_error、login_retry、captcha_retry 共用
+        
+        依次产出尝试序号（从0开始）。调用方本次尝试失败并继续循环时，
+        按策略等待后再产出下一个序号；等待被 cancel() 中断时结束迭代。
+        
+        Args:
+            max_retries: 最大重试次数
+            strategy: 重试策略
+            base_delay: 基础延迟时间
+            max_delay: 最大延迟时间，None表示不限制
+            jitter: 重试等待的随机抖动比例
+        """
+        for attempt in range(max_retries + 1):
+            if attempt > 0:
+                delay = self.calculate_delay(attempt, strategy, base_delay, max_delay, jitter)
+                logger.info("将在 %.2f 秒后进行第 %d 次尝试", delay, attempt + 1)
+                if self.wait_before_retry(delay):
+                    logger.warning("重试已被取消")
+                    return
+            yield attempt
+    
     def safe_execute(self,
                     func: Callable,
                     *args,
@@ -242,15 +511,11 @@ class ErrorHandler:
         Returns:
             函数执行结果或默认值
         """
-        @self.retry_on_error(max_retries=max_retries, strategy=strategy)
-        def wrapped_func():
-            return func(*args, **kwargs)
-        
         try:
-            return wrapped_func()
+            return self._retry_loop(func, args, kwargs, max_retries, strategy, 1.0, 60.0)
         except Exception as e:
             if suppress_errors:
-                logger.warning(f"函数 {func.__name__} 执行失败，返回默认值: {e}")
+                logger.warning("函数 %s 执行失败，返回默认值: %s", func.__name__, e)
                 return default_value
             else:
                 raise e
@@ -267,23 +532,11 @@ class ErrorHandler:
             是否成功处理错误
         """
         try:
-            error_type = self.classify_error(error)
-            
-            if error_type == ErrorType.TIMEOUT:
-                return self._handle_timeout_error(page, error)
-            elif error_type == ErrorType.NETWORK:
-                return self._handle_network_error(page, error)
-            elif error_type == ErrorType.ELEMENT_NOT_FOUND:
-                return self._handle_element_not_found_error(page, error)
-            elif error_type == ErrorType.JAVASCRIPT:
-                return self._handle_javascript_error(page, error)
-            elif error_type == ErrorType.NAVIGATION:
-                return self._handle_navigation_error(page, error)
-            else:
-                return self._handle_unknown_error(page, error)
+            handler = self._handlers.get(self.classify_error(error), self._handle_unknown_error)
+            return handler(page, error)
             
         except Exception as handling_error:
-            logger.error(f"处理页面错误时发生异常: {handling_error}")
+            logger.error("处理页面错误时发生异常: %s", handling_error)
             return False
     
     def _handle_timeout_error(self, page: Page, error: Exception) -> bool:
@@ -312,7 +565,7 @@ class ErrorHandler:
             return True
             
         except Exception as e:
-            logger.error(f"处理超时错误失败: {e}")
+            logger.error("处理超时错误失败: %s", e)
             return False
     
     def _handle_network_error(self, page: Page, error: Exception) -> bool:
@@ -320,14 +573,7 @@ class ErrorHandler:
         try:
             logger.info("尝试处理网络错误...")
             
-            # 检查网络连接
-            try:
-                page.evaluate("navigator.onLine")
-            except:
-                logger.error("网络连接异常")
-                return False
-            
-            # 尝试刷新页面
+            # 直接尝试刷新页面，网络不通时刷新本身会很快失败，无需先在页面中探测连接状态
             try:
                 page.reload(timeout=10000)
                 logger.info("页面刷新成功")
@@ -337,7 +583,7 @@ class ErrorHandler:
                 return False
             
         except Exception as e:
-            logger.error(f"处理网络错误失败: {e}")
+            logger.error("处理网络错误失败: %s", e)
             return False
     
     def _handle_element_not_found_error(self, page: Page, error: Exception) -> bool:
@@ -362,7 +608,7 @@ class ErrorHandler:
             return True
             
         except Exception as e:
-            logger.error(f"处理元素未找到错误失败: {e}")
+            logger.error("处理元素未找到错误失败: %s", e)
             return False
     
     def _handle_javascript_error(self, page: Page, error: Exception) -> bool:
@@ -370,17 +616,12 @@ class ErrorHandler:
         try:
             logger.info("尝试处理JavaScript错误...")
             
-            # 清除JavaScript错误
-            try:
-                page.evaluate("console.clear()")
-            except:
-                pass
-            
+            # 页面脚本错误无需在浏览器端清理，记录后交由调用方决定是否重试
             logger.info("JavaScript错误处理完成")
             return True
             
         except Exception as e:
-            logger.error(f"处理JavaScript错误失败: {e}")
+            logger.error("处理JavaScript错误失败: %s", e)
             return False
     
     def _handle_navigation_error(self, page: Page, error: Exception) -> bool:
@@ -394,11 +635,11 @@ class ErrorHandler:
                 logger.error("页面导航失败，当前为空白页")
                 return False
             
-            logger.info(f"导航错误处理完成，当前URL: {current_url}")
+            logger.info("导航错误处理完成，当前URL: %s", current_url)
             return True
             
         except Exception as e:
-            logger.error(f"处理导航错误失败: {e}")
+            logger.error("处理导航错误失败: %s", e)
             return False
     
     def _handle_unknown_error(self, page: Page, error: Exception) -> bool:
@@ -406,8 +647,9 @@ class ErrorHandler:
         try:
             logger.info("尝试处理未知错误...")
             
-            # 记录详细错误信息
-            logger.error(f"未知错误详情: {traceback.format_exc()}")
+            # 记录详细错误信息；格式化调用栈开销较大，仅在调试级别启用时进行
+            if logger.is_enabled_for(logging.DEBUG):
+                logger.debug("未知错误详情: %s", traceback.format_exc())
             
             # 检查页面基本状态
             if page.is_closed():
@@ -418,7 +660,7 @@ class ErrorHandler:
             return True
             
         except Exception as e:
-            logger.error(f"处理未知错误失败: {e}")
+            logger.error("处理未知错误失败: %s", e)
             return False
     
     def get_error_statistics(self) -> dict:
@@ -428,25 +670,28 @@ class ErrorHandler:
         Returns:
             错误统计字典
         """
-        total_errors = sum(self._error_statistics.values())
-        
-        statistics = {
-            'total_errors': total_errors,
-            'by_type': dict(self._error_statistics),
-            'percentages': {}
-        }
+        # 先取快照，合计与百分比基于同一份数据，不受并发分类影响
+        snapshot = dict(self._error_statistics)
+        total_errors = sum(snapshot.values())
         
         if total_errors > 0:
-            for error_type, count in self._error_statistics.items():
-                percentage = (count / total_errors) * 100
-                statistics['percentages'][error_type.value] = round(percentage, 2)
+            percentages = {
+                error_type.value: round((count / total_errors) * 100, 2)
+                for error_type, count in snapshot.items()
+            }
+        else:
+            percentages = {}
         
-        return statistics
+        return {
+            'total_errors': total_errors,
+            'by_type': snapshot,
+            'percentages': percentages
+        }
     
     def reset_statistics(self) -> None:
         """重置错误统计"""
-        for error_type in self._error_statistics:
-            self._error_statistics[error_type] = 0
+        # 整体替换计数器，不在其他线程可能写入时遍历修改原字典
+        self._error_statistics = Counter(self._zero_stats)
         logger.info("错误统计已重置")
     
     def create_circuit_breaker(self,
@@ -461,61 +706,29 @@ class ErrorHandler:
             timeout: 超时时间（秒）
             expected_exception: 预期异常类型
         """
-        class CircuitBreaker:
-            def __init__(self):
-                self.failure_count = 0
-                self.last_failure_time = None
-                self.state = 'CLOSED'  # CLOSED, OPEN, HALF_OPEN
-            
-            def __call__(self, func):
-                @functools.wraps(func)
-                def wrapper(*args, **kwargs):
-                    if self.state == 'OPEN':
-                        if time.time() - self.last_failure_time < timeout:
-                            raise Exception(f"断路器处于开启状态，拒绝执行 {func.__name__}")
-                        else:
-                            self.state = 'HALF_OPEN'
-                    
-                    try:
-                        result = func(*args, **kwargs)
-                        self.on_success()
-                        return result
-                    
-                    except expected_exception as e:
-                        self.on_failure()
-                        raise e
-                
-                return wrapper
-            
-            def on_success(self):
-                self.failure_count = 0
-                self.state = 'CLOSED'
-                logger.info("断路器重置为关闭状态")
-            
-            def on_failure(self):
-                self.failure_count += 1
-                self.last_failure_time = time.time()
-                
-                if self.failure_count >= failure_threshold:
-                    self.state = 'OPEN'
-                    logger.warning(f"断路器开启，失败次数: {self.failure_count}")
-        
-        return CircuitBreaker()
+        return CircuitBreaker(failure_threshold, timeout, expected_exception)
 
 
 # 全局错误处理器实例
 error_handler = ErrorHandler()
 
 
+def shutdown() -> None:
+    """程序退出时调用，立即结束全局错误处理器中所有等待中的重试"""
+    error_handler.cancel()
+
+
 # 便捷装饰器
 def retry(max_retries: int = 3, 
          strategy: RetryStrategy = RetryStrategy.EXPONENTIAL,
-         base_delay: float = 1.0):
+         base_delay: float = 1.0,
+         jitter: float = DEFAULT_RETRY_JITTER):
     """简化的重试装饰器"""
     return error_handler.retry_on_error(
         max_retries=max_retries,
         strategy=strategy,
-        base_delay=base_delay
+        base_delay=base_delay,
+        jitter=jitter
     )
 
 
@@ -545,84 +758,79 @@ class LoginTimeoutError(LoginError):
     pass
 
 
-def login_retry(max_retries: int = 2, base_delay: float = 3.0):
+# 明确不可重试的异常类型，is_retryable / classify_error 据此跳过错误信息匹配
+_NON_RETRYABLE = (CredentialsError, KeyboardInterrupt, SystemExit, asyncio.CancelledError)
+
+
+def login_retry(max_retries: int = 2, base_delay: float = 3.0, jitter: float = DEFAULT_RETRY_JITTER):
     """登录专用重试装饰器，针对登录失败进行优化"""
     def decorator(func: Callable) -> Callable:
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
             last_exception = None
             
-            for attempt in range(max_retries + 1):
+            # 线性增长延迟
+            for attempt in error_handler._retry_iter(max_retries, RetryStrategy.LINEAR,
+                                                     base_delay, None, jitter):
                 try:
                     result = func(*args, **kwargs)
                     if attempt > 0:
-                        logger.info(f"登录重试成功，尝试次数: {attempt + 1}")
+                        logger.info("登录重试成功，尝试次数: %d", attempt + 1)
                     return result
                     
                 except (CaptchaError, FormNotFoundError, LoginTimeoutError) as e:
                     last_exception = e
                     if attempt < max_retries:
-                        delay = base_delay * (attempt + 1)  # 线性增长延迟
-                        logger.warning(f"登录失败 ({e.__class__.__name__}): {e}，{delay}秒后重试...")
-                        time.sleep(delay)
-                        continue
+                        logger.warning("登录失败 (%s): %s，准备重试...", e.__class__.__name__, e)
                     else:
-                        logger.error(f"登录失败，已达最大重试次数: {e}")
-                        break
+                        logger.error("登录失败，已达最大重试次数: %s", e)
                         
                 except CredentialsError as e:
                     # 凭据错误不重试
-                    logger.error(f"登录凭据错误，不进行重试: {e}")
+                    logger.error("登录凭据错误，不进行重试: %s", e)
                     raise
                     
                 except Exception as e:
                     last_exception = e
                     if attempt < max_retries:
-                        delay = base_delay * (attempt + 1)
-                        logger.error(f"登录过程出现异常: {e}，{delay}秒后重试...")
-                        time.sleep(delay)
-                        continue
+                        logger.error("登录过程出现异常: %s，准备重试...", e)
                     else:
-                        logger.error(f"登录异常，已达最大重试次数: {e}")
-                        break
+                        logger.error("登录异常，已达最大重试次数: %s", e)
             
             raise last_exception
         return wrapper
     return decorator
 
 
-def captcha_retry(max_retries: int = 3, base_delay: float = 1.0):
+def captcha_retry(max_retries: int = 3, base_delay: float = 1.0, jitter: float = DEFAULT_RETRY_JITTER):
     """验证码识别专用重试装饰器"""
     def decorator(func: Callable) -> Callable:
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
             last_exception = None
             
-            for attempt in range(max_retries + 1):
+            for attempt in error_handler._retry_iter(max_retries, RetryStrategy.FIXED,
+                                                     base_delay, None, jitter):
                 try:
                     result = func(*args, **kwargs)
                     if result:  # 识别成功
                         if attempt > 0:
-                            logger.info(f"验证码识别重试成功，尝试次数: {attempt + 1}")
+                            logger.info("验证码识别重试成功，尝试次数: %d", attempt + 1)
                         return result
-                    else:  # 识别失败但无异常
-                        if attempt < max_retries:
-                            logger.warning(f"验证码识别失败，第 {attempt + 1} 次尝试")
-                            time.sleep(base_delay)
-                            continue
-                        else:
-                            logger.error("验证码识别失败，已达最大尝试次数")
-                            return None
+                    
+                    # 识别失败但无异常
+                    last_exception = None
+                    if attempt < max_retries:
+                        logger.warning("验证码识别失败，第 %d 次尝试", attempt + 1)
+                    else:
+                        logger.error("验证码识别失败，已达最大尝试次数")
                             
                 except Exception as e:
                     last_exception = e
                     if attempt < max_retries:
-                        logger.warning(f"验证码识别异常: {e}，进行第 {attempt + 2} 次尝试")
-                        time.sleep(base_delay)
-                        continue
+                        logger.warning("验证码识别异常: %s，进行第 %d 次尝试", e, attempt + 2)
                     else:
-                        logger.error(f"验证码识别异常，已达最大重试次数: {e}")
-                        break
+                        logger.error("验证码识别异常，已达最大重试次数: %s", e)
             
             if last_exception:
                 raise last_exception
@@ -793,16 +793,16 @@ class AutoStudyApp:
             logger.info(f"成功提取 {len(courses)} 门课程")
             
             # 将提取的课程数据保存到课程管理器
-            self.course_manager._load_courses_cache()
+            courses_cache = self.course_manager.courses_cache
             for course in courses:
                 # 如果缓存中已存在，保留原有的优先级和访问时间等信息
-                if course.id in self.course_manager._courses_cache:
-                    cached_course = self.course_manager._courses_cache[course.id]
+                cached_course = courses_cache.get(course.id)
+                if cached_course is not None:
                     course.priority = cached_course.priority
                     course.last_accessed = cached_course.last_accessed
                     course.created_time = cached_course.created_time
                 
-                self.course_manager._courses_cache[course.id] = course
+                courses_cache[course.id] = course
             
             # 保存更新后的课程缓存
             success = self.course_manager.save_courses_cache()
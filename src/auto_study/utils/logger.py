@@ -57,25 +57,37 @@ class Logger:
         )
         self.logger.addHandler(console_handler)
     
-    def info(self, message: str, **kwargs) -> None:
+    def is_enabled_for(self, level: int) -> bool:
+        """
+        检查日志级别是否启用，用于在热点路径跳过日志参数的计算
+        
+        Args:
+            level: 日志级别，如logging.INFO
+            
+        Returns:
+            是否会输出该级别的日志
+        """
+        return self.logger.isEnabledFor(level)
+    
+    def info(self, message: str, *args, **kwargs) -> None:
         """信息日志"""
-        self.logger.info(message, **kwargs)
+        self.logger.info(message, *args, **kwargs)
     
-    def warning(self, message: str, **kwargs) -> None:
+    def warning(self, message: str, *args, **kwargs) -> None:
         """警告日志"""
-        self.logger.warning(message, **kwargs)
+        self.logger.warning(message, *args, **kwargs)
     
-    def error(self, message: str, **kwargs) -> None:
+    def error(self, message: str, *args, **kwargs) -> None:
         """错误日志"""
-        self.logger.error(message, **kwargs)
+        self.logger.error(message, *args, **kwargs)
     
-    def debug(self, message: str, **kwargs) -> None:
+    def debug(self, message: str, *args, **kwargs) -> None:
         """调试日志"""
-        self.logger.debug(message, **kwargs)
+        self.logger.debug(message, *args, **kwargs)
     
-    def critical(self, message: str, **kwargs) -> None:
+    def critical(self, message: str, *args, **kwargs) -> None:
         """严重错误日志"""
-        self.logger.critical(message, **kwargs)
+        self.logger.critical(message, *args, **kwargs)
     
     def log_course_start(self, course_title: str) -> None:
         """记录课程开始学习"""
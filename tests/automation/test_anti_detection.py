@@ -135,7 +135,8 @@ class TestAntiDetection:
         assert 0.08 <= elapsed <= 0.25
     
     @pytest.mark.integration
-    def test_setup_anti_detection_with_real_browser(self):
+    @pytest.mark.asyncio
+    async def test_setup_anti_detection_with_real_browser(self):
         """测试与真实浏览器的反检测设置集成"""
         from src.auto_study.config.config_manager import ConfigManager
         
@@ -150,24 +151,26 @@ class TestAntiDetection:
         browser_manager = BrowserManager(config_manager)
         anti_detection = AntiDetection()
         
-        with browser_manager.launch_browser(BrowserType.CHROMIUM):
-            with browser_manager.create_context() as context:
-                # 设置反检测
-                anti_detection.setup_anti_detection_context(context)
-                
-                page = browser_manager.create_page()
-                anti_detection.setup_anti_detection_page(page)
-                
-                # 导航到测试页面
-                page.goto('data:text/html,<h1>Test</h1>')
-                
-                # 检查webdriver属性是否被隐藏
-                webdriver_value = page.evaluate('navigator.webdriver')
-                assert webdriver_value is None or webdriver_value is False
-                
-                # 检查plugins是否被设置
-                plugins_length = page.evaluate('navigator.plugins.length')
-                assert plugins_length > 0
+        async with browser_manager.launch_browser(BrowserType.CHROMIUM):
+            # 设置反检测
+            fingerprint = anti_detection.generate_realistic_fingerprint()
+            await browser_manager._async_context.add_init_script(
+                anti_detection._get_stealth_script(fingerprint)
+            )
+            
+            page = await browser_manager.create_async_page()
+            await page.add_init_script(anti_detection._get_fingerprint_script(fingerprint))
+            
+            # 导航到测试页面
+            await page.goto('data:text/html,<h1>Test</h1>')
+            
+            # 检查webdriver属性是否被隐藏
+            webdriver_value = await page.evaluate('navigator.webdriver')
+            assert webdriver_value is None or webdriver_value is False
+            
+            # 检查plugins是否被设置
+            plugins_length = await page.evaluate('navigator.plugins.length')
+            assert plugins_length > 0
     
     def test_simulate_human_typing_mock(self, anti_detection):
         """测试模拟人类打字（Mock版本）"""
@@ -2,11 +2,14 @@
 测试浏览器管理器
 """
 
+import asyncio
 import pytest
 import tempfile
 import time
 from pathlib import Path
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, create_autospec, patch
+
+from playwright.async_api import Page as AsyncPage
 
 from src.auto_study.automation.browser_manager import BrowserManager, BrowserType
 from src.auto_study.config.config_manager import ConfigManager
@@ -52,9 +55,9 @@ class TestBrowserManager:
         """测试浏览器管理器初始化"""
         assert browser_manager.config_manager is not None
         assert browser_manager.config is not None
-        assert browser_manager._browser is None
-        assert browser_manager._context is None
-        assert browser_manager._pages == []
+        assert browser_manager._async_browser is None
+        assert browser_manager._async_context is None
+        assert len(browser_manager._async_pages) == 0
         
         # 检查数据目录创建
         expected_browser_dir = Path(temp_data_dir) / 'browser_data'
@@ -69,6 +72,9 @@ class TestBrowserManager:
         assert 'args' in options
         assert '--no-sandbox' in options['args']
         assert '--disable-blink-features=AutomationControlled' in options['args']
+        assert options['handle_sigint'] is False
+        # launch()不接受user_agent，用户代理通过上下文选项设置
+        assert 'user_agent' not in options
     
     def test_get_browser_launch_options_firefox(self, browser_manager):
         """测试获取Firefox启动选项"""
@@ -89,119 +95,214 @@ class TestBrowserManager:
         assert options['locale'] == 'zh-CN'
         assert options['timezone_id'] == 'Asia/Shanghai'
     
-    def test_browser_launch_context_manager(self, browser_manager):
+    def test_reload_config(self, browser_manager, mock_config_manager):
+        """测试重新加载配置后派生属性同步更新"""
+        assert browser_manager._timeout == 15000
+
+        config = mock_config_manager.get_config.return_value
+        config['browser']['timeout'] = 5000
+        config['browser']['width'] = 800
+        browser_manager.reload_config()
+
+        assert browser_manager._timeout == 5000
+        assert browser_manager._get_context_options()['viewport']['width'] == 800
+
+    @pytest.mark.asyncio
+    async def test_resource_blocking(self, mock_config_manager):
+        """测试资源拦截配置"""
+        context = AsyncMock()
+
+        # 默认不拦截
+        await BrowserManager(mock_config_manager)._setup_resource_blocking(context)
+        context.route.assert_not_called()
+
+        config = mock_config_manager.get_config.return_value
+        config['anti_detection']['block_resources'] = ['font']
+        await BrowserManager(mock_config_manager)._setup_resource_blocking(context)
+        context.route.assert_called_once()
+
+        handler = context.route.call_args[0][1]
+        font_route = AsyncMock()
+        font_route.request.resource_type = 'font'
+        await handler(font_route)
+        font_route.abort.assert_called_once()
+
+        media_route = AsyncMock()
+        media_route.request.resource_type = 'media'
+        await handler(media_route)
+        media_route.continue_.assert_called_once()
+        media_route.abort.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_start_browser_persistent(self, mock_config_manager, temp_data_dir):
+        """测试持久化用户目录启动"""
+        config = mock_config_manager.get_config.return_value
+        config['browser']['persistent'] = True
+        browser_manager = BrowserManager(mock_config_manager)
+
+        initial_page = Mock()
+        context = AsyncMock()
+        context.pages = [initial_page]
+        playwright = AsyncMock()
+        playwright.chromium.launch_persistent_context = AsyncMock(return_value=context)
+
+        with patch('src.auto_study.automation.browser_manager.async_playwright') as mock_playwright:
+            mock_playwright.return_value.start = AsyncMock(return_value=playwright)
+            await browser_manager.start_browser()
+
+        playwright.chromium.launch.assert_not_called()
+        user_data_dir = playwright.chromium.launch_persistent_context.call_args[0][0]
+        assert user_data_dir == str(Path(temp_data_dir) / 'browser_data')
+        assert browser_manager._async_context is context
+        assert initial_page in browser_manager._async_pages
+
+        await browser_manager.close()
+        playwright.stop.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_browser_launch_context_manager(self, browser_manager):
         """测试浏览器启动上下文管理器"""
-        with browser_manager.launch_browser(BrowserType.CHROMIUM) as browser:
+        async with browser_manager.launch_browser(BrowserType.CHROMIUM) as browser:
             assert browser is not None
-            assert browser_manager._browser is browser
+            assert browser_manager._async_browser is browser
+            assert browser_manager._async_context is not None
             assert browser.is_connected()
         
         # 退出上下文管理器后应该清理资源
-        assert browser_manager._browser is None
-        assert browser_manager._playwright is None
-    
-    def test_create_context_manager(self, browser_manager):
-        """测试创建浏览器上下文"""
-        with browser_manager.launch_browser(BrowserType.CHROMIUM):
-            with browser_manager.create_context() as context:
-                assert context is not None
-                assert browser_manager._context is context
-                
-                # 检查上下文配置
-                viewport = context.pages[0].viewport_size if context.pages else None
-                if viewport:
-                    assert viewport['width'] == 1280
-                    assert viewport['height'] == 720
-        
-        # 检查资源清理
-        assert browser_manager._context is None
+        assert browser_manager._async_browser is None
+        assert browser_manager._async_context is None
+        assert browser_manager._async_playwright is None
     
-    def test_create_and_manage_pages(self, browser_manager):
+    @pytest.mark.asyncio
+    async def test_create_and_manage_pages(self, browser_manager):
         """测试页面创建和管理"""
-        with browser_manager.launch_browser(BrowserType.CHROMIUM):
-            with browser_manager.create_context():
-                # 创建页面
-                page1 = browser_manager.create_page()
-                assert page1 is not None
-                assert len(browser_manager._pages) == 1
-                
-                page2 = browser_manager.create_page()
-                assert page2 is not None
-                assert len(browser_manager._pages) == 2
-                
-                # 获取活动页面
-                active_pages = browser_manager.get_active_pages()
-                assert len(active_pages) == 2
-                assert page1 in active_pages
-                assert page2 in active_pages
-                
-                # 关闭页面
-                browser_manager.close_page(page1)
-                assert len(browser_manager._pages) == 1
-                assert page1 not in browser_manager._pages
+        async with browser_manager.launch_browser(BrowserType.CHROMIUM):
+            # 创建页面
+            page1 = await browser_manager.create_async_page()
+            assert page1 is not None
+            assert len(browser_manager._async_pages) == 1
+            
+            page2 = await browser_manager.create_async_page()
+            assert page2 is not None
+            assert len(browser_manager._async_pages) == 2
+            
+            # 获取活动页面
+            active_pages = browser_manager.get_active_pages()
+            assert len(active_pages) == 2
+            assert page1 in active_pages
+            assert page2 in active_pages
+            
+            # 关闭页面
+            await browser_manager.close_page(page1)
+            assert len(browser_manager._async_pages) == 1
+            assert page1 not in browser_manager._async_pages
     
-    def test_screenshot_page(self, browser_manager, temp_data_dir):
+    @pytest.mark.asyncio
+    async def test_screenshot_page(self, browser_manager, temp_data_dir):
         """测试页面截图功能"""
-        with browser_manager.launch_browser(BrowserType.CHROMIUM):
-            with browser_manager.create_context():
-                page = browser_manager.create_page()
-                
-                # 导航到一个简单页面
-                page.goto('data:text/html,<h1>Test Page</h1>')
-                
-                # 截图到内存
-                screenshot_data = browser_manager.screenshot_page(page)
-                assert isinstance(screenshot_data, bytes)
-                assert len(screenshot_data) > 0
-                
-                # 截图到文件
-                screenshot_path = Path(temp_data_dir) / 'test_screenshot.png'
-                browser_manager.screenshot_page(page, path=screenshot_path)
-                assert screenshot_path.exists()
-                assert screenshot_path.stat().st_size > 0
+        async with browser_manager.launch_browser(BrowserType.CHROMIUM):
+            page = await browser_manager.create_async_page()
+            
+            # 导航到一个简单页面
+            await page.goto('data:text/html,<h1>Test Page</h1>')
+            
+            # 截图到内存
+            screenshot_data = await browser_manager.screenshot_page(page)
+            assert isinstance(screenshot_data, bytes)
+            assert len(screenshot_data) > 0
+            
+            # 截图到文件
+            screenshot_path = Path(temp_data_dir) / 'test_screenshot.png'
+            await browser_manager.screenshot_page(page, path=screenshot_path)
+            assert screenshot_path.exists()
+            assert screenshot_path.stat().st_size > 0
     
-    def test_save_page_content_html(self, browser_manager, temp_data_dir):
+    def test_resolve_screenshot_type(self):
+        """测试截图格式推断"""
+        assert BrowserManager._resolve_screenshot_type() == 'jpeg'
+        assert BrowserManager._resolve_screenshot_type('shot.png') == 'png'
+        assert BrowserManager._resolve_screenshot_type('shot.jpg') == 'jpeg'
+        assert BrowserManager._resolve_screenshot_type(type='jpg') == 'jpeg'
+        assert BrowserManager._resolve_screenshot_type('shot.jpg', type='png') == 'png'
+        assert BrowserManager._resolve_screenshot_type('shot.jpg', lossless=True) == 'png'
+
+    @pytest.mark.asyncio
+    async def test_save_page_content_html(self, browser_manager, temp_data_dir):
         """测试保存HTML页面内容"""
-        with browser_manager.launch_browser(BrowserType.CHROMIUM):
-            with browser_manager.create_context():
-                page = browser_manager.create_page()
-                
-                # 导航到测试页面
-                test_html = '<html><head><title>Test</title></head><body><h1>Test Content</h1></body></html>'
-                page.goto(f'data:text/html,{test_html}')
-                
-                # 保存HTML内容
-                html_path = Path(temp_data_dir) / 'test_page.html'
-                browser_manager.save_page_content(page, html_path, save_type='html')
-                
-                assert html_path.exists()
-                content = html_path.read_text(encoding='utf-8')
-                assert 'Test Content' in content
+        async with browser_manager.launch_browser(BrowserType.CHROMIUM):
+            page = await browser_manager.create_async_page()
+            
+            # 导航到测试页面
+            test_html = '<html><head><title>Test</title></head><body><h1>Test Content</h1></body></html>'
+            await page.goto(f'data:text/html,{test_html}')
+            
+            # 保存HTML内容
+            html_path = Path(temp_data_dir) / 'test_page.html'
+            await browser_manager.save_page_content(page, html_path, save_type='html')
+            
+            assert html_path.exists()
+            content = html_path.read_text(encoding='utf-8')
+            assert 'Test Content' in content
     
-    def test_wait_for_network_idle(self, browser_manager):
+    @pytest.mark.asyncio
+    async def test_wait_for_network_idle(self, browser_manager):
         """测试网络空闲等待"""
-        with browser_manager.launch_browser(BrowserType.CHROMIUM):
-            with browser_manager.create_context():
-                page = browser_manager.create_page()
-                
-                # 导航到简单页面
-                page.goto('data:text/html,<h1>Test Page</h1>')
-                
-                # 等待网络空闲（应该很快完成）
-                start_time = time.time()
-                browser_manager.wait_for_network_idle(page, timeout=5000)
-                end_time = time.time()
-                
-                # 应该在5秒内完成
-                assert end_time - start_time < 5
+        async with browser_manager.launch_browser(BrowserType.CHROMIUM):
+            page = await browser_manager.create_async_page()
+            
+            # 导航到简单页面
+            await page.goto('data:text/html,<h1>Test Page</h1>')
+            
+            # 等待网络空闲（应该很快完成）
+            start_time = time.time()
+            await browser_manager.wait_for_network_idle(page, timeout=5000)
+            end_time = time.time()
+            
+            # 应该在5秒内完成
+            assert end_time - start_time < 5
     
-    def test_get_browser_info(self, browser_manager):
+    @pytest.mark.asyncio
+    async def test_capture_page(self, browser_manager, temp_data_dir):
+        """测试同时保存截图和HTML"""
+        page = AsyncMock()
+        page.content.return_value = '<html><body>快照内容</body></html>'
+
+        screenshot_path = Path(temp_data_dir) / 'captures' / 'page.jpg'
+        html_path = Path(temp_data_dir) / 'captures' / 'page.html'
+        await browser_manager.capture_page(page, screenshot_path=screenshot_path, html_path=html_path)
+
+        options = page.screenshot.call_args.kwargs
+        assert options['path'] == str(screenshot_path)
+        assert options['type'] == 'jpeg'
+        assert html_path.read_text(encoding='utf-8') == '<html><body>快照内容</body></html>'
+
+    @pytest.mark.asyncio
+    async def test_wait_for(self, browser_manager):
+        """测试按条件等待页面就绪"""
+        page = create_autospec(AsyncPage, instance=True)
+
+        assert await browser_manager.wait_for(page, selector='#main', response_url=r'/api/courses')
+        page.wait_for_load_state.assert_called_once_with('domcontentloaded', timeout=30000)
+        page.wait_for_selector.assert_called_once_with('#main', timeout=30000)
+        page.wait_for_event.assert_called_once()
+        assert page.wait_for_event.call_args.args == ('response',)
+        assert page.wait_for_event.call_args.kwargs['timeout'] == 30000
+
+        predicate = page.wait_for_event.call_args.kwargs['predicate']
+        assert predicate(Mock(url='https://example.com/api/courses?page=1'))
+        assert not predicate(Mock(url='https://example.com/static/app.js'))
+
+        page.wait_for_selector.side_effect = TimeoutError("timeout")
+        assert await browser_manager.wait_for(page, selector='#missing', timeout=100) is False
+
+    @pytest.mark.asyncio
+    async def test_get_browser_info(self, browser_manager):
         """测试获取浏览器信息"""
         # 浏览器未启动时
         info = browser_manager.get_browser_info()
         assert info == {}
         
-        with browser_manager.launch_browser(BrowserType.CHROMIUM):
+        async with browser_manager.launch_browser(BrowserType.CHROMIUM):
             info = browser_manager.get_browser_info()
             
             assert 'version' in info
@@ -212,37 +313,205 @@ class TestBrowserManager:
             assert info['connected'] is True
             assert info['pages_count'] == 0
     
-    def test_cleanup_on_exit(self, browser_manager):
+    @pytest.mark.asyncio
+    async def test_cleanup_on_exit(self, browser_manager):
         """测试退出时的资源清理"""
         # 使用上下文管理器
-        with browser_manager:
+        async with browser_manager:
             pass
         
         # 检查资源已清理
-        assert browser_manager._playwright is None
-        assert browser_manager._browser is None
-        assert browser_manager._context is None
-        assert browser_manager._pages == []
-    
-    def test_error_handling_without_browser(self, browser_manager):
-        """测试在浏览器未启动时的错误处理"""
-        # 尝试创建上下文应该失败
-        with pytest.raises(RuntimeError, match="浏览器未启动"):
-            with browser_manager.create_context():
-                pass
+        assert browser_manager._async_playwright is None
+        assert browser_manager._async_browser is None
+        assert browser_manager._async_context is None
+        assert len(browser_manager._async_pages) == 0
     
-    def test_error_handling_without_context(self, browser_manager):
+    @pytest.mark.asyncio
+    async def test_playwright_driver_shared(self, mock_config_manager):
+        """测试多个管理器共享同一个Playwright驱动"""
+        playwright = AsyncMock()
+        managers = [BrowserManager(mock_config_manager) for _ in range(2)]
+
+        with patch('src.auto_study.automation.browser_manager.async_playwright') as mock_playwright:
+            mock_playwright.return_value.start = AsyncMock(return_value=playwright)
+            for manager in managers:
+                await manager.start_browser()
+
+            mock_playwright.return_value.start.assert_called_once()
+            assert managers[0]._async_playwright is managers[1]._async_playwright
+
+            await managers[0].close()
+            playwright.stop.assert_not_called()
+
+            await managers[1].close()
+            playwright.stop.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_restart_releases_previous_browser(self, browser_manager):
+        """测试重复启动时先释放上一次的浏览器和驱动引用"""
+        from src.auto_study.automation import browser_manager as browser_manager_module
+
+        playwright = AsyncMock()
+        first_browser = AsyncMock()
+        second_browser = AsyncMock()
+        playwright.chromium.launch = AsyncMock(side_effect=[first_browser, second_browser])
+
+        with patch('src.auto_study.automation.browser_manager.async_playwright') as mock_playwright:
+            mock_playwright.return_value.start = AsyncMock(return_value=playwright)
+            await browser_manager.start_browser()
+            await browser_manager.start_browser()
+
+            first_browser.close.assert_called_once()
+            assert browser_manager._async_browser is second_browser
+            assert browser_manager_module._pw_refcount == 1
+
+            await browser_manager.close()
+            assert browser_manager_module._pw_refcount == 0
+            assert playwright.stop.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_page_creation_is_bounded(self, mock_config_manager):
+        """测试页面数达到上限时新页面等待已有页面关闭"""
+        config = mock_config_manager.get_config.return_value
+        config['performance'] = {'max_concurrent_tabs': 1}
+        browser_manager = BrowserManager(mock_config_manager)
+
+        close_handlers = []
+
+        def make_page():
+            page = Mock()
+            page.once = lambda event, handler: close_handlers.append(handler)
+            return page
+
+        browser_manager._async_context = AsyncMock()
+        browser_manager._async_context.new_page = AsyncMock(side_effect=lambda: make_page())
+
+        first_page = await browser_manager.create_async_page()
+        pending = asyncio.ensure_future(browser_manager.create_async_page())
+        await asyncio.sleep(0.01)
+        assert not pending.done()
+
+        # 第一个页面关闭后名额被释放
+        close_handlers[0](first_page)
+        second_page = await asyncio.wait_for(pending, timeout=1)
+        assert second_page is not first_page
+
+    @pytest.mark.asyncio
+    async def test_page_creation_times_out(self, mock_config_manager):
+        """测试页面名额一直不释放时创建页面超时报错"""
+        config = mock_config_manager.get_config.return_value
+        config['performance'] = {'max_concurrent_tabs': 1, 'page_acquire_timeout': 0.05}
+        browser_manager = BrowserManager(mock_config_manager)
+        browser_manager._async_context = AsyncMock()
+        browser_manager._async_context.new_page = AsyncMock(side_effect=lambda: Mock())
+
+        await browser_manager.create_async_page()
+        with pytest.raises(RuntimeError, match="页面数已达上限"):
+            await browser_manager.create_async_page()
+
+    def test_page_semaphore_created_per_event_loop(self, mock_config_manager):
+        """测试在事件循环外构造的管理器在各个事件循环中都能等待并获得页面名额"""
+        config = mock_config_manager.get_config.return_value
+        config['performance'] = {'max_concurrent_tabs': 1, 'page_acquire_timeout': 1}
+        browser_manager = BrowserManager(mock_config_manager)
+        close_handlers = {}
+
+        def make_page():
+            page = Mock()
+            page.once = lambda event, handler: close_handlers.setdefault(page, []).append(handler)
+            return page
+
+        browser_manager._async_context = AsyncMock()
+        browser_manager._async_context.new_page = AsyncMock(side_effect=lambda: make_page())
+
+        async def open_two_pages():
+            first = await browser_manager.create_async_page()
+            waiter = asyncio.ensure_future(browser_manager.create_async_page())
+            await asyncio.sleep(0)
+            assert not waiter.done()
+
+            # 第一个页面关闭后归还名额，等待中的调用方拿到名额
+            for handler in close_handlers[first]:
+                handler(first)
+            await waiter
+            return browser_manager._page_semaphore
+
+        first_semaphore = asyncio.run(open_two_pages())
+        second_semaphore = asyncio.run(open_two_pages())
+        assert first_semaphore is not second_semaphore
+
+    @pytest.mark.asyncio
+    async def test_get_page_returns_first_open_page(self, browser_manager):
+        """测试get_page返回最早创建且未关闭的页面，关闭的页面自动移除"""
+        close_handlers = {}
+
+        def make_page():
+            page = Mock()
+            page.is_closed.return_value = False
+            page.once = lambda event, handler: close_handlers.setdefault(page, []).append(handler)
+            return page
+
+        browser_manager._async_context = AsyncMock()
+        browser_manager._async_context.new_page = AsyncMock(side_effect=lambda: make_page())
+
+        pages = [await browser_manager.create_async_page() for _ in range(3)]
+        for _ in range(5):
+            assert await browser_manager.get_page() is pages[0]
+
+        # 主页面关闭后，关闭事件将其移出跟踪列表
+        pages[0].is_closed.return_value = True
+        for handler in close_handlers[pages[0]]:
+            handler(pages[0])
+        assert pages[0] not in browser_manager._async_pages
+        assert await browser_manager.get_page() is pages[1]
+
+    @pytest.mark.asyncio
+    async def test_close_is_idempotent(self, browser_manager):
+        """测试重复关闭不会重复释放资源"""
+        browser = AsyncMock()
+        browser_manager._async_browser = browser
+
+        await browser_manager.close()
+        await browser_manager.close()
+
+        browser.close.assert_called_once()
+        assert browser_manager._closed is True
+
+    @pytest.mark.asyncio
+    async def test_cleanup_continues_after_failure(self, browser_manager):
+        """测试部分关闭失败时其余资源仍被释放"""
+        page = AsyncMock()
+        page.is_closed = Mock(return_value=False)
+        page.close.side_effect = RuntimeError("page crashed")
+        context = AsyncMock()
+        context.close.side_effect = RuntimeError("context gone")
+        browser = AsyncMock()
+
+        browser_manager._async_pages[page] = None
+        browser_manager._async_context = context
+        browser_manager._async_browser = browser
+
+        await browser_manager.close()
+
+        page.close.assert_called_once()
+        browser.close.assert_called_once()
+        assert browser_manager._async_context is None
+        assert browser_manager._async_browser is None
+
+    @pytest.mark.asyncio
+    async def test_error_handling_without_context(self, browser_manager):
         """测试在上下文未创建时的错误处理"""
-        with browser_manager.launch_browser(BrowserType.CHROMIUM):
-            # 尝试创建页面应该失败
-            with pytest.raises(RuntimeError, match="浏览器上下文未创建"):
-                browser_manager.create_page()
+        with pytest.raises(RuntimeError, match="浏览器上下文未创建"):
+            await browser_manager.create_async_page()
     
-    def test_invalid_browser_type(self, browser_manager):
+    @pytest.mark.asyncio
+    async def test_invalid_browser_type(self, browser_manager):
         """测试不支持的浏览器类型"""
-        with pytest.raises(ValueError, match="不支持的浏览器类型"):
-            with browser_manager.launch_browser("invalid_browser"):
-                pass
+        with patch('src.auto_study.automation.browser_manager.async_playwright') as mock_playwright:
+            mock_playwright.return_value.start = AsyncMock(return_value=AsyncMock())
+            with pytest.raises(ValueError, match="不支持的浏览器类型"):
+                async with browser_manager.launch_browser("invalid_browser"):
+                    pass
     
     def test_browser_with_proxy_config(self, mock_config_manager, temp_data_dir):
         """测试带代理配置的浏览器"""
@@ -259,26 +528,26 @@ class TestBrowserManager:
         
         assert any('--proxy-server=localhost:8080' in arg for arg in options.get('args', []))
     
-    def test_multiple_pages_management(self, browser_manager):
+    @pytest.mark.asyncio
+    async def test_multiple_pages_management(self, browser_manager):
         """测试多页面管理"""
-        with browser_manager.launch_browser(BrowserType.CHROMIUM):
-            with browser_manager.create_context():
-                # 创建多个页面
-                pages = []
-                for i in range(3):
-                    page = browser_manager.create_page()
-                    page.goto(f'data:text/html,<h1>Page {i}</h1>')
-                    pages.append(page)
-                
-                assert len(browser_manager._pages) == 3
-                
-                # 关闭中间的页面
-                browser_manager.close_page(pages[1])
-                assert len(browser_manager._pages) == 2
-                
-                # 获取活动页面应该返回剩余的页面
-                active_pages = browser_manager.get_active_pages()
-                assert len(active_pages) == 2
-                assert pages[0] in active_pages
-                assert pages[2] in active_pages
-                assert pages[1] not in active_pages
\ No newline at end of file
+        async with browser_manager.launch_browser(BrowserType.CHROMIUM):
+            # 创建多个页面
+            pages = []
+            for i in range(3):
+                page = await browser_manager.create_async_page()
+                await page.goto(f'data:text/html,<h1>Page {i}</h1>')
+                pages.append(page)
+            
+            assert len(browser_manager._async_pages) == 3
+            
+            # 关闭中间的页面
+            await browser_manager.close_page(pages[1])
+            assert len(browser_manager._async_pages) == 2
+            
+            # 获取活动页面应该返回剩余的页面
+            active_pages = browser_manager.get_active_pages()
+            assert len(active_pages) == 2
+            assert pages[0] in active_pages
+            assert pages[2] in active_pages
+            assert pages[1] not in active_pages
\ No newline at end of file
@@ -4,10 +4,11 @@
 
 import pytest
 import json
+import os
 import tempfile
 import time
 from pathlib import Path
-from unittest.mock import Mock
+from unittest.mock import AsyncMock, Mock, patch
 
 from src.auto_study.automation.context_manager import ContextManager
 from src.auto_study.config.config_manager import ConfigManager
@@ -62,10 +63,14 @@ class TestContextManager:
         # Mock页面
         mock_page = Mock()
         mock_page.url = 'https://example.com/test'
-        mock_page.evaluate.side_effect = [
-            {'key1': 'localStorage_value1', 'key2': 'localStorage_value2'},  # localStorage
-            {'session_key': 'sessionStorage_value'}  # sessionStorage
-        ]
+        storage_dump = {
+            'local': {'key1': 'localStorage_value1', 'key2': 'localStorage_value2'},
+            'session': {'session_key': 'sessionStorage_value'}
+        }
+        mock_page.evaluate.side_effect = lambda script, *args: (
+            'Mozilla/5.0 Test Agent' if script == 'navigator.userAgent' else storage_dump
+        )
+        mock_page.viewport_size = {'width': 1280, 'height': 720}
         context.pages = [mock_page]
         
         return context
@@ -95,39 +100,176 @@ class TestContextManager:
         
         assert result is True
         
-        # 检查文件是否创建
+        # 检查状态合并写入一个文件
         context_path = context_manager._context_dir / 'test_context'
         assert context_path.exists()
-        assert (context_path / 'cookies.json').exists()
-        assert (context_path / 'storage.json').exists()
-        assert (context_path / 'metadata.json').exists()
+        assert (context_path / 'context.bin').exists()
+        assert not (context_path / 'cookies.json').exists()
+        assert not (context_path / 'storage.json').exists()
+        assert not (context_path / 'metadata.json').exists()
+        
+        assert len(context_manager._read_cookies(context_path)) == 2
+        assert list(context_manager._read_storage(context_path)['storage']) == ['https://example.com/test']
     
-    def test_save_cookies(self, context_manager, mock_browser_context):
-        """测试保存Cookies"""
-        context_path = context_manager._context_dir / 'test_context'
-        context_path.mkdir(parents=True, exist_ok=True)
+    def test_save_context_state_replaces_legacy_files(self, context_manager, mock_browser_context):
+        """测试旧格式的分散文件可以加载，重新保存后被合并文件取代"""
+        import gzip
         
-        context_manager._save_cookies(mock_browser_context, context_path)
+        context_path = context_manager._context_dir / 'legacy'
+        context_path.mkdir(parents=True)
+        (context_path / 'cookies.json').write_text(json.dumps({
+            'timestamp': int(time.time()),
+            'cookies': mock_browser_context.cookies.return_value
+        }), encoding='utf-8')
+        (context_path / 'storage.json.gz').write_bytes(gzip.compress(json.dumps({
+            'timestamp': int(time.time()),
+            'storage': {'https://example.com/test': {'localStorage': {'key1': 'v'}, 'sessionStorage': {}}}
+        }).encode('utf-8')))
+        (context_path / 'metadata.json').write_text(json.dumps({
+            'timestamp': int(time.time()),
+            'user_agent': 'Mozilla/5.0 Test Agent'
+        }), encoding='utf-8')
         
-        cookies_file = context_path / 'cookies.json'
-        assert cookies_file.exists()
+        new_context = Mock()
+        assert context_manager.load_context_state(new_context, 'legacy') is True
+        assert len(new_context.add_cookies.call_args[0][0]) == 2
+        assert 'https://example.com/test' in new_context._stored_storage
+        assert context_manager.get_context_info('legacy')['user_agent'] == 'Mozilla/5.0 Test Agent'
         
-        with open(cookies_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        assert context_manager.save_context_state(mock_browser_context, 'legacy') is True
+        assert sorted(p.name for p in context_path.iterdir()) == ['context.bin']
+    
+    def test_state_file_compressed_when_large(self, context_manager):
+        """测试合并状态文件超过阈值时整体压缩"""
+        context_path = context_manager._context_dir / 'large'
+        storage = {'https://example.com/': {'localStorage': {'blob': 'x' * 64 * 1024}, 'sessionStorage': {}}}
+        
+        context_manager._write_context_state(context_path, [], storage, {'timestamp': 1})
+        
+        payload = (context_path / 'context.bin').read_bytes()
+        assert payload[:2] == b'\x1f\x8b'
+        assert len(payload) < 64 * 1024
+        assert context_manager._read_storage(context_path)['storage'] == storage
+        assert context_manager._read_cookies(context_path) == []
+    
+    def test_save_cookies(self, context_manager, mock_browser_context):
+        """测试未安装msgpack时Cookies以JSON列表写入合并状态文件"""
+        from src.auto_study.automation import context_manager as module
         
-        assert 'timestamp' in data
-        assert 'cookies' in data
+        with patch.object(module, 'msgpack', None):
+            assert context_manager.save_context_state(mock_browser_context, 'test_context') is True
+        
+        context_path = context_manager._context_dir / 'test_context'
+        data = json.loads((context_path / 'context.bin').read_bytes())
+        
+        assert data['version'] == module._STATE_FILE_VERSION
+        assert 'timestamp' in data['meta']
         assert len(data['cookies']) == 2
         assert data['cookies'][0]['name'] == 'test_cookie'
         assert data['cookies'][1]['name'] == 'session_cookie'
+
+    def test_cookie_columns_round_trip(self, context_manager):
+        """测试Cookies列式结构的转换与按expires列过滤"""
+        now = int(time.time())
+        cookies = [
+            {'name': 'a', 'value': '1', 'domain': 'example.com', 'path': '/', 'expires': now + 3600},
+            {'name': 'b', 'value': '2', 'domain': 'example.com', 'path': '/', 'expires': now - 10},
+            {'name': 'c', 'value': '3', 'domain': 'example.com', 'path': '/', 'partitionKey': 'k'},
+        ]
+        
+        columns = context_manager._cookies_to_columns(cookies)
+        assert columns['keys'][:2] == ['name', 'value']
+        assert 'partitionKey' in columns['keys']
+        assert all(len(col) == 3 for col in columns['columns'])
+        
+        assert context_manager._columns_to_cookies(columns) == cookies
+        assert context_manager._columns_to_cookies(columns, valid_only=True) == [cookies[0], cookies[2]]
+        assert context_manager._columns_to_cookies(context_manager._cookies_to_columns([])) == []
+    
+    def test_save_cookies_binary(self, context_manager, mock_browser_context):
+        """测试安装msgpack时合并状态文件以msgpack编码并按列保存Cookies"""
+        msgpack = pytest.importorskip('msgpack')
+        
+        assert context_manager.save_context_state(mock_browser_context, 'test_context') is True
+        
+        context_path = context_manager._context_dir / 'test_context'
+        state = msgpack.unpackb((context_path / 'context.bin').read_bytes(), raw=False)
+        assert state['cookies']['keys'][:2] == ['name', 'value']
+        assert context_manager._read_cookies(context_path) == mock_browser_context.cookies.return_value
+    
+    def test_filter_valid_cookies(self, context_manager):
+        """测试过滤过期Cookies"""
+        now = int(time.time())
+        cookies = [
+            {'name': 'no_expires'},
+            {'name': 'session', 'expires': -1},
+            {'name': 'expired', 'expires': now - 10},
+            {'name': 'valid', 'expires': now + 3600},
+        ]
+
+        valid = context_manager._filter_valid_cookies(cookies)
+
+        assert [c['name'] for c in valid] == ['no_expires', 'session', 'valid']
+    
+    def test_json_round_trip_with_and_without_orjson(self, context_manager):
+        """测试序列化在orjson与标准库回退下结果一致"""
+        from src.auto_study.automation import context_manager as module
+
+        data = {'timestamp': 1, 'cookies': [{'name': '会话', 'value': 'v'}]}
+        encoded = context_manager._dumps(data)
+        assert isinstance(encoded, bytes)
+        assert context_manager._loads(encoded) == data
+        assert '会话'.encode('utf-8') in encoded
+
+        with patch.object(module, 'orjson', None):
+            encoded = context_manager._dumps(data)
+            assert context_manager._loads(encoded) == data
+            assert '会话'.encode('utf-8') in encoded
+
+    def test_json_compact_unless_debug(self, context_manager):
+        """测试默认输出紧凑JSON，调试模式下输出缩进格式"""
+        from src.auto_study.automation import context_manager as module
+
+        data = {'cookies': [{'name': 'a', 'value': 'b'}]}
+        for orjson_module in (module.orjson, None):
+            with patch.object(module, 'orjson', orjson_module):
+                context_manager._pretty_json = False
+                assert context_manager._dumps(data) == b'{"cookies":[{"name":"a","value":"b"}]}'
+
+                context_manager._pretty_json = True
+                assert b'\n  "cookies"' in context_manager._dumps(data)
+
+    def test_read_json_caches_until_file_changes(self, context_manager):
+        """测试状态文件解析缓存及文件变化后失效"""
+        path = context_manager._context_dir / 'cached.json'
+        path.write_bytes(b'{"value": 1}')
+
+        first = context_manager._read_json(path)
+        assert context_manager._read_json(path) is first
+
+        path.write_bytes(b'{"value": 22}')
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        assert context_manager._read_json(path) == {'value': 22}
+
+    def test_write_file_is_atomic(self, context_manager):
+        """测试状态文件写入失败时保留原文件且不残留临时文件"""
+        path = context_manager._context_dir / 'state.json'
+        context_manager._write_file(path, b'{"value": 1}')
+        assert path.read_bytes() == b'{"value": 1}'
+        
+        with patch('os.replace', side_effect=OSError('disk full')):
+            with pytest.raises(OSError):
+                context_manager._write_file(path, b'{"value": 2}')
+        
+        assert path.read_bytes() == b'{"value": 1}'
+        assert list(context_manager._context_dir.iterdir()) == [path]
     
     def test_load_cookies(self, context_manager, mock_browser_context):
         """测试加载Cookies"""
-        context_path = context_manager._context_dir / 'test_context'
-        context_path.mkdir(parents=True, exist_ok=True)
-        
         # 先保存cookies
-        context_manager._save_cookies(mock_browser_context, context_path)
+        context_manager.save_context_state(mock_browser_context, 'test_context')
+        context_path = context_manager._context_dir / 'test_context'
         
         # 创建新的mock上下文来加载cookies
         new_context = Mock()
@@ -143,16 +285,9 @@ class TestContextManager:
     
     def test_save_storage_state(self, context_manager, mock_browser_context):
         """测试保存Storage状态"""
-        context_path = context_manager._context_dir / 'test_context'
-        context_path.mkdir(parents=True, exist_ok=True)
+        context_manager.save_context_state(mock_browser_context, 'test_context')
         
-        context_manager._save_storage_state(mock_browser_context, context_path)
-        
-        storage_file = context_path / 'storage.json'
-        assert storage_file.exists()
-        
-        with open(storage_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        data = context_manager._read_storage(context_manager._context_dir / 'test_context')
         
         assert 'timestamp' in data
         assert 'storage' in data
@@ -164,6 +299,77 @@ class TestContextManager:
         assert page_storage['localStorage']['key1'] == 'localStorage_value1'
         assert page_storage['sessionStorage']['session_key'] == 'sessionStorage_value'
     
+    def test_large_storage_is_compressed(self, context_manager):
+        """测试合并状态文件随Storage大小在压缩与不压缩之间切换，并可正常加载"""
+        context_path = context_manager._context_dir / 'test_context'
+        state_file = context_path / 'context.bin'
+        
+        small = {'https://example.com/': {'localStorage': {'k': 'v'}, 'sessionStorage': {}}}
+        large = {'https://example.com/': {'localStorage': {'blob': 'x' * 64 * 1024}, 'sessionStorage': {}}}
+        
+        context_manager._write_context_state(context_path, [], small, {'timestamp': 1})
+        assert state_file.read_bytes()[:2] != b'\x1f\x8b'
+        
+        context_manager._write_context_state(context_path, [], large, {'timestamp': 2})
+        assert state_file.read_bytes()[:2] == b'\x1f\x8b'
+        
+        new_context = Mock()
+        context_manager._load_storage_state(new_context, context_path)
+        assert new_context._stored_storage == large
+        
+        context_manager._write_context_state(context_path, [], small, {'timestamp': 3})
+        assert state_file.read_bytes()[:2] != b'\x1f\x8b'
+        assert context_manager._read_storage(context_path)['storage'] == small
+    
+    def test_save_storage_state_skips_duplicate_urls(self, context_manager):
+        """测试相同URL的多个页面只采集一次Storage"""
+        def make_page(url, storage):
+            page = Mock()
+            page.url = url
+            page.evaluate.return_value = storage
+            return page
+
+        first = make_page('https://example.com/a', {'local': {'k': 'old'}, 'session': {}})
+        other = make_page('https://example.com/b', {'local': {'k': 'b'}, 'session': {}})
+        last = make_page('https://example.com/a', {'local': {'k': 'new'}, 'session': {}})
+
+        storage = context_manager._collect_storage_state([first, other, last])
+
+        assert list(storage) == ['https://example.com/a', 'https://example.com/b']
+        assert storage['https://example.com/a']['localStorage'] == {'k': 'new'}
+        first.evaluate.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_save_context_state_async(self, context_manager):
+        """测试异步保存上下文状态"""
+        def make_page(url, storage):
+            page = Mock()
+            page.url = url
+            page.viewport_size = {'width': 1280, 'height': 720}
+            page.evaluate = AsyncMock(side_effect=lambda script: 'Mozilla/5.0 Test Agent'
+                                      if script == 'navigator.userAgent' else storage)
+            return page
+        
+        first = make_page('https://example.com/a', {'local': {'k': 'first'}, 'session': {}})
+        other = make_page('https://example.com/b', {'local': {'k': 'b'}, 'session': {'s': '1'}})
+        last_empty = make_page('https://example.com/a', {'local': {}, 'session': {}})
+        context = Mock()
+        context.pages = [first, other, last_empty]
+        context.cookies = AsyncMock(return_value=[{'name': 'a', 'value': '1', 'domain': 'example.com', 'path': '/'}])
+        
+        assert await context_manager.save_context_state_async(context, 'async_context') is True
+        
+        context_path = context_manager._context_dir / 'async_context'
+        storage = context_manager._read_storage(context_path)['storage']
+        assert list(storage) == ['https://example.com/a', 'https://example.com/b']
+        assert storage['https://example.com/a']['localStorage'] == {'k': 'first'}
+        
+        metadata = context_manager.get_context_info('async_context')
+        assert metadata['user_agent'] == 'Mozilla/5.0 Test Agent'
+        assert metadata['cookies_count'] == 1
+        assert metadata['storage_pages_count'] == 2
+        assert context_manager._read_cookies(context_path)[0]['name'] == 'a'
+    
     def test_load_storage_state(self, context_manager):
         """测试加载Storage状态"""
         context_path = context_manager._context_dir / 'test_context'
@@ -193,6 +399,15 @@ class TestContextManager:
         # 检查storage数据被保存到上下文
         assert hasattr(mock_context, '_stored_storage')
         assert 'https://example.com/test' in mock_context._stored_storage
+        
+        # 检查注册了恢复Storage的初始化脚本
+        mock_context.add_init_script.assert_called_once()
+        script = mock_context.add_init_script.call_args.kwargs['script']
+        assert '"example.com/test"' in script
+        assert 'session_value' in script
+        # 只补齐缺失的键，并注册供 restore_page_storage 调用的恢复函数
+        assert 'getItem(key) === null' in script
+        assert 'window.__restoreStorage' in script
     
     def test_restore_page_storage(self, context_manager, mock_page):
         """测试恢复页面Storage"""
@@ -207,8 +422,44 @@ class TestContextManager:
         # 恢复storage
         context_manager.restore_page_storage(mock_page)
         
-        # 验证evaluate被调用来恢复localStorage和sessionStorage
+        # 验证一次evaluate同时恢复两种Storage，且不额外注册初始化脚本
+        assert mock_page.evaluate.call_count == 1
+        assert mock_page.evaluate.call_args[0][1]['sessionStorage'] == {'session_key': 'session_value'}
+        
+        context_manager.restore_page_storage(mock_page)
+        mock_page.context.add_init_script.assert_not_called()
+        assert mock_page.evaluate.call_count == 2
+    
+    def test_restore_page_storage_uses_location_index(self, context_manager, mock_page):
+        """测试按域名+路径索引查找Storage数据，忽略查询参数"""
+        mock_page.context._stored_storage = {
+            'https://example.com/other': {'localStorage': {'other': '1'}},
+            'https://example.com/test?from=login': {'localStorage': {'key1': 'value1'}}
+        }
+        
+        context_manager.restore_page_storage(mock_page, 'https://example.com/test?page=2')
+        
+        assert mock_page.evaluate.call_args[0][1] == {'localStorage': {'key1': 'value1'}}
+        assert mock_page.context._stored_storage_index[('example.com', '/test')] == {'localStorage': {'key1': 'value1'}}
+        
+        mock_page.evaluate.reset_mock()
+        context_manager.restore_page_storage(mock_page, 'https://example.org/test')
+        mock_page.evaluate.assert_not_called()
+    
+    def test_restore_page_storage_defines_helper_in_open_page(self, context_manager, mock_page):
+        """测试加载状态前已打开的页面直接执行与初始化脚本相同的补齐函数"""
+        from src.auto_study.automation.context_manager import _FILL_STORAGE_FUNCTION
+        
+        mock_page.context._stored_storage = {
+            'https://example.com/test': {'localStorage': {'key1': 'value1'}}
+        }
+        mock_page.evaluate.side_effect = [False, None]
+        
+        context_manager.restore_page_storage(mock_page)
+        
         assert mock_page.evaluate.call_count == 2
+        assert mock_page.evaluate.call_args[0] == (_FILL_STORAGE_FUNCTION, {'localStorage': {'key1': 'value1'}})
+        mock_page.context.add_init_script.assert_not_called()
     
     def test_url_matches(self, context_manager):
         """测试URL匹配"""
@@ -232,20 +483,9 @@ class TestContextManager:
     
     def test_save_context_metadata(self, context_manager, mock_browser_context):
         """测试保存上下文元信息"""
-        context_path = context_manager._context_dir / 'test_context'
-        context_path.mkdir(parents=True, exist_ok=True)
-        
-        # 设置页面的evaluate返回值
-        mock_browser_context.pages[0].evaluate.return_value = 'Mozilla/5.0 Test Agent'
-        mock_browser_context.pages[0].viewport_size = {'width': 1280, 'height': 720}
+        context_manager.save_context_state(mock_browser_context, 'test_context')
         
-        context_manager._save_context_metadata(mock_browser_context, context_path)
-        
-        metadata_file = context_path / 'metadata.json'
-        assert metadata_file.exists()
-        
-        with open(metadata_file, 'r', encoding='utf-8') as f:
-            metadata = json.load(f)
+        metadata = context_manager.get_context_info('test_context')
         
         assert 'timestamp' in metadata
         assert 'pages_count' in metadata
@@ -253,6 +493,25 @@ class TestContextManager:
         assert metadata['user_agent'] == 'Mozilla/5.0 Test Agent'
         assert metadata['viewport']['width'] == 1280
     
+    def test_save_context_metadata_caches_user_agent(self, context_manager):
+        """测试同一上下文多次保存只读取一次User-Agent"""
+        page = Mock()
+        page.url = 'about:blank'
+        page.evaluate.return_value = 'Mozilla/5.0 Test Agent'
+        page.viewport_size = {'width': 1280, 'height': 720}
+        context = Mock()
+        context.cookies.return_value = []
+        context.pages = [page]
+        
+        context_manager.save_context_state(context, 'test_context')
+        page.viewport_size = {'width': 800, 'height': 600}
+        context_manager.save_context_state(context, 'test_context')
+        
+        page.evaluate.assert_called_once_with('navigator.userAgent')
+        metadata = context_manager.get_context_info('test_context')
+        assert metadata['user_agent'] == 'Mozilla/5.0 Test Agent'
+        assert metadata['viewport']['width'] == 800
+    
     def test_list_saved_contexts(self, context_manager):
         """测试列出保存的上下文"""
         # 创建一些测试上下文目录
@@ -287,6 +546,26 @@ class TestContextManager:
         result = context_manager.delete_context_state('non_existent')
         assert result is False
     
+    def test_remove_context_dir(self, context_manager):
+        """测试删除上下文目录，包含子目录时回退到rmtree"""
+        flat = context_manager._context_dir / 'flat'
+        flat.mkdir()
+        (flat / 'cookies.json').write_bytes(b'{}')
+        (flat / 'metadata.json').write_bytes(b'{}')
+        
+        nested = context_manager._context_dir / 'nested'
+        (nested / 'sub').mkdir(parents=True)
+        (nested / 'cookies.json').write_bytes(b'{}')
+        (nested / 'sub' / 'file').write_bytes(b'')
+        
+        with patch('shutil.rmtree') as rmtree:
+            context_manager._remove_context_dir(flat)
+        rmtree.assert_not_called()
+        assert not flat.exists()
+        
+        context_manager._remove_context_dir(str(nested))
+        assert not nested.exists()
+    
     def test_get_context_info(self, context_manager, mock_browser_context):
         """测试获取上下文信息"""
         # 保存一个上下文
@@ -301,7 +580,7 @@ class TestContextManager:
         assert 'timestamp' in info
         assert 'files' in info
         assert 'files_count' in info
-        assert info['files_count'] >= 3  # cookies, storage, metadata
+        assert info['files'] == ['context.bin']  # 全部状态合并在一个文件中
         assert 'cookies_count' in info
         assert 'storage_pages_count' in info
         
@@ -309,6 +588,28 @@ class TestContextManager:
         info = context_manager.get_context_info('non_existent')
         assert info is None
     
+    def test_get_context_info_uses_metadata_counts(self, context_manager):
+        """测试元信息中记录了数量时不再解析Cookies和Storage文件"""
+        page = Mock()
+        page.url = 'https://example.com/test'
+        page.evaluate.side_effect = [
+            {'local': {'key1': 'value1'}, 'session': {}},
+            'Mozilla/5.0 Test Agent'
+        ]
+        page.viewport_size = {'width': 1280, 'height': 720}
+        context = Mock()
+        context.cookies.return_value = [{'name': 'a', 'value': '1', 'domain': 'example.com', 'path': '/'}]
+        context.pages = [page]
+        
+        assert context_manager.save_context_state(context, 'counted') is True
+        
+        with patch.object(context_manager, '_read_cookies') as read_cookies:
+            info = context_manager.get_context_info('counted')
+        
+        read_cookies.assert_not_called()
+        assert info['cookies_count'] == 1
+        assert info['storage_pages_count'] == 1
+    
     def test_cleanup_expired_contexts(self, context_manager):
         """测试清理过期上下文"""
         # 创建一个当前上下文
@@ -335,6 +636,10 @@ class TestContextManager:
         with open(expired_ctx_path / 'metadata.json', 'w') as f:
             json.dump(expired_metadata, f)
         
+        # 过期判断基于文件修改时间
+        expired_time = expired_metadata['timestamp']
+        os.utime(expired_ctx_path / 'metadata.json', (expired_time, expired_time))
+        
         # 清理过期上下文（30天）
         cleaned_count = context_manager.cleanup_expired_contexts(max_age_days=30)
         
@@ -357,6 +662,30 @@ class TestContextManager:
         assert result is True
         new_context.add_cookies.assert_called()
     
+    def test_get_storage_state(self, context_manager, mock_browser_context):
+        """测试导出Playwright storage_state格式"""
+        mock_browser_context.cookies.return_value.append({
+            'name': 'expired_cookie',
+            'value': 'old',
+            'domain': 'example.com',
+            'path': '/',
+            'expires': int(time.time()) - 3600
+        })
+        context_manager.save_context_state(mock_browser_context, 'test_state')
+
+        state = context_manager.get_storage_state('test_state')
+
+        assert [c['name'] for c in state['cookies']] == ['test_cookie', 'session_cookie']
+        assert state['origins'] == [{
+            'origin': 'https://example.com',
+            'localStorage': [
+                {'name': 'key1', 'value': 'localStorage_value1'},
+                {'name': 'key2', 'value': 'localStorage_value2'}
+            ]
+        }]
+
+        assert context_manager.get_storage_state('non_existent') is None
+
     def test_load_context_state_not_exists(self, context_manager):
         """测试加载不存在的上下文状态"""
         mock_context = Mock()
@@ -385,35 +714,29 @@ class TestContextManager:
     def test_empty_pages_handling(self, context_manager):
         """测试空页面列表的处理"""
         mock_context = Mock()
+        mock_context.cookies.return_value = []
         mock_context.pages = []  # 空页面列表
         
-        context_path = context_manager._context_dir / 'empty_pages'
-        context_path.mkdir(parents=True, exist_ok=True)
-        
         # 应该能正常处理空页面列表
-        context_manager._save_storage_state(mock_context, context_path)
+        assert context_manager.save_context_state(mock_context, 'empty_pages') is True
         
-        # 检查没有创建storage文件
-        storage_file = context_path / 'storage.json'
-        assert not storage_file.exists()
+        # 没有Storage数据
+        context_path = context_manager._context_dir / 'empty_pages'
+        assert context_manager._read_storage(context_path)['storage'] == {}
     
     def test_invalid_page_url_handling(self, context_manager):
         """测试无效页面URL的处理"""
         mock_context = Mock()
+        mock_context.cookies.return_value = []
         mock_page = Mock()
         mock_page.url = 'about:blank'  # 无效URL
+        mock_page.evaluate.return_value = 'Mozilla/5.0 Test Agent'
+        mock_page.viewport_size = {'width': 1280, 'height': 720}
         mock_context.pages = [mock_page]
         
-        context_path = context_manager._context_dir / 'invalid_url'
-        context_path.mkdir(parents=True, exist_ok=True)
-        
         # 应该能正常处理无效URL
-        context_manager._save_storage_state(mock_context, context_path)
+        assert context_manager.save_context_state(mock_context, 'invalid_url') is True
         
-        # 可能没有创建storage文件，或者创建了空的storage文件
-        storage_file = context_path / 'storage.json'
-        if storage_file.exists():
-            with open(storage_file, 'r') as f:
-                data = json.load(f)
-            # 如果文件存在，storage应该为空
-            assert len(data.get('storage', {})) == 0
\ No newline at end of file
+        # 无效URL的页面不采集Storage
+        context_path = context_manager._context_dir / 'invalid_url'
+        assert context_manager._read_storage(context_path)['storage'] == {}
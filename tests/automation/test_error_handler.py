@@ -88,6 +88,16 @@ class TestErrorHandler:
         js_error = Exception("ReferenceError: test")
         assert error_handler_instance.is_retryable(js_error) is False
     
+    def test_non_retryable_types(self, error_handler_instance):
+        """测试明确不可重试的异常类型跳过错误信息匹配"""
+        from src.auto_study.automation.error_handler import CredentialsError
+        
+        # 错误信息本身会被识别为超时，但凭据错误始终不可重试
+        error = CredentialsError("timeout while checking password")
+        assert error_handler_instance.is_retryable(error) is False
+        assert error_handler_instance.classify_error(error) == ErrorType.UNKNOWN
+        assert error_handler_instance._error_statistics[ErrorType.TIMEOUT] == 0
+    
     def test_calculate_delay_linear(self, error_handler_instance):
         """测试线性延迟计算"""
         delay1 = error_handler_instance.calculate_delay(1, RetryStrategy.LINEAR, base_delay=2.0)
@@ -126,6 +136,20 @@ class TestErrorHandler:
         
         assert delay == 10.0  # 应该被限制在最大值
     
+    def test_calculate_delay_jitter(self, error_handler_instance):
+        """测试延迟抖动范围"""
+        for _ in range(100):
+            delay = error_handler_instance.calculate_delay(
+                3, RetryStrategy.EXPONENTIAL, base_delay=1.0, max_delay=5.0, jitter=0.5
+            )
+            assert 2.0 <= delay <= 5.0
+        
+        delays = {
+            error_handler_instance.calculate_delay(2, RetryStrategy.FIXED, base_delay=1.0, jitter=0.5)
+            for _ in range(20)
+        }
+        assert len(delays) > 1
+    
     def test_retry_decorator_success(self, error_handler_instance):
         """测试重试装饰器成功场景"""
         call_count = 0
@@ -158,6 +182,27 @@ class TestErrorHandler:
         
         assert call_count == 3  # 初始调用 + 2次重试
     
+    def test_retry_decorator_cancel(self, error_handler_instance):
+        """测试取消后重试等待立即结束"""
+        call_count = 0
+        
+        @error_handler_instance.retry_on_error(max_retries=3, base_delay=10.0)
+        def test_function():
+            nonlocal call_count
+            call_count += 1
+            raise PlaywrightTimeoutError("timeout")
+        
+        error_handler_instance.cancel()
+        start = time.time()
+        with pytest.raises(PlaywrightTimeoutError):
+            test_function()
+        
+        assert time.time() - start < 1.0
+        assert call_count == 1
+        
+        error_handler_instance.resume()
+        assert not error_handler_instance.wait_before_retry(0)
+    
     def test_retry_decorator_non_retryable(self, error_handler_instance):
         """测试不可重试错误"""
         call_count = 0
@@ -235,6 +280,16 @@ class TestErrorHandler:
         assert result is True
         mock_page.reload.assert_called()
     
+    def test_handle_page_error_skips_page_evaluate(self, error_handler_instance):
+        """测试网络和JavaScript错误处理不在页面中执行脚本"""
+        mock_page = Mock()
+        
+        assert error_handler_instance.handle_page_error(mock_page, Exception("net::ERR_NETWORK")) is True
+        assert error_handler_instance.handle_page_error(mock_page, Exception("ReferenceError: x")) is True
+        
+        mock_page.reload.assert_called_once()
+        mock_page.evaluate.assert_not_called()
+    
     def test_handle_page_error_element_not_found(self, error_handler_instance):
         """测试处理元素未找到错误"""
         mock_page = Mock()
@@ -248,6 +303,18 @@ class TestErrorHandler:
         mock_page.wait_for_load_state.assert_called()
         mock_page.evaluate.assert_called()  # 应该调用滚动
     
+    def test_handle_page_error_unknown_skips_traceback(self, error_handler_instance):
+        """测试调试日志未启用时不格式化调用栈"""
+        mock_page = Mock()
+        mock_page.is_closed.return_value = False
+        
+        error = Exception("Some unknown error message")
+        with patch('src.auto_study.automation.error_handler.logger.is_enabled_for', return_value=False), \
+             patch('src.auto_study.automation.error_handler.traceback.format_exc') as mock_format_exc:
+            error_handler_instance.handle_page_error(mock_page, error)
+        
+        mock_format_exc.assert_not_called()
+    
     def test_get_error_statistics(self, error_handler_instance):
         """测试获取错误统计"""
         # 人工增加一些错误统计
@@ -312,6 +379,75 @@ class TestErrorHandler:
         
         assert call_count == 3
     
+    def test_circuit_breaker_half_open_single_probe(self, error_handler_instance):
+        """测试半开状态下只允许一个请求探测"""
+        import threading
+        from src.auto_study.automation.error_handler import CircuitOpenError
+        
+        circuit_breaker = error_handler_instance.create_circuit_breaker(
+            failure_threshold=1, timeout=0.05
+        )
+        probe_started = threading.Event()
+        release_probe = threading.Event()
+        should_fail = True
+        
+        @circuit_breaker
+        def guarded_function():
+            if should_fail:
+                raise ValueError("test error")
+            probe_started.set()
+            release_probe.wait(1.0)
+            return "ok"
+        
+        with pytest.raises(ValueError):
+            guarded_function()
+        with pytest.raises(CircuitOpenError, match="断路器处于开启状态"):
+            guarded_function()
+        
+        time.sleep(0.1)
+        should_fail = False
+        results = []
+        probe = threading.Thread(target=lambda: results.append(guarded_function()))
+        probe.start()
+        assert probe_started.wait(1.0)
+        
+        # 探测进行中，其他请求被拒绝
+        with pytest.raises(CircuitOpenError):
+            guarded_function()
+        
+        release_probe.set()
+        probe.join()
+        
+        assert results == ["ok"]
+        assert circuit_breaker.state == 'CLOSED'
+        assert guarded_function() == "ok"
+    
+    def test_circuit_breaker_concurrent_failures(self, error_handler_instance):
+        """测试多线程共用断路器时失败计数一致"""
+        import threading
+        
+        circuit_breaker = error_handler_instance.create_circuit_breaker(
+            failure_threshold=1000, timeout=60
+        )
+        
+        @circuit_breaker
+        def failing_function():
+            raise ValueError("test error")
+        
+        def worker():
+            for _ in range(50):
+                with pytest.raises(ValueError):
+                    failing_function()
+        
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert circuit_breaker.failure_count == 400
+        assert circuit_breaker.state == 'CLOSED'
+    
     def test_global_error_handler(self):
         """测试全局错误处理器实例"""
         assert error_handler is not None
@@ -395,4 +531,86 @@ class TestErrorHandler:
         for error_message, expected_type in test_cases:
             error = Exception(error_message)
             classified_type = error_handler_instance.classify_error(error)
-            assert classified_type == expected_type, f"Error '{error_message}' was classified as {classified_type}, expected {expected_type}"
\ No newline at end of file
+            assert classified_type == expected_type, f"Error '{error_message}' was classified as {classified_type}, expected {expected_type}"
+    
+    def test_classify_error_type_precedence(self, error_handler_instance):
+        """测试同时命中多个类型的模式时按类型声明顺序取靠前的类型"""
+        error = Exception("navigation to page failed: net::ERR_ABORTED, Timeout 30000ms exceeded")
+        assert error_handler_instance.classify_error(error) == ErrorType.TIMEOUT
+        
+        error = Exception("ERR_ABORTED while waiting for net::ERR_CONNECTION_RESET")
+        assert error_handler_instance.classify_error(error) == ErrorType.TIMEOUT
+        
+        error = Exception("navigation failed: net::ERR_CONNECTION_RESET")
+        assert error_handler_instance.classify_error(error) == ErrorType.NETWORK
+    
+    def _assert_automaton_matches_fallback(self, handler):
+        """断言自动机匹配结果与逐个类型匹配的结果一致"""
+        fallback = ErrorHandler()
+        fallback._pattern_automaton = None
+        
+        messages = [
+            "timeout waiting for element",
+            "net::err_connection_refused",
+            "navigation failed: net::err_connection_reset",
+            "navigation to page failed: net::err_aborted, timeout 30000ms exceeded",
+            "strict mode violation: locator resolved to 0 elements",
+            "referenceerror: variable is not defined",
+            "err_aborted",
+            "something completely different",
+        ]
+        for message in messages:
+            assert handler._match_error_pattern(message) == fallback._match_error_pattern(message), message
+        
+        assert handler._match_error_pattern("net::err_aborted") == ErrorType.NETWORK
+        assert handler._match_error_pattern("no known pattern here") is None
+    
+    def test_match_error_pattern_automaton(self, error_handler_instance):
+        """测试安装pyahocorasick时自动机匹配结果与逐个类型匹配的结果一致"""
+        pytest.importorskip("ahocorasick")
+        assert error_handler_instance._pattern_automaton is not None
+        self._assert_automaton_matches_fallback(error_handler_instance)
+    
+    def test_match_error_pattern_stub_automaton(self, error_handler_instance):
+        """测试自动机分支按类型顺序取命中结果（使用桩自动机，不依赖pyahocorasick）"""
+        words = {}
+        for rank, (error_type, patterns) in enumerate(error_handler_instance._lowered_patterns):
+            for pattern in patterns:
+                words.setdefault(pattern, (rank, error_type))
+        
+        class StubAutomaton:
+            """按 ahocorasick.Automaton.iter 的约定，依结束位置顺序返回 (结束位置, 值)"""
+            calls = 0
+            
+            def iter(self, text):
+                StubAutomaton.calls += 1
+                hits = []
+                for word, value in words.items():
+                    start = text.find(word)
+                    while start != -1:
+                        hits.append((start + len(word) - 1, value))
+                        start = text.find(word, start + 1)
+                return iter(sorted(hits, key=lambda hit: hit[0]))
+        
+        error_handler_instance._pattern_automaton = StubAutomaton()
+        self._assert_automaton_matches_fallback(error_handler_instance)
+        assert StubAutomaton.calls > 0
+    
+    def test_classify_error_by_class(self, error_handler_instance):
+        """测试按异常类分类优先于错误信息匹配"""
+        error = PlaywrightTimeoutError("net::ERR_CONNECTION_RESET")
+        assert error_handler_instance.classify_error(error) == ErrorType.TIMEOUT
+        assert error_handler_instance._error_statistics[ErrorType.TIMEOUT] == 1
+        assert error_handler_instance._error_statistics[ErrorType.NETWORK] == 0
+    
+    def test_classify_error_cached_on_exception(self, error_handler_instance):
+        """测试同一异常重复分类时只统计一次"""
+        mock_page = Mock()
+        mock_page.reload = Mock()
+        error = Exception("net::ERR_CONNECTION_RESET")
+        
+        assert error_handler_instance.is_retryable(error) is True
+        assert error_handler_instance.handle_page_error(mock_page, error) is True
+        assert error_handler_instance.classify_error(error) == ErrorType.NETWORK
+        
+        assert error_handler_instance._error_statistics[ErrorType.NETWORK] == 1
@@ -9,7 +9,7 @@ import json
 import tempfile
 from datetime import datetime, timedelta
 from pathlib import Path
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import AsyncMock, Mock, patch, MagicMock
 
 from src.auto_study.automation import (
     CourseManager, Course, CourseStatus, CoursePriority, get_course_manager
@@ -160,6 +160,25 @@ class TestCourse:
         
         assert high_score > normal_score
     
+    def test_course_scores_with_fixed_now(self):
+        """测试传入同一当前时间时评分结果确定"""
+        now = datetime(2024, 1, 10, 12, 0, 0)
+        course = Course(**self.sample_course_data)
+        course.deadline = now + timedelta(days=1, hours=1)
+        course.last_accessed = now - timedelta(days=2)
+        
+        assert course.days_until_deadline(now) == 1
+        assert not course.is_overdue(now)
+        assert course.is_overdue(now + timedelta(days=2))
+        assert course.get_urgency_score(now) == 0.9
+        
+        # 0.9*0.4 + 0.6*0.3 + 0.5*0.2 + 0.7*0.1
+        assert course.calculate_priority_score(now=now) == pytest.approx(0.71)
+        
+        with patch('src.auto_study.automation.course_manager.datetime') as mock_datetime:
+            course.calculate_priority_score(now=now)
+            mock_datetime.now.assert_not_called()
+    
     def test_course_serialization(self):
         """测试课程序列化和反序列化"""
         # 创建包含各种数据类型的课程
@@ -190,6 +209,62 @@ class TestCourse:
         assert restored_course.status == course.status
         assert restored_course.priority == course.priority
         assert isinstance(restored_course.deadline, datetime)
+    
+    def test_course_to_dict_matches_asdict(self):
+        """测试to_dict与dataclasses.asdict的结果一致且不共享可变容器"""
+        from dataclasses import asdict
+        
+        course = Course(
+            id='dict_test',
+            title='字典测试',
+            url='https://example.com/test',
+            deadline=datetime.now() + timedelta(days=3),
+            last_accessed=datetime.now(),
+            chapters=[{'title': '第一章', 'sections': [1, 2]}],
+            tags=['python']
+        )
+        
+        expected = asdict(course)
+        expected['status'] = course.status.value
+        expected['priority'] = course.priority.value
+        for field_name in ['deadline', 'created_time', 'updated_time', 'last_accessed']:
+            expected[field_name] = expected[field_name].isoformat()
+        
+        course_dict = course.to_dict()
+        assert course_dict == expected
+        
+        course_dict['chapters'][0]['sections'].append(3)
+        course_dict['tags'].append('extra')
+        assert course.chapters[0]['sections'] == [1, 2]
+        assert course.tags == ['python']
+        
+        restored = Course.from_dict(course_dict)
+        assert restored.deadline == course.deadline
+        assert restored.last_accessed == course.last_accessed
+
+    def test_course_from_trusted_dict(self):
+        """测试缓存数据快速构建课程对象与from_dict结果一致"""
+        course = Course(
+            id='trusted_test',
+            title='快速加载',
+            url='https://example.com/trusted',
+            status=CourseStatus.IN_PROGRESS,
+            progress=0.4,
+            priority=CoursePriority.HIGH,
+            deadline=datetime.now() + timedelta(days=5),
+            tags=['fast']
+        )
+        data = course.to_dict()
+
+        assert Course._from_trusted_dict(dict(data)) == Course.from_dict(dict(data)) == course
+
+        # 字段不完整或优先级为名称字符串时回退到from_dict
+        partial = dict(data)
+        del partial['tags']
+        partial['priority'] = 'low'
+        loaded = Course._from_trusted_dict(partial)
+        assert loaded.tags == []
+        assert loaded.priority == CoursePriority.LOW
 
 
 class TestCourseManager:
@@ -279,40 +354,28 @@ class TestCourseManager:
     
     def test_parse_progress(self):
         """测试进度解析"""
-        # 创建模拟的进度元素
-        progress_element = Mock()
-        
         # 测试data-progress属性
-        progress_element.get_attribute.return_value = "75"
-        progress_element.text_content.return_value = ""
-        progress = self.manager._parse_progress(progress_element)
+        progress = self.manager._parse_progress_values("0.75", None, "")
         assert progress == 0.75
         
         # 测试百分比属性（>1的值）
-        progress_element.get_attribute.return_value = "85"
-        progress = self.manager._parse_progress(progress_element)
+        progress = self.manager._parse_progress_values("85", None, "")
         assert progress == 0.85
         
         # 测试样式width
-        progress_element.get_attribute.side_effect = lambda x: "width: 60%" if x == 'style' else None
-        progress = self.manager._parse_progress(progress_element)
+        progress = self.manager._parse_progress_values(None, "width: 60%", None)
         assert progress == 0.6
         
         # 测试文本内容百分比
-        progress_element.get_attribute.return_value = None
-        progress_element.text_content.return_value = "完成度: 45%"
-        progress = self.manager._parse_progress(progress_element)
+        progress = self.manager._parse_progress_values(None, None, "完成度: 45%")
         assert progress == 0.45
         
         # 测试分数形式
-        progress_element.text_content.return_value = "已完成 3/10"
-        progress = self.manager._parse_progress(progress_element)
+        progress = self.manager._parse_progress_values(None, None, "已完成 3/10")
         assert progress == 0.3
     
     def test_parse_status(self):
         """测试状态解析"""
-        status_element = Mock()
-        
         # 测试不同状态关键词
         test_cases = [
             ("已完成", 0.5, CourseStatus.COMPLETED),
@@ -323,67 +386,124 @@ class TestCourseManager:
         ]
         
         for text, progress, expected_status in test_cases:
-            status_element.text_content.return_value = text
-            status = self.manager._parse_status(status_element, progress)
+            status = self.manager._parse_status_text(text, progress)
             assert status == expected_status
         
         # 测试根据进度推断状态
-        status_element.text_content.return_value = "其他状态"
-        
         # 完成状态（进度>=0.95）
-        status = self.manager._parse_status(status_element, 0.95)
+        status = self.manager._parse_status_text("其他状态", 0.95)
         assert status == CourseStatus.COMPLETED
         
         # 进行中状态（0<进度<0.95）
-        status = self.manager._parse_status(status_element, 0.5)
+        status = self.manager._parse_status_text("其他状态", 0.5)
         assert status == CourseStatus.IN_PROGRESS
         
         # 未开始状态（进度=0）
-        status = self.manager._parse_status(status_element, 0.0)
+        status = self.manager._parse_status_text("其他状态", 0.0)
         assert status == CourseStatus.NOT_STARTED
     
-    def test_extract_single_course(self):
-        """测试单个课程信息提取"""
-        mock_page = Mock()
-        mock_course_element = Mock()
-        
-        # 模拟页面元素
-        mock_title_element = Mock()
-        mock_title_element.text_content.return_value = "测试课程"
-        
-        mock_link_element = Mock()
-        mock_link_element.get_attribute.return_value = "/course/123"
-        
-        mock_progress_element = Mock()
-        mock_progress_element.get_attribute.return_value = "60"
-        
-        mock_status_element = Mock()
-        mock_status_element.text_content.return_value = "进行中"
-        
-        mock_desc_element = Mock()
-        mock_desc_element.text_content.return_value = "课程描述"
+    def test_courses_from_raw(self):
+        """测试由浏览器内提取的原始信息构建课程"""
+        raw_courses = [
+            {
+                'title': "测试课程",
+                'href': "/course/123",
+                'progress': {'data': "60", 'style': None, 'text': ""},
+                'status': "进行中",
+                'description': "课程描述",
+            },
+            {'title': "  ", 'href': "/course/456"},  # 标题为空的课程被跳过
+        ]
         
-        # 模拟页面URL
-        mock_page.url = "https://example.com"
+        courses = self.manager._courses_from_raw(raw_courses, "https://example.com")
         
-        with patch.object(self.manager, 'find_element_by_selectors') as mock_find:
-            mock_find.side_effect = [
-                mock_title_element,   # title
-                mock_link_element,    # link
-                mock_progress_element, # progress
-                mock_status_element,  # status
-                mock_desc_element     # description
+        assert len(courses) == 1
+        course = courses[0]
+        assert course.title == "测试课程"
+        assert course.url == "https://example.com/course/123"
+        assert course.progress == 0.6
+        assert course.status == CourseStatus.IN_PROGRESS
+        assert course.description == "课程描述"
+
+    def test_extract_courses_from_page_batched(self):
+        """测试在浏览器内一次性提取课程列表"""
+        mock_page = Mock()
+        mock_page.url = "https://example.com/list"
+        mock_page.eval_on_selector_all.side_effect = [
+            [],  # 第一个列表选择器未匹配
+            [
+                {
+                    'title': " 课程一 ",
+                    'href': "/course/1",
+                    'progress': {'data': None, 'style': "width: 40%", 'text': ""},
+                    'status': "学习中",
+                    'description': " 描述一 "
+                },
+                {
+                    'title': "课程二",
+                    'href': None,
+                    'progress': {'data': None, 'style': None, 'text': "10/10"},
+                    'status': None,
+                    'description': None
+                },
+                {'title': "  ", 'href': None, 'progress': None, 'status': None, 'description': None}
             ]
-            
-            course = self.manager._extract_single_course(mock_page, mock_course_element, 0)
-            
-            assert course is not None
-            assert course.title == "测试课程"
-            assert course.url == "https://example.com/course/123"
-            assert course.progress == 0.6
-            assert course.status == CourseStatus.IN_PROGRESS
-            assert course.description == "课程描述"
-    
+        ]
+
+        courses = self.manager.extract_courses_from_page(mock_page)
+
+        assert mock_page.eval_on_selector_all.call_count == 2
+        assert len(courses) == 2
+        assert courses[0].title == "课程一"
+        assert courses[0].url == "https://example.com/course/1"
+        assert courses[0].progress == 0.4
+        assert courses[0].status == CourseStatus.IN_PROGRESS
+        assert courses[0].description == "描述一"
+        assert courses[1].progress == 1.0
+        assert courses[1].status == CourseStatus.COMPLETED
+        assert courses[1].url == ""
+
+        # 再次提取时优先尝试上次命中的列表选择器
+        winner = self.manager._course_selectors['course_list'][1]
+        mock_page.eval_on_selector_all.reset_mock(side_effect=True)
+        mock_page.eval_on_selector_all.return_value = [
+            {'title': "课程三", 'href': None, 'progress': None, 'status': None, 'description': None}
+        ]
+        courses = self.manager.extract_courses_from_page(mock_page)
+        assert mock_page.eval_on_selector_all.call_count == 1
+        assert mock_page.eval_on_selector_all.call_args[0][0] == winner
+        assert [c.title for c in courses] == ["课程三"]
+
+    @pytest.mark.asyncio
+    async def test_extract_courses_from_page_async(self):
+        """测试异步页面并发查询列表选择器并按顺序取第一个结果"""
+        list_selectors = self.manager._course_selectors['course_list']
+        results = {
+            list_selectors[0]: Exception("选择器无效"),
+            list_selectors[1]: [{'title': "课程一", 'href': "/course/1", 'progress': None,
+                                 'status': None, 'description': None}],
+            list_selectors[2]: [{'title': "其他课程", 'href': None, 'progress': None,
+                                 'status': None, 'description': None}]
+        }
+
+        async def eval_on_selector_all(selector, script, arg):
+            result = results.get(selector, [])
+            if isinstance(result, Exception):
+                raise result
+            return result
+
+        mock_page = Mock()
+        mock_page.url = "https://example.com/list"
+        mock_page.wait_for_load_state = AsyncMock()
+        mock_page.wait_for_selector = AsyncMock()
+        mock_page.eval_on_selector_all = AsyncMock(side_effect=eval_on_selector_all)
+
+        courses = await self.manager.extract_courses_from_page_async(mock_page)
+
+        assert mock_page.eval_on_selector_all.await_count == len(list_selectors)
+        assert [c.title for c in courses] == ["课程一"]
+        assert courses[0].url == "https://example.com/course/1"
+
     def test_get_courses_by_status(self):
         """测试按状态获取课程"""
         courses = self.create_sample_courses()
@@ -431,7 +551,11 @@ class TestCourseManager:
         
         custom_sorted = self.manager.sort_courses_by_priority(courses, custom_weights)
         assert len(custom_sorted) == 3
-    
+
+        # 只取前K个时与完整排序的前K个一致
+        top_two = self.manager.sort_courses_by_priority(courses, custom_weights, top_k=2)
+        assert [c.id for c in top_two] == [c.id for c in custom_sorted[:2]]
+
     def test_get_urgent_courses(self):
         """测试获取紧急课程"""
         courses = self.create_sample_courses()
@@ -451,6 +575,58 @@ class TestCourseManager:
         assert len(urgent_courses) == 1
         assert urgent_courses[0].id == 'course_001'
     
+    def test_course_indexes_follow_cache_changes(self):
+        """测试状态索引和截止时间索引随缓存变化更新"""
+        courses = self.create_sample_courses()
+        for course in courses:
+            self.manager._courses_cache[course.id] = course
+        self.manager._cache_loaded = True
+
+        assert len(self.manager.get_courses_by_status(CourseStatus.NOT_STARTED)) == 1
+
+        # 通过管理器更新进度时同步状态索引
+        self.manager.update_course_progress('course_002', 0.5, save=False)
+        assert self.manager.get_courses_by_status(CourseStatus.NOT_STARTED) == []
+        in_progress_ids = {c.id for c in self.manager.get_courses_by_status(CourseStatus.IN_PROGRESS)}
+        assert in_progress_ids == {'course_001', 'course_002'}
+
+        # 直接写入缓存后索引自动重建
+        self.manager._courses_cache['course_004'] = Course(
+            id='course_004', title="新课程", url="",
+            deadline=datetime.now() + timedelta(days=1)
+        )
+        assert len(self.manager.get_courses_by_status(CourseStatus.NOT_STARTED)) == 1
+        assert 'course_004' in {c.id for c in self.manager.get_urgent_courses(days_threshold=2)}
+
+        del self.manager._courses_cache['course_004']
+        assert self.manager.get_courses_by_status(CourseStatus.NOT_STARTED) == []
+
+    def test_course_indexes_follow_direct_course_changes(self):
+        """测试直接修改缓存中课程的状态和截止时间后索引随之更新"""
+        courses = self.create_sample_courses()
+        for course in courses:
+            self.manager._courses_cache[course.id] = course
+        self.manager._cache_loaded = True
+
+        assert {c.id for c in self.manager.get_courses_by_status(CourseStatus.NOT_STARTED)} == {'course_002'}
+        assert self.manager.get_urgent_courses(days_threshold=1) == []
+
+        self.manager.get_course_by_id('course_002').status = CourseStatus.COMPLETED
+        assert self.manager.get_courses_by_status(CourseStatus.NOT_STARTED) == []
+        completed_ids = {c.id for c in self.manager.get_courses_by_status(CourseStatus.COMPLETED)}
+        assert 'course_002' in completed_ids
+
+        self.manager.get_course_by_id('course_001').deadline = datetime.now() + timedelta(days=1)
+        assert [c.id for c in self.manager.get_urgent_courses(days_threshold=1)] == ['course_001']
+
+        self.manager.get_course_by_id('course_001').deadline = None
+        assert self.manager.get_urgent_courses(days_threshold=1) == []
+
+        # 通过管理器更新进度时增量同步索引，不需要整体重建
+        self.manager.update_course_progress('course_001', 0.99, save=False)
+        assert self.manager._index_version == self.manager._current_index_version()
+        assert 'course_001' in {c.id for c in self.manager.get_courses_by_status(CourseStatus.COMPLETED)}
+
     def test_update_course_progress(self):
         """测试更新课程进度"""
         courses = self.create_sample_courses()
@@ -478,6 +654,30 @@ class TestCourseManager:
         success = self.manager.update_course_progress('nonexistent', 0.5)
         assert not success
     
+    def test_batched_progress_updates_flush(self):
+        """测试批量更新进度时只在flush时写入文件"""
+        courses = self.create_sample_courses()
+        for course in courses:
+            self.manager._courses_cache[course.id] = course
+        self.manager._cache_loaded = True
+        self.manager.save_courses_cache()
+        
+        with patch.object(self.manager, 'save_courses_cache', wraps=self.manager.save_courses_cache) as save:
+            assert self.manager.update_course_progress('course_001', 0.5, save=False)
+            assert self.manager.update_course_progress('course_002', 0.2, save=False)
+            save.assert_not_called()
+            
+            assert self.manager.flush()
+            assert save.call_count == 1
+            
+            # 没有待保存的修改时不再写入
+            assert self.manager.flush()
+            assert save.call_count == 1
+        
+        new_manager = CourseManager(self.config_manager)
+        assert new_manager.get_course_by_id('course_001').progress == 0.5
+        assert new_manager.get_course_by_id('course_002').progress == 0.2
+    
     def test_get_statistics(self):
         """测试获取统计信息"""
         courses = self.create_sample_courses()
@@ -494,7 +694,26 @@ class TestCourseManager:
         assert stats['completion_rate'] == 1/3
         assert 0.0 <= stats['average_progress'] <= 1.0
         assert 'last_updated' in stats
-    
+
+    def test_statistics_urgent_and_overdue_counts(self):
+        """测试统计中的紧急和过期课程数与单独查询一致"""
+        now = datetime.now()
+        courses = [
+            Course(id="s1", title="已过期", url="", deadline=now - timedelta(days=2)),
+            Course(id="s2", title="即将到期", url="", deadline=now + timedelta(days=3)),
+            Course(id="s3", title="已完成", url="", progress=1.0, deadline=now + timedelta(days=1)),
+            Course(id="s4", title="时间充裕", url="", deadline=now + timedelta(days=30)),
+            Course(id="s5", title="无截止时间", url="")
+        ]
+        for course in courses:
+            self.manager._courses_cache[course.id] = course
+        self.manager._cache_loaded = True
+
+        stats = self.manager.get_statistics()
+
+        assert stats['overdue_courses'] == 1
+        assert stats['urgent_courses'] == len(self.manager.get_urgent_courses()) == 2
+
     def test_empty_statistics(self):
         """测试空课程列表的统计"""
         # 确保缓存为空
@@ -510,6 +729,23 @@ class TestCourseManager:
         assert stats['completion_rate'] == 0.0
         assert stats['average_progress'] == 0.0
     
+    def test_find_element_by_selectors_single_probe(self):
+        """测试选择器组只需一次evaluate即可确定匹配的选择器"""
+        mock_parent = Mock()
+        mock_parent.evaluate.return_value = 2
+
+        element = self.manager.find_element_by_selectors(Mock(), 'course_title', mock_parent)
+
+        assert mock_parent.evaluate.call_count == 1
+        mock_parent.locator.assert_called_once_with(self.manager._course_selectors['course_title'][2])
+        assert element is mock_parent.locator.return_value.first
+
+        # 没有匹配时返回None且不再逐个探测
+        mock_parent.reset_mock()
+        mock_parent.evaluate.return_value = -1
+        assert self.manager.find_element_by_selectors(Mock(), 'course_title', mock_parent) is None
+        mock_parent.locator.assert_not_called()
+
     def test_handle_pagination(self):
         """测试分页处理"""
         mock_page = Mock()
@@ -537,6 +773,8 @@ class TestCourseManager:
         
         # 验证点击了按钮
         assert mock_load_more.click.called
+        # 点击后等待课程数量增加，而不是固定休眠
+        assert mock_page.wait_for_function.called
 
 
 class TestCourseManagerIntegration:
@@ -4,6 +4,8 @@
 测试自动化登录功能，包括验证码识别、登录状态管理和登录管理器
 """
 
+import io
+import os
 import pytest
 import time
 import tempfile
@@ -81,7 +83,94 @@ class TestCaptchaRecognizer:
         
         result = self.recognizer._convert_to_pil(img_bytes)
         assert isinstance(result, Image.Image)
-    
+
+    def test_convert_base64_to_pil(self):
+        """测试base64与data URL格式转换"""
+        import io
+        import base64
+        test_image = self.create_test_image()
+        img_bytes = io.BytesIO()
+        test_image.save(img_bytes, format='PNG')
+        encoded = base64.b64encode(img_bytes.getvalue()).decode('ascii')
+
+        result = self.recognizer._convert_to_pil(f"data:image/png;base64,{encoded}")
+        assert result.size == test_image.size
+
+        result = self.recognizer._convert_to_pil(encoded)
+        assert result.size == test_image.size
+
+        # 非ASCII字符串按文件路径处理
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "验证码.png"
+            test_image.save(path)
+            result = self.recognizer._convert_to_pil(str(path))
+            assert result.size == test_image.size
+
+    def test_path_reads_are_cached(self):
+        """测试图片文件内容缓存及文件变化后失效"""
+        import os
+        test_image = self.create_test_image()
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "captcha.png"
+            test_image.save(path)
+
+            first = self.recognizer._read_path_bytes(path)
+            assert self.recognizer._read_path_bytes(str(path)) is first
+
+            self.create_test_image(width=120).save(path)
+            stat = os.stat(path)
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+            assert self.recognizer._convert_to_pil(path).size == (120, 40)
+
+    def test_decode_jpeg_bytes_with_simplejpeg(self):
+        """测试JPEG字节数据优先使用simplejpeg解码"""
+        import io
+        import numpy as np
+        from src.auto_study.automation import captcha_recognizer as module
+
+        test_image = self.create_test_image()
+        jpeg_bytes = io.BytesIO()
+        test_image.save(jpeg_bytes, format='JPEG')
+        decoded = np.zeros((40, 100, 3), dtype=np.uint8)
+
+        fake_simplejpeg = Mock()
+        fake_simplejpeg.decode_jpeg.return_value = decoded
+        with patch.object(module, 'simplejpeg', fake_simplejpeg):
+            result = self.recognizer._convert_to_pil(jpeg_bytes.getvalue())
+
+            # PNG数据仍由PIL解码
+            png_bytes = io.BytesIO()
+            test_image.save(png_bytes, format='PNG')
+            self.recognizer._convert_to_pil(png_bytes.getvalue())
+
+        assert result.size == (100, 40)
+        fake_simplejpeg.decode_jpeg.assert_called_once()
+
+    def test_recognize_raw_pixels(self):
+        """测试直接识别原始像素数据及ndarray输入"""
+        import numpy as np
+        test_image = self.create_test_image()
+
+        with patch.object(self.recognizer._ocr, 'classification', return_value="AB12") as mock_ocr:
+            result = self.recognizer.recognize_raw(test_image.tobytes(), test_image.size)
+            assert result == "AB12"
+
+            # 尺寸与数据长度不符时返回None
+            assert self.recognizer.recognize_raw(b"\x00" * 10, (100, 40)) is None
+            assert mock_ocr.call_count == 1
+
+        array_image = self.recognizer._convert_to_pil(np.asarray(test_image))
+        assert array_image.size == test_image.size
+
+    def test_pil_to_bytes_reuses_buffer(self):
+        """测试PNG编码复用缓冲区且结果互不影响"""
+        large = self.recognizer._pil_to_bytes(self.create_test_image(width=200))
+        small = self.recognizer._pil_to_bytes(self.create_test_image(width=50))
+
+        assert Image.open(io.BytesIO(large)).size == (200, 40)
+        assert Image.open(io.BytesIO(small)).size == (50, 40)
+
     def test_preprocess_image(self):
         """测试图片预处理"""
         test_image = self.create_test_image()
@@ -92,6 +181,36 @@ class TestCaptchaRecognizer:
         assert processed.size[0] > 0
         assert processed.size[1] > 0
     
+    def test_preprocess_matches_pil_filters(self):
+        """测试NumPy预处理与PIL增强链结果一致"""
+        import numpy as np
+        from PIL import ImageEnhance, ImageFilter
+
+        test_image = self.create_test_image(width=150, height=50, text="AB12")
+        expected = ImageEnhance.Contrast(test_image).enhance(1.5)
+        expected = ImageEnhance.Sharpness(expected).enhance(2.0)
+        expected = expected.filter(ImageFilter.MedianFilter(size=3))
+
+        processed = self.recognizer.preprocess_image(test_image)
+
+        assert processed.mode == expected.mode
+        diff = np.abs(np.asarray(processed, dtype=int) - np.asarray(expected, dtype=int))
+        assert diff.max() <= 1
+
+    def test_preprocess_follows_config_updates(self):
+        """测试预处理流程随配置更新重新生成"""
+        test_image = self.create_test_image()
+
+        self.recognizer.update_preprocess_config(
+            enhance_contrast=False, enhance_sharpness=False, remove_noise=False
+        )
+        assert self.recognizer.preprocess_image(test_image) is test_image
+
+        self.recognizer.update_preprocess_config(binarization=True, resize_factor=2.0)
+        processed = self.recognizer.preprocess_image(test_image)
+        assert processed.mode == '1'
+        assert processed.size == (200, 80)
+
     def test_clean_result(self):
         """测试识别结果清理"""
         # 测试基本清理
@@ -128,23 +247,169 @@ class TestCaptchaRecognizer:
         """测试批量识别"""
         images = [self.create_test_image() for _ in range(3)]
         
-        with patch.object(self.recognizer, 'recognize', return_value="TEST"):
+        with patch.object(self.recognizer, '_recognize', return_value=("TEST", 0.9)):
             results = self.recognizer.batch_recognize(images)
             
             assert len(results) == 3
             assert all(result == "TEST" for result in results.values())
-    
+
+    def test_batch_recognize_keeps_order(self):
+        """测试并行批量识别结果与输入顺序对应"""
+        texts = ["AAAA", "BBBB", "CCCC", "DDDD"]
+        images = [self.create_test_image(text=text) for text in texts]
+        lookup = {id(image): text for image, text in zip(images, texts)}
+
+        def fake_recognize(image, cache_key, preprocess, max_attempts):
+            time.sleep(0.01 * (len(texts) - texts.index(lookup[id(image)])))
+            return lookup[id(image)], 0.9
+
+        with patch.object(self.recognizer, '_recognize', side_effect=fake_recognize):
+            results = self.recognizer.batch_recognize(images, max_workers=4)
+
+        assert results == dict(enumerate(texts))
+        assert self.recognizer.batch_recognize([]) == {}
+
+    def test_batch_recognize_deduplicates_images(self):
+        """测试批量识别中重复图片只推理一次"""
+        image = self.create_test_image(text="AB12")
+        images = [image, image.copy(), image.copy()]
+
+        with patch.object(self.recognizer._ocr, 'classification', return_value="AB12") as mock_ocr:
+            results = self.recognizer.batch_recognize(images, max_attempts=1)
+
+        assert results == {0: "AB12", 1: "AB12", 2: "AB12"}
+        assert mock_ocr.call_count == 1
+        assert self.recognizer.get_recognition_stats()['successful_recognitions'] == 3
+
+    def test_batch_recognize_hashes_each_image_once(self):
+        """测试批量识别时每张图片只计算一次缓存键，失败的重复项不再重新识别"""
+        image = self.create_test_image(text="AB12")
+        images = [image, image.copy(), image.copy()]
+
+        with patch.object(self.recognizer._ocr, 'classification', return_value="") as mock_ocr, \
+                patch.object(self.recognizer, '_cache_key',
+                             wraps=self.recognizer._cache_key) as mock_key:
+            results = self.recognizer.batch_recognize(images, max_attempts=1)
+
+        assert results == {0: None, 1: None, 2: None}
+        assert mock_key.call_count == 3
+        assert mock_ocr.call_count == 1
+        stats = self.recognizer.get_recognition_stats()
+        assert stats['total_attempts'] == 3
+        assert stats['failed_recognitions'] == 3
+
+    def test_recognize_long_path_overwritten(self):
+        """测试超过100个字符的文件路径被覆盖后不会返回旧的缓存结果"""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "captcha_" + "x" * 120 + ".png")
+            assert len(path) > 100
+
+            self.create_test_image(text="AB12").save(path)
+            first_key = self.recognizer._cache_key(path, True)
+            with patch.object(self.recognizer._ocr, 'classification', return_value="AB12"):
+                assert self.recognizer.recognize(path, max_attempts=1) == "AB12"
+
+            self.create_test_image(text="CD34").save(path)
+            os.utime(path, ns=(0, 0))
+            assert self.recognizer._cache_key(path, True) != first_key
+            with patch.object(self.recognizer._ocr, 'classification', return_value="CD34") as mock_ocr:
+                assert self.recognizer.recognize(path, max_attempts=1) == "CD34"
+            assert mock_ocr.call_count == 1
+
+    def test_recognize_passes_image_without_png_encoding(self):
+        """测试识别时直接把PIL图像交给OCR引擎"""
+        test_image = self.create_test_image()
+        assert self.recognizer._ocr_accepts_image
+
+        with patch.object(self.recognizer._ocr, 'classification', return_value="AB12") as mock_ocr, \
+                patch.object(self.recognizer, '_pil_to_bytes') as mock_encode:
+            self.recognizer.recognize(test_image, max_attempts=1)
+
+        assert isinstance(mock_ocr.call_args[0][0], Image.Image)
+        mock_encode.assert_not_called()
+
+    def test_recognize_attempts_use_image_variants(self):
+        """测试多次尝试时每次使用不同的图片变体"""
+        test_image = self.create_test_image(width=100, height=40)
+
+        with patch.object(self.recognizer._ocr, 'classification', return_value="") as mock_ocr:
+            assert self.recognizer.recognize(test_image, max_attempts=5) is None
+
+        inputs = [call[0][0] for call in mock_ocr.call_args_list]
+        assert len(inputs) == 3
+        assert inputs[1].mode == '1'
+        assert inputs[2].size == (200, 80)
+
+    def test_recognize_uses_result_cache(self):
+        """测试相同图片的识别结果会被缓存"""
+        test_image = self.create_test_image()
+
+        with patch.object(self.recognizer._ocr, 'classification', return_value="AB12") as mock_ocr:
+            first = self.recognizer.recognize(test_image, max_attempts=1)
+            second = self.recognizer.recognize(test_image.copy(), max_attempts=1)
+
+            assert first == second == "AB12"
+            assert mock_ocr.call_count == 1
+
+            # 预处理配置变化后缓存失效
+            self.recognizer.update_preprocess_config(remove_noise=False)
+            self.recognizer.recognize(test_image, max_attempts=1)
+            assert mock_ocr.call_count == 2
+
+        stats = self.recognizer.get_recognition_stats()
+        assert stats['successful_recognitions'] == 3
+
+    def test_recognize_captcha_uses_lazy_shared_recognizers(self):
+        """测试便捷函数按需创建并复用识别器"""
+        from src.auto_study.automation import captcha_recognizer as module
+
+        module._get_recognizer.cache_clear()
+        with patch.object(module, 'CaptchaRecognizer') as mock_cls:
+            mock_cls.return_value.recognize.return_value = "1234"
+
+            assert module.recognize_captcha(b"img", model_type='number') == "1234"
+            module.recognize_captcha(b"img", model_type='number')
+            module.recognize_captcha(b"img", model_type='unknown')
+
+        assert [call.args for call in mock_cls.call_args_list] == [('number',), ('common',)]
+        module._get_recognizer.cache_clear()
+
     def test_save_failed_image(self):
         """测试保存失败图片"""
         test_image = self.create_test_image()
         
         with tempfile.TemporaryDirectory() as temp_dir:
             save_path = self.recognizer.save_failed_image(test_image, temp_dir)
+            self.recognizer.flush_failed_images()
             
             assert save_path is not None
             assert save_path.exists()
             assert save_path.name.startswith("failed_captcha_")
     
+    def test_save_failed_images_do_not_overwrite(self):
+        """测试连续保存的失败图片文件名互不相同"""
+        test_image = self.create_test_image()
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            paths = [self.recognizer.save_failed_image(test_image, temp_dir) for _ in range(5)]
+            self.recognizer.flush_failed_images()
+
+            assert len(set(paths)) == 5
+            assert all(path.exists() for path in paths)
+
+    def test_save_failed_png_bytes_unchanged(self):
+        """测试PNG字节数据原样写入"""
+        import io
+        png_bytes = io.BytesIO()
+        self.create_test_image().save(png_bytes, format='PNG')
+        png_bytes = png_bytes.getvalue()
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            save_path = self.recognizer.save_failed_image(png_bytes, temp_dir)
+            self.recognizer.flush_failed_images()
+
+            assert save_path.read_bytes() == png_bytes
+
     def test_get_recognition_stats(self):
         """测试获取识别统计"""
         stats = self.recognizer.get_recognition_stats()
@@ -154,6 +419,15 @@ class TestCaptchaRecognizer:
         assert 'failed_recognitions' in stats
         assert 'success_rate' in stats
     
+    def test_average_confidence_is_running_mean(self):
+        """测试平均置信度为成功识别置信度的均值"""
+        for confidence in (0.6, 0.9, 0.75):
+            self.recognizer._record_success(confidence)
+
+        stats = self.recognizer.get_recognition_stats()
+        assert stats['successful_recognitions'] == 3
+        assert stats['average_confidence'] == pytest.approx(0.75)
+
     def test_reset_stats(self):
         """测试重置统计"""
         # 模拟一些识别尝试